@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from utils.fsm import NO_TRANSITION, CompiledFSM, StateMachine, load_graphql, parse_graphql
+
+DEFINITION = {
+    'initial': 'a',
+    'events': [
+        {'name': 'go', 'from': 'a', 'to': 'b'},
+        {'name': 'go', 'from': '*', 'to': 'c'},
+        {'name': 'back', 'from': ['b', 'c'], 'to': 'a'},
+        {'name': 'reset', 'from': '*', 'to': 'a'},
+        {'name': 'reset', 'from': 'c', 'to': 'b'},
+    ]
+}
+
+
+def test_transition_table():
+    fsm = CompiledFSM(DEFINITION)
+    S, E = fsm.S, fsm.E
+    assert fsm.states == ('a', 'b', 'c')
+    assert fsm.initial == S.a
+    # '*' is a fallback: specific sources win whether they come before or after it
+    assert fsm.transitions[E.go] == [S.b, S.c, S.c]
+    assert fsm.transitions[E.reset] == [S.a, S.a, S.b]
+    assert fsm.transitions[E.back] == [NO_TRANSITION, S.a, S.a]
+    assert ('go', 'a', 'b') in fsm.edges()
+
+
+def test_unknown_initial_state():
+    with pytest.raises(ValueError):
+        CompiledFSM({'initial': 'x', 'events': [{'name': 'go', 'from': 'a', 'to': 'b'}]})
+
+
+def test_graphql_description():
+    fsm = load_graphql()
+    assert fsm.states == ('following', 'turning_away', 'wall_follow', 'searching')
+    assert fsm.states[fsm.initial] == 'following'
+    assert sorted(fsm.edges()) == sorted([
+        ('obstacle_detected', 'following', 'turning_away'),
+        ('front_clear', 'turning_away', 'wall_follow'),
+        ('line_found', 'wall_follow', 'following'),
+        ('timeout', 'wall_follow', 'searching'),
+        ('line_found', 'searching', 'following'),
+        ('search_timeout', 'searching', 'wall_follow'),
+    ])
+    definition = parse_graphql("  - initial: idle\n  - start: idle -> running\n  - stop: running -> idle\n")
+    assert CompiledFSM(definition).edges() == [('start', 'idle', 'running'), ('stop', 'running', 'idle')]
+
+
+def recording_machine(calls, before=None, leave=None):
+    machine = StateMachine(CompiledFSM(DEFINITION), clock=lambda: 0.0)
+    S, E = machine.fsm.S, machine.fsm.E
+
+    def handler(name, result=None):
+        def record(m, event, source, target):
+            calls.append((name, machine.fsm.events[event], machine.fsm.states[source],
+                          machine.fsm.states[target], machine.fsm.states[m.state]))
+            return result
+        return record
+
+    machine.on_before(E.go, handler('before', before))
+    machine.on_leave(S.a, handler('leave', leave))
+    machine.on_enter(S.b, handler('enter'))
+    machine.on_after(E.go, handler('after'))
+    return machine
+
+
+def test_handler_order():
+    calls = []
+    machine = recording_machine(calls)
+    assert machine.fire(machine.fsm.E.go)
+    assert machine.state == machine.fsm.S.b
+    # before and leave see the old state, enter and after the new one
+    assert calls == [('before', 'go', 'a', 'b', 'a'), ('leave', 'go', 'a', 'b', 'a'),
+                     ('enter', 'go', 'a', 'b', 'b'), ('after', 'go', 'a', 'b', 'b')]
+    assert machine.counts[machine.fsm.S.a][machine.fsm.S.b] == 1
+
+
+@pytest.mark.parametrize('before, leave', [(False, None), (None, False)])
+def test_before_or_leave_cancels(before, leave):
+    calls = []
+    machine = recording_machine(calls, before, leave)
+    assert not machine.fire(machine.fsm.E.go)
+    assert machine.state == machine.fsm.S.a
+    # as in statemachine.lua, leave still runs when before cancels
+    assert [call[0] for call in calls] == ['before', 'leave']
+
+
+def test_rejected_event():
+    machine = StateMachine(CompiledFSM(DEFINITION))
+    assert not machine.fire(machine.fsm.E.back)
+    assert machine.rejected[machine.fsm.E.back] == 1
+
+
+def test_async_handlers():
+    machine = StateMachine(CompiledFSM(DEFINITION))
+    S, E = machine.fsm.S, machine.fsm.E
+    entered = []
+
+    async def enter(m, event, source, target):
+        await asyncio.sleep(0)
+        entered.append(target)
+
+    machine.on_enter(S.b, enter)
+    with pytest.raises(RuntimeError):
+        machine.fire(E.go)
+    assert asyncio.run(machine.fire_async(E.go))
+    assert entered == [S.b] and machine.state == S.b
+
+    # Replacing or removing the coroutine handler makes fire() usable again
+    machine.on_enter(S.b, lambda *args: None)
+    assert machine.fire(E.back) and machine.fire(E.go)
+    machine.on_enter(S.b, enter)
+    machine.on_enter(S.b, None)
+    assert machine.fire(E.back)
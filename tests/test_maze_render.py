@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from utils.maze_generator_coppeliasim import MazeGenerator, WALL_BITS
+from utils.maze_render import ROBOT, frontier_cells, map_grid_arrays, render
+from utils.policy_sim import masks_from_mazes
+from utils.robot_solve import Direction, WallKnowledge, render_map
+from utils.scan_checkpoint import load_checkpoint, pack_state, write_checkpoint
+
+
+@pytest.mark.parametrize('scale', [2, 3, 5, 8])
+def test_cell_overlays_match_tiles(scale):
+    rng = np.random.default_rng(scale)
+    walls = np.zeros((7, 9), dtype=np.uint8)
+    robot = rng.random(walls.shape) < 0.3
+    image = render(walls, robot=robot, scale=scale, flip_y=False)
+
+    # Reference: every marked cell gets the same inset tile, built one cell at a time
+    inset = scale // 5
+    lo, hi = 1 + inset, scale - inset
+    if lo >= hi:
+        lo, hi = 0, scale
+    expected = np.zeros(image.shape, dtype=bool)
+    for y, x in zip(*np.nonzero(robot)):
+        expected[y * scale + lo:y * scale + hi, x * scale + lo:x * scale + hi] = True
+    assert np.array_equal(image == ROBOT, expected)
+
+
+def test_wall_arrays():
+    mazes = []
+    for seed in range(3):
+        maze = MazeGenerator(6, 4, seed=seed)
+        maze.generate_prim()
+        maze.place_obstacles(2)
+        mazes.append(maze)
+    walls, obstacles = mazes[0].wall_arrays()
+    assert walls.shape == obstacles.shape == (4, 6)
+    assert walls[1, 2] == mazes[0].wall_mask(2, 1)
+    assert {(x, y) for y, x in zip(*np.nonzero(obstacles))} == mazes[0].obstacles
+
+    stacked_walls, stacked_obstacles = masks_from_mazes(mazes)
+    assert stacked_walls.shape == (3, 4, 6)
+    assert np.array_equal(stacked_walls[2], mazes[2].wall_arrays()[0])
+    assert np.array_equal(stacked_obstacles[1], mazes[1].wall_arrays()[1])
+
+
+def test_map_grid_arrays_and_render_map(tmp_path):
+    knowledge = WallKnowledge([[[False] * 4 for _ in range(3)] for _ in range(3)])
+    knowledge.record(0, 0, Direction.RIGHT, True)
+    knowledge.record(0, 0, Direction.UP, False)
+    walls, unknown = map_grid_arrays(knowledge.map_grid, knowledge.known)
+    # Cell (0, 0) has its right (east) wall; the outer walls are known, up (+Y, south) is open
+    assert walls[0, 0] & WALL_BITS['east'] and not walls[0, 0] & WALL_BITS['south']
+    assert unknown[0, 0] == 0 and unknown[1, 1] == 15
+    assert frontier_cells(unknown)[0, 1] and not frontier_cells(unknown)[0, 0]
+
+    # The scanner's image and the one rendered from its checkpoint agree
+    path = tmp_path / 'scan.bin'
+    write_checkpoint(path, pack_state(knowledge, {(0, 0)}, [], (0, 0)))
+    state = load_checkpoint(path)
+    walls_loaded, unknown_loaded = map_grid_arrays([[w for w, k in row] for row in state.cells],
+                                                   [[k for w, k in row] for row in state.cells])
+    assert np.array_equal(walls_loaded, walls) and np.array_equal(unknown_loaded, unknown)
+    render_map(knowledge, str(tmp_path / 'scan.png'), (0, 0))
+    assert (tmp_path / 'scan.png').read_bytes().startswith(b'\x89PNG')
@@ -0,0 +1,77 @@
+from utils.fake_sim import FakeSim
+from utils.maze_generator_coppeliasim import MazeGenerator
+from utils.maze_streaming import MazeStreamer
+
+
+def make_maze(width, height):
+    maze = MazeGenerator(width, height, cell_size=2.0, seed=7)
+    maze.generate_prim()
+    return maze
+
+
+def scene_objects(sim, streamer):
+    """Streamed objects in the fake scene (everything but the robot, its parts and the floor)"""
+    return len(sim.objects) - 4 - (streamer.maze.floor is not None)
+
+
+def test_chunk_geometry():
+    streamer = MazeStreamer(FakeSim(), make_maze(20, 12), chunk_size=8, radius=1)
+    assert streamer.chunk_of((1.0, 1.0)) == (0, 0)
+    assert streamer.chunk_of((16.5, 3.0)) == (1, 0)
+    # Positions outside the maze are clamped to the border chunks
+    assert streamer.chunk_of((-5.0, 100.0)) == (0, 1)
+    assert streamer.chunk_of((1000.0, 0.0)) == (2, 0)
+    assert sorted(streamer.chunks_around((0, 0))) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    assert len(streamer.chunks_around((1, 1))) == 6
+    # Edge chunks only hold the cells inside the maze
+    assert len(streamer.chunk_cells((2, 1))) == 4 * 4
+
+
+def test_robot_crossing_large_maze_keeps_scene_bounded():
+    sim = FakeSim()
+    maze = make_maze(64, 64)
+    streamer = MazeStreamer(sim, maze, chunk_size=4, radius=1)
+    streamer.start()
+    window_objects = 0
+    # Drive diagonally across the maze and back along the bottom row
+    path = [(t, t) for t in range(0, 128, 1)] + [(t, 127.0) for t in range(127, -1, -1)]
+    for x, y in path:
+        sim.setObjectPosition(sim.robot, -1, [x + 0.5, y + 0.5, 0.138])
+        streamer.update([sim.getObjectPosition(sim.robot, -1)])
+        assert len(streamer.loaded) <= streamer.max_chunks
+        assert scene_objects(sim, streamer) == streamer.object_count()
+        window_objects = max(window_objects, streamer.object_count())
+    assert streamer.unloads > 0
+    # Never more than max_chunks chunks' worth of objects, a fraction of the whole maze
+    full = sum(len(maze.cell_parts(x, y)) for y in range(maze.height) for x in range(maze.width))
+    assert window_objects < full / 10
+
+    streamer.close()
+    assert len(sim.objects) == 4 and not maze.handles
+
+
+class ScriptSim(FakeSim):
+    """FakeSim whose chunk script creates objects but returns a result the streamer can't use"""
+
+    def __init__(self, result):
+        super().__init__()
+        self.result = result
+        self.scripts = 0
+
+    def executeScriptString(self, script, handle):
+        self.scripts += 1
+        created = [self.createPrimitiveShape(self.primitiveshape_cuboid, [1, 1, 1]) for _ in range(3)]
+        return self.result(created)
+
+
+def test_unusable_chunk_script_result_leaves_no_objects_behind():
+    # Results holding every created handle, but not one handle per part
+    for result in (lambda created: created, lambda created: created + [None],
+                   lambda created: (0, created + ['x'])):
+        sim = ScriptSim(result)
+        streamer = MazeStreamer(sim, make_maze(8, 8), chunk_size=4, radius=0)
+        streamer.update([(1.0, 1.0)])
+        streamer.update([(9.0, 9.0)])
+        # The script ran again for the second chunk: only the remote call failing disables it
+        assert sim.scripts == 2 and streamer.bulk
+        assert scene_objects(sim, streamer) == streamer.object_count() > 0
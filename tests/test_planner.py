@@ -0,0 +1,122 @@
+import random
+from collections import deque
+
+from utils.planner import STEPS, WallGrid, DStarLite, astar, jump_point_search, path_directions
+from utils.robot_solve import Direction, RobotNavigator, WallKnowledge
+from utils.fake_sim import FakeSim
+
+
+class Walls:
+    """Mutable set of blocked edges, stored on both sides like WallKnowledge"""
+
+    def __init__(self, height, width):
+        self.height, self.width = height, width
+        self.closed = set()
+
+    def set(self, y, x, d, wall):
+        dy, dx = STEPS[d]
+        for edge in ((y, x, d), (y + dy, x + dx, (d + 2) % 4)):
+            if wall:
+                self.closed.add(edge)
+            else:
+                self.closed.discard(edge)
+
+    def blocked(self, y, x, d):
+        return (y, x, d) in self.closed
+
+    def grid(self):
+        return WallGrid(self.height, self.width, self.blocked)
+
+
+def random_walls(rng, height, width, density):
+    walls = Walls(height, width)
+    for y in range(height):
+        for x in range(width):
+            for d in (0, 1):
+                if y + STEPS[d][0] < height and x + STEPS[d][1] < width and rng.random() < density:
+                    walls.set(y, x, d, True)
+    return walls
+
+
+def bfs_distance(grid, start, goal):
+    dist = {start: 0}
+    queue = deque([start])
+    while queue:
+        cell = queue.popleft()
+        if cell == goal:
+            return dist[cell]
+        for neighbor in grid.neighbors(cell):
+            if neighbor not in dist:
+                dist[neighbor] = dist[cell] + 1
+                queue.append(neighbor)
+    return None
+
+
+def check_path(grid, path, start, goal, expected):
+    if expected is None:
+        assert path == []
+        return
+    assert path[0] == start and path[-1] == goal
+    assert len(path) - 1 == expected
+    for (y, x), d in zip(path, path_directions(path)):
+        assert grid.is_open(y, x, d)
+
+
+def test_static_planners_match_bfs():
+    rng = random.Random(1)
+    for trial in range(300):
+        height, width = rng.randint(1, 12), rng.randint(1, 12)
+        walls = random_walls(rng, height, width, rng.choice((0.0, 0.2, 0.4, 0.6)))
+        grid = walls.grid()
+        start = (rng.randrange(height), rng.randrange(width))
+        goal = (rng.randrange(height), rng.randrange(width))
+        expected = bfs_distance(grid, start, goal)
+
+        check_path(grid, astar(start, goal, grid.neighbors), start, goal, expected)
+        check_path(grid, jump_point_search(grid, start, goal), start, goal, expected)
+        check_path(grid, DStarLite(grid, start, goal).path(), start, goal, expected)
+
+
+def test_dstar_lite_repairs_match_bfs():
+    rng = random.Random(2)
+    for trial in range(60):
+        height, width = rng.randint(2, 10), rng.randint(2, 10)
+        walls = random_walls(rng, height, width, 0.3)
+        grid = walls.grid()
+        start = (rng.randrange(height), rng.randrange(width))
+        goal = (rng.randrange(height), rng.randrange(width))
+        planner = DStarLite(grid, start, goal)
+
+        for step in range(25):
+            # Toggle a few interior walls, then move the start along the current path
+            for _ in range(rng.randint(1, 3)):
+                y, x, d = rng.randrange(height), rng.randrange(width), rng.randrange(4)
+                dy, dx = STEPS[d]
+                if not grid.in_bounds(y + dy, x + dx):
+                    continue
+                was_blocked = walls.blocked(y, x, d)
+                walls.set(y, x, d, not was_blocked)
+                planner.edge_changed((y, x), d, was_blocked)
+
+            path = planner.path()
+            check_path(grid, path, planner.start, goal, bfs_distance(grid, planner.start, goal))
+            if len(path) > 1:
+                planner.move_start(path[1])
+
+
+def test_navigator_listener_is_removed():
+    sim = FakeSim()
+    map_grid = [[[False] * 4 for _ in range(4)] for _ in range(4)]
+    knowledge = WallKnowledge(map_grid)
+    for _ in range(3):
+        navigator = RobotNavigator(sim, sim.robot, map_grid, sim.sensor, knowledge=knowledge)
+        navigator.planner = DStarLite(knowledge.planning_grid(), (0, 0), (3, 3))
+        navigator.detach()
+    assert knowledge.listeners == []
+
+    navigator = RobotNavigator(sim, sim.robot, map_grid, sim.sensor, knowledge=knowledge)
+    planner = navigator.planner = DStarLite(knowledge.planning_grid(), (0, 0), (3, 3))
+    assert len(planner.path()) == 7
+    knowledge.record(0, 0, Direction.UP, True)
+    knowledge.record(0, 0, Direction.RIGHT, True)
+    assert navigator.plan_stale and planner.path() == []
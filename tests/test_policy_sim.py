@@ -0,0 +1,190 @@
+from functools import partial
+
+import numpy as np
+
+from utils import policy_sim
+from utils.policy_sim import (EAST, EXITED, FOLLOWING, HEADING_OFFSETS, HEADING_WALLS, LOOP, NORTH,
+                              SEARCHING, SOUTH, TURNING_AWAY, WALL_FOLLOW, WEST)
+
+
+class ScalarMaze:
+    """One maze of a corpus, answered cell by cell from the raw wall masks"""
+
+    def __init__(self, walls, obstacles):
+        self.walls, self.obstacles = walls, obstacles
+        self.height, self.width = walls.shape
+
+    def next_cell(self, x, y, heading):
+        dx, dy = HEADING_OFFSETS[heading]
+        return x + dx, y + dy
+
+    def line(self, x, y, heading):
+        """Open passage (a guide line runs through it)"""
+        nx, ny = self.next_cell(x, y, heading)
+        return (0 <= nx < self.width and 0 <= ny < self.height
+                and not self.walls[y, x] & HEADING_WALLS[heading])
+
+    def blocked(self, x, y, heading):
+        nx, ny = self.next_cell(x, y, heading)
+        return not self.line(x, y, heading) or bool(self.obstacles[ny, nx])
+
+    def obstacle_ahead(self, x, y, heading):
+        return self.line(x, y, heading) and self.blocked(x, y, heading)
+
+
+def run_scalar(maze, decide, exit_cell, state=None):
+    """
+    Step one agent from (0, 0) heading south with decide(x, y, heading, state) ->
+    (heading, moves, state). Returns (status, steps, moves, revisits); loops are
+    found by remembering every state seen.
+    """
+    x, y, heading = 0, 0, SOUTH
+    seen = set()
+    visited = {(0, 0)}
+    steps = moves = revisits = 0
+    while (x, y) != exit_cell:
+        key = (x, y, heading, state)
+        if key in seen:
+            return LOOP, None, None, None
+        seen.add(key)
+        heading, move, state = decide(x, y, heading, state)
+        if move:
+            x, y = maze.next_cell(x, y, heading)
+            moves += 1
+            revisits += (x, y) in visited
+            visited.add((x, y))
+        steps += 1
+    return EXITED, steps, moves, revisits
+
+
+def right_hand(maze, x, y, heading):
+    right, left = (heading + 1) % 4, (heading + 3) % 4
+    if not maze.blocked(x, y, right):
+        return right, True
+    if not maze.blocked(x, y, heading):
+        return heading, True
+    return left, False
+
+
+def wall_follower(maze):
+    def decide(x, y, heading, state):
+        return (*right_hand(maze, x, y, heading), None)
+    return decide
+
+
+def line_follower(maze, wall_follow_steps=3, search_steps=2):
+    phases = max(wall_follow_steps, search_steps) + 2
+
+    def decide(x, y, heading, state):
+        mode, phase = state
+        right, left, back = (heading + 1) % 4, (heading + 3) % 4, (heading + 2) % 4
+        sees_obstacle = maze.obstacle_ahead(x, y, heading)
+        phase += 1
+        move = False
+        if mode == FOLLOWING:
+            if sees_obstacle:
+                return left, False, (TURNING_AWAY, 0)
+            heading = next(h for h in (right, heading, left, back) if maze.line(x, y, h) or h == back)
+            move = not maze.blocked(x, y, heading)
+        elif mode == TURNING_AWAY:
+            heading = left
+            if not maze.blocked(x, y, left):
+                mode, phase = WALL_FOLLOW, 0
+        elif mode == WALL_FOLLOW:
+            heading, move = right_hand(maze, x, y, heading)
+            nx, ny = maze.next_cell(x, y, heading) if move else (x, y)
+            on_line = move and any(maze.line(nx, ny, h) for h in range(4))
+            if on_line and not maze.obstacle_ahead(nx, ny, heading):
+                mode, phase = FOLLOWING, 0
+            elif phase > wall_follow_steps:
+                mode, phase = SEARCHING, 0
+        elif sees_obstacle:
+            # obstacle_detected is only defined from following: turn left, keep searching
+            heading = left
+        else:
+            heading = right
+            if maze.line(x, y, right):
+                mode, phase = FOLLOWING, 0
+            elif phase > search_steps:
+                mode, phase = WALL_FOLLOW, 0
+        return heading, move, (mode, min(phase, phases - 1))
+    return decide
+
+
+def braided(walls, rng, count):
+    """Open `count` random interior walls per maze, on both sides, so some walls stand free"""
+    walls = walls.copy()
+    m, h, w = walls.shape
+    for i in range(m):
+        for _ in range(count):
+            x, y = rng.integers(w - 1), rng.integers(h - 1)
+            if rng.random() < 0.5:
+                walls[i, y, x] &= 15 ^ HEADING_WALLS[EAST]
+                walls[i, y, x + 1] &= 15 ^ HEADING_WALLS[WEST]
+            else:
+                walls[i, y, x] &= 15 ^ HEADING_WALLS[SOUTH]
+                walls[i, y + 1, x] &= 15 ^ HEADING_WALLS[NORTH]
+    return walls
+
+
+def compare(walls, obstacles, simulate, policy, initial_state=None, exits=None):
+    h, w = walls.shape[1:]
+    if exits is None:
+        exits = np.tile([w - 1, h - 1], (len(walls), 1))
+    result = simulate(walls, obstacles, exits=exits)
+    for i in range(len(walls)):
+        maze = ScalarMaze(walls[i], obstacles[i])
+        status, steps, moves, revisits = run_scalar(maze, policy(maze), tuple(exits[i]), initial_state)
+        assert result['status'][i] == status, i
+        if status == EXITED:
+            assert (result['steps'][i], result['moves'][i], result['revisits'][i]) == (steps, moves, revisits), i
+    return result
+
+
+def test_wall_follower_matches_scalar_reference():
+    walls, obstacles = policy_sim.generate_corpus(150, 10, obstacles=6, seed=5)
+    compare(walls, obstacles, policy_sim.simulate_wall_follower, wall_follower)
+
+
+def test_line_follower_matches_scalar_reference():
+    walls, obstacles = policy_sim.generate_corpus(150, 10, obstacles=6, seed=5)
+    compare(walls, obstacles, policy_sim.simulate_line_follower, line_follower, (FOLLOWING, 0))
+    # Short timeouts, so wall_follow and searching also end by timing out
+    for wall_follow_steps, search_steps in ((0, 0), (1, 0), (2, 1)):
+        simulate = partial(policy_sim.simulate_line_follower,
+                           wall_follow_steps=wall_follow_steps, search_steps=search_steps)
+        policy = partial(line_follower, wall_follow_steps=wall_follow_steps, search_steps=search_steps)
+        compare(walls, obstacles, simulate, policy, (FOLLOWING, 0))
+
+
+def test_loops_match_scalar_reference():
+    # Free-standing walls and exits inside the maze make some agents circle forever
+    rng = np.random.default_rng(7)
+    for obstacle_count in (4, 15):
+        walls, obstacles = policy_sim.generate_corpus(150, 8, obstacles=obstacle_count, seed=11)
+        walls = braided(walls, rng, 12)
+        exits = rng.integers(0, 8, (len(walls), 2))
+        line = partial(policy_sim.simulate_line_follower, wall_follow_steps=0, search_steps=0)
+        for simulate, policy, state in (
+                (policy_sim.simulate_wall_follower, wall_follower, None),
+                (policy_sim.simulate_line_follower, line_follower, (FOLLOWING, 0)),
+                (line, partial(line_follower, wall_follow_steps=0, search_steps=0), (FOLLOWING, 0))):
+            result = compare(walls, obstacles, simulate, policy, state, exits)
+            assert (result['status'] == LOOP).any() and (result['status'] == EXITED).any()
+
+
+def test_wall_follower_loops_around_an_unreachable_exit():
+    # Open 3x3 room: following the right-hand wall from (0, 0) never reaches the center
+    walls = np.zeros((1, 3, 3), dtype=np.uint8)
+    result = policy_sim.simulate_wall_follower(walls, exits=[[1, 1]])
+    assert result['status'][0] == LOOP
+    maze = ScalarMaze(walls[0], np.zeros((3, 3), dtype=bool))
+    assert run_scalar(maze, wall_follower(maze), (1, 1))[0] == LOOP
+
+
+def test_edge_tables_close_the_boundary():
+    walls = np.zeros((1, 2, 2), dtype=np.uint8)
+    lines, blocked = policy_sim.edge_tables(walls)
+    # cell (0, 0): north and west are the boundary
+    assert blocked[0, 0] == (1 << NORTH) | (1 << WEST)
+    assert lines[0, 0] == (1 << EAST) | (1 << SOUTH)
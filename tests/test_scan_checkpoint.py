@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from utils.robot_solve import Direction, WallKnowledge
+from utils.scan_checkpoint import load_checkpoint, pack_state, unpack_state, write_checkpoint
+
+
+def random_knowledge(rng, size):
+    map_grid = [[[False] * 4 for _ in range(size)] for _ in range(size)]
+    knowledge = WallKnowledge(map_grid)
+    for y in range(size):
+        for x in range(size):
+            for direction in Direction:
+                if knowledge.neighbor(y, x, direction) is not None and rng.random() < 0.5:
+                    knowledge.record(y, x, direction, rng.random() < 0.5)
+    return knowledge
+
+
+def test_pack_unpack_round_trip():
+    rng = random.Random(3)
+    for size in (1, 3, 8, 13):
+        knowledge = random_knowledge(rng, size)
+        cells = [(y, x) for y in range(size) for x in range(size)]
+        visited = set(rng.sample(cells, rng.randint(1, len(cells))))
+        stack = rng.sample(sorted(visited), rng.randint(0, len(visited)))
+        position = rng.choice(cells)
+
+        state = unpack_state(pack_state(knowledge, visited, stack, position, 123, 45, 6.5, 1.5))
+        assert state.grid_size == size
+        assert state.visited == visited
+        assert state.stack == stack
+        assert state.position == position
+        assert (state.probes, state.moves, state.elapsed, state.cell_size) == (123, 45, 6.5, 1.5)
+
+        restored = WallKnowledge([[[False] * 4 for _ in range(size)] for _ in range(size)])
+        state.restore(restored)
+        assert restored.map_grid == knowledge.map_grid
+        assert restored.known == knowledge.known
+
+
+def test_checkpoint_file(tmp_path):
+    knowledge = random_knowledge(random.Random(4), 5)
+    path = tmp_path / 'scan.bin'
+    write_checkpoint(str(path), pack_state(knowledge, {(0, 0), (0, 1)}, [(0, 1)], (0, 0)))
+    state = load_checkpoint(str(path))
+    assert state.stack == [(0, 1)] and state.visited == {(0, 0), (0, 1)}
+    assert [p.name for p in tmp_path.iterdir()] == ['scan.bin']
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        unpack_state(b'not a checkpoint')
+
+    data = pack_state(random_knowledge(random.Random(5), 6), {(0, 0), (1, 0)}, [(1, 0)], (0, 0))
+    for length in (10, 20, len(data) - 1):
+        with pytest.raises(ValueError, match="Truncated checkpoint"):
+            unpack_state(data[:length])
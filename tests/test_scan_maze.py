@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from utils.fake_sim import FakeSim
+from utils.maze_generator_coppeliasim import MazeGenerator
+from utils.robot_solve import Direction, RobotNavigator, WallKnowledge, load_ground_truth, scan_maze
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    """The navigator pauses between moves for the viewer; offline runs need not wait"""
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+
+
+def setup(maze, navigator_class=RobotNavigator):
+    sim = FakeSim(maze)
+    map_grid = [[[False] * 4 for _ in range(maze.width)] for _ in range(maze.height)]
+    navigator = navigator_class(sim, sim.robot, map_grid, sim.sensor, maze.cell_size)
+    navigator.set_position(0, 0)
+    truth = WallKnowledge([[[False] * 4 for _ in range(maze.width)] for _ in range(maze.height)])
+    load_ground_truth(maze, truth)
+    return navigator, truth
+
+
+def make_maze(seed):
+    maze = MazeGenerator(5, 5, seed=seed)
+    maze.generate_prim()
+    return maze
+
+
+def test_scan_maps_the_whole_maze(capsys):
+    navigator, truth = setup(make_maze(2))
+    visited, stack = {(0, 0)}, [(0, 0)]
+    assert scan_maze(navigator, visited, stack) == 25
+    assert stack == [] and len(visited) == 25
+    assert navigator.knowledge.is_complete()
+    assert navigator.map_grid == truth.map_grid
+
+
+class UnreachableNavigator(RobotNavigator):
+    """Navigator that cannot get to one cell"""
+
+    unreachable = (4, 4)
+
+    def navigate_to(self, target_y, target_x):
+        if (target_y, target_x) == self.unreachable:
+            return False
+        return super().navigate_to(target_y, target_x)
+
+
+def test_scan_skips_unreachable_cells(capsys):
+    navigator, truth = setup(make_maze(2), UnreachableNavigator)
+    visited, stack = {(0, 0)}, [(0, 0)]
+    scan_maze(navigator, visited, stack)
+    assert stack == [] and (4, 4) not in visited
+    # Nothing was recorded from the wrong cell: every known wall agrees with the layout
+    knowledge = navigator.knowledge
+    for y in range(5):
+        for x in range(5):
+            for direction in Direction:
+                if knowledge.is_known(y, x, direction):
+                    assert knowledge.has_wall(y, x, direction) == truth.has_wall(y, x, direction)
+    assert "Skipped cell (4,4)" in capsys.readouterr().out
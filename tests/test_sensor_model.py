@@ -0,0 +1,48 @@
+import math
+
+import numpy as np
+import pytest
+
+from utils.maze_generator_coppeliasim import MazeGenerator
+from utils.sensor_model import SensorModel, ray_box_distances, ray_circle_distances, wall_boxes
+
+
+def test_ray_box_distances():
+    origins = np.array([[0.0, 0.0], [1.5, 0.0], [0.0, 5.0], [3.0, 0.0]])
+    directions = np.array([[1.0, 0.0], [1.0, 0.0], [1.0, 0.0], [1.0, 0.0]])
+    boxes = np.array([[1.0, -1.0, 2.0, 1.0]])
+    # hit, inside, parallel outside the slab, box behind the origin
+    assert ray_box_distances(origins, directions, boxes)[:, 0].tolist() == [1.0, 0.0, math.inf, math.inf]
+    diagonal = np.array([[math.sqrt(0.5), math.sqrt(0.5)]])
+    assert ray_box_distances(np.zeros((1, 2)), diagonal, boxes)[0, 0] == pytest.approx(math.sqrt(2))
+
+
+def test_ray_circle_distances():
+    origins = np.array([[0.0, 0.0], [3.2, 0.0], [0.0, 2.0], [5.0, 0.0]])
+    directions = np.tile([1.0, 0.0], (4, 1))
+    distances = ray_circle_distances(origins, directions, np.array([[3.0, 0.0]]), 1.0)
+    # hit, inside, passing above, circle behind the origin
+    assert distances[:, 0].tolist() == [2.0, 0.0, math.inf, math.inf]
+
+
+def test_cast_without_rays():
+    model = SensorModel([[1.0, -1.0, 2.0, 1.0]])
+    assert model.cast(np.empty((0, 2)), 0.0).shape == (0,)
+    assert model.cast(np.zeros((3, 0, 2)), np.zeros(0)).shape == (3, 0)
+    assert model.cell_walls([], 2.0).shape == (0, 4)
+    assert model.cast([0.0, 0.0], [0.0, math.pi]).tolist() == pytest.approx([1.0, math.nan], nan_ok=True)
+
+
+def test_cell_walls_match_generator():
+    maze = MazeGenerator(7, 5, seed=3)
+    maze.generate_prim()
+    model = SensorModel.from_maze(maze)
+    # Shared walls are kept once: every interior wall is in one box
+    assert len(wall_boxes(maze)) < sum(sum(cell['walls'].values()) for row in maze.cells for cell in row)
+
+    cells = [(y, x) for y in range(maze.height) for x in range(maze.width)]
+    detected = model.cell_walls(cells, maze.cell_size)
+    # robot_solve (y, x) cells with UP = +Y, which is the generator's south
+    expected = [[maze.cells[y][x]['walls'][name] for name in ('south', 'east', 'north', 'west')]
+                for y, x in cells]
+    assert detected.tolist() == expected
@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+import pytest
+
+from utils.maze_generator_coppeliasim import MazeGenerator
+from utils.robot_solve import Direction, WallKnowledge, load_ground_truth
+from utils.telemetry import TelemetryLogger
+from utils.telemetry_replay import TelemetryLog, build_map, sensor_statistics, threshold_sweep
+
+# Yaw the robot faces for each map direction (0 = +X, like get_direction_from_orientation)
+DIRECTION_YAWS = {Direction.RIGHT: 0.0, Direction.UP: math.pi / 2,
+                  Direction.LEFT: math.pi, Direction.DOWN: -math.pi / 2}
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """A robot turning on the spot in every cell of a 5x5 maze, nose reading 0.5m at walls"""
+    maze = MazeGenerator(5, 5, seed=11)
+    maze.generate_prim()
+    truth = WallKnowledge([[[False] * 4 for _ in range(5)] for _ in range(5)])
+    load_ground_truth(maze, truth)
+
+    path = str(tmp_path / 'run.tlm')
+    frame = 0
+    # A small buffer, so the writer wraps around many times
+    with TelemetryLogger(path, ['SensingNose', 'Side'], capacity=64, chunk_size=16) as log:
+        for y in range(5):
+            for x in range(5):
+                for direction, yaw in DIRECTION_YAWS.items():
+                    nose = 0.5 if truth.has_wall(y, x, direction) else None
+                    side = None if frame % 4 == 3 else 0.8
+                    # Slightly off center, well within the replay's center tolerance
+                    position = [(x + 0.5) * 2.0 + 0.05, (y + 0.5) * 2.0 - 0.05, 0.138]
+                    log.log(frame * 0.05, frame, position, [0.0, 0.0, yaw],
+                            {'SensingNose': nose, 'Side': side})
+                    frame += 1
+    return path, truth, frame
+
+
+def test_log_round_trip(recording):
+    path, truth, frames = recording
+    log = TelemetryLog(path)
+    assert log.sensor_names == ['SensingNose', 'Side'] and len(log) == frames
+    assert log.records['frame'].tolist() == list(range(frames))
+    time, position, orientation, sensors = next(log.frames())
+    assert time == 0.0 and position[0] == pytest.approx(1.05) and sensors['Side'] == pytest.approx(0.8)
+
+
+def test_sensor_statistics_and_sweep(recording):
+    path, truth, frames = recording
+    log = TelemetryLog(path)
+    stats = sensor_statistics(log, bins=4, max_range=2.0)
+
+    side = stats['Side']
+    assert side['detection_rate'] == pytest.approx(0.75)
+    assert side['mean'] == pytest.approx(0.8) and side['noise'] == pytest.approx(0.0)
+    counts, edges = side['histogram']
+    assert counts.tolist() == [0, frames * 3 // 4, 0, 0] and edges[-1] == 2.0
+
+    walls = sum(truth.has_wall(y, x, d) for y in range(5) for x in range(5) for d in Direction)
+    assert stats['SensingNose']['detection_rate'] == pytest.approx(walls / frames)
+    rates = threshold_sweep(log.sensor('SensingNose'), [0.4, 0.5, 1.1])
+    assert rates.tolist() == pytest.approx([0.0, walls / frames, walls / frames])
+
+
+def test_build_map_matches_layout(recording):
+    path, truth, frames = recording
+    map_grid, knowledge = build_map(TelemetryLog(path), grid_size=5)
+    assert knowledge.is_complete()
+    assert map_grid == truth.map_grid
+    # A threshold below every reading sees no walls at all inside the maze
+    map_grid, knowledge = build_map(TelemetryLog(path), threshold=0.4, grid_size=5)
+    assert not any(map_grid[2][2])
+    assert np.array_equal(np.asarray(knowledge.known), np.ones((5, 5, 4), dtype=bool))
@@ -0,0 +1,12 @@
+"""
+Maze tools for the CoppeliaSim BubbleRob maze
+
+Run the tools through the package entry point, e.g.
+
+    python -m utils generate
+    python -m utils solve --ground-truth
+    python -m utils bench run --out base.json
+
+Submodules are only imported when used, so e.g. MazeGenerator and the
+planners load without the simulator client or rich installed.
+"""
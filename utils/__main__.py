@@ -0,0 +1,51 @@
+"""
+Single entry point for the maze tools: python -m utils <command> [args]
+
+Each command's module is imported only when that command runs, so short
+invocations don't pay for the simulator client, rich or NumPy unless needed.
+"""
+
+import importlib
+import sys
+
+# command -> (module, description)
+COMMANDS = {
+    'generate': ('maze_generator_coppeliasim', "generate a maze and build it in CoppeliaSim"),
+    'solve': ('robot_solve', "scan or navigate the maze with the robot"),
+    'monitor': ('robot_sensor_monitor', "print or log the robot's sensors"),
+    'control': ('robot_control_interactive', "drive the robot from the keyboard or a command script"),
+    'replay': ('telemetry_replay', "analyze a recorded telemetry log"),
+    'bench': ('benchmark', "run or compare benchmarks"),
+    'session': ('session', "start, stop or inspect the shared simulator session"),
+    'stream': ('maze_streaming', "build only the part of a saved maze around the robots"),
+    'policy': ('policy_sim', "score the wall and line follower policies on many mazes"),
+    'fsm': ('fsm', "compile an FSM description and time its transitions"),
+    'render': ('maze_render', "render a maze layout as PNG/PPM or in the terminal"),
+}
+
+
+def usage():
+    lines = ["usage: python -m utils <command> [args]", "", "commands:"]
+    lines += [f"  {name:10s} {description}" for name, (_, description) in COMMANDS.items()]
+    lines += ["", "Run python -m utils <command> --help for the options of a command."]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0
+    command = argv[0]
+    if command not in COMMANDS:
+        print(f"unknown command: {command}\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    module = importlib.import_module(f'.{COMMANDS[command][0]}', __package__)
+    # The command's own argument parser reads sys.argv
+    sys.argv = [f'utils {command}'] + argv[1:]
+    return module.main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,378 @@
+"""
+Reproducible benchmarks for maze generation, scene building, scanning and navigation
+
+Runs against the offline FakeSim by default (or a live CoppeliaSim with --live)
+and writes machine-readable results, so regressions show up as a diff:
+
+    python -m utils bench run --out base.json
+    python -m utils bench run --out new.json
+    python -m utils bench compare base.json new.json
+
+Every case reports wall time (min / median over repeats) plus deterministic
+counters such as remote calls, sensor probes and simulated sleep time.
+`compare` prints every counter that changed, but only counts an increase in a
+call counter, in probes or in sleep_seconds as a regression, along with a
+median time more than the tolerance above the baseline.
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+from .maze_generator_coppeliasim import MazeGenerator
+from .fake_sim import FakeSim
+from .sim_profiler import SimProfiler, ProfiledSim
+from .motion_controller import WheelMotionController, find_motors
+from . import robot_solve
+
+DEFAULT_SIZES = [8, 16, 32, 64]
+SCAN_SIZES = [8, 16]
+
+
+@contextlib.contextmanager
+def virtual_sleep(counters):
+    """Replace time.sleep with a counter so offline runs don't wait on real time"""
+    original = time.sleep
+
+    def sleep(seconds):
+        counters['sleep_calls'] = counters.get('sleep_calls', 0) + 1
+        counters['sleep_seconds'] = round(counters.get('sleep_seconds', 0.0) + seconds, 6)
+
+    time.sleep = sleep
+    try:
+        yield
+    finally:
+        time.sleep = original
+
+
+def make_maze(size, seed, obstacles=0):
+    with contextlib.redirect_stdout(io.StringIO()):
+        maze = MazeGenerator(size, size, seed=seed)
+        maze.generate_prim()
+        if obstacles:
+            maze.place_obstacles(obstacles)
+    return maze
+
+
+def measure(func, repeats):
+    """
+    Run func repeats times; returns (timing dict, counters of the last run).
+    If func has a setup attribute, setup() runs untimed before each repeat and
+    its result is passed as func's second argument.
+    """
+    times = []
+    counters = {}
+    setup = getattr(func, 'setup', None)
+    for _ in range(repeats):
+        counters = {}
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func(counters, *args)
+        times.append(time.perf_counter() - start)
+    return {'time_min': min(times), 'time_median': statistics.median(times), 'repeats': repeats}, counters
+
+
+def count_calls(profiler, counters):
+    counters['remote_calls'] = sum(s.count for s in profiler.calls.values())
+    for name, stats in sorted(profiler.calls.items()):
+        counters[f'calls.{name}'] = stats.count
+
+
+def bench_generate(size, seed):
+    def run(counters):
+        maze = MazeGenerator(size, size, seed=seed)
+        maze.generate_prim()
+        counters['open_walls'] = sum(bin(maze.wall_mask(x, y) ^ 15).count('1')
+                                     for y in range(size) for x in range(size))
+    return run
+
+
+def bench_shortest_path(size, seed):
+    maze = make_maze(size, seed)
+
+    def run(counters):
+        path = maze.find_shortest_path(0, 0, size - 1, size - 1)
+        counters['path_cells'] = len(path)
+    return run
+
+
+def bench_place_obstacles(size, seed):
+    maze = make_maze(size, seed)
+
+    def run(counters, maze):
+        random.seed(seed)
+        maze.place_obstacles(num_obstacles=size)
+        counters['obstacles'] = len(maze.obstacles)
+    # Each repeat places obstacles into a fresh copy of the generated maze
+    run.setup = lambda: copy.deepcopy(maze)
+    return run
+
+
+def bench_build_scene(size, seed, sim_factory):
+    maze = make_maze(size, seed, obstacles=size // 2)
+
+    def run(counters):
+        profiler = SimProfiler()
+        sim = ProfiledSim(sim_factory(None), profiler)
+        maze.create_in_coppeliasim(sim)
+        count_calls(profiler, counters)
+        maze.remove_from_coppeliasim(sim)
+    return run
+
+
+def bench_scan(size, seed, sim_factory):
+    maze = make_maze(size, seed)
+
+    def run(counters):
+        profiler = SimProfiler()
+        sim = ProfiledSim(sim_factory(maze), profiler)
+        robot = sim.getObject('/BubbleRobot')
+        sensor = sim.getObject('./SensingNose')
+        map_grid = [[[False, False, False, False] for _ in range(size)] for _ in range(size)]
+        with virtual_sleep(counters):
+            navigator = robot_solve.RobotNavigator(sim, robot, map_grid, sensor, maze.cell_size)
+            navigator.set_position(0, 0)
+            counters['cells_scanned'] = robot_solve.scan_maze(navigator, {(0, 0)}, [(0, 0)])
+        counters['probes'] = navigator.probe_count
+        count_calls(profiler, counters)
+    return run
+
+
+def bench_navigate(size, seed, sim_factory, pairs=20):
+    maze = make_maze(size, seed)
+    rng = random.Random(seed)
+    cells = [(y, x) for y in range(size) for x in range(size)]
+    targets = [rng.choice(cells) for _ in range(pairs)]
+
+    def run(counters):
+        profiler = SimProfiler()
+        sim = ProfiledSim(sim_factory(maze), profiler)
+        robot = sim.getObject('/BubbleRobot')
+        sensor = sim.getObject('./SensingNose')
+        map_grid = [[[False, False, False, False] for _ in range(size)] for _ in range(size)]
+        with virtual_sleep(counters):
+            navigator = robot_solve.RobotNavigator(sim, robot, map_grid, sensor, maze.cell_size)
+            robot_solve.load_ground_truth(maze, navigator.knowledge)
+            navigator.set_position(0, 0)
+            reached = sum(navigator.navigate_to(y, x) for y, x in targets)
+        counters['targets_reached'] = reached
+        counters['probes'] = navigator.probe_count
+        count_calls(profiler, counters)
+    return run
+
+
+def bench_explore_to(size, seed, sim_factory):
+    """Navigate to the far corner of an unmapped maze, repairing the D* Lite plan at each new wall"""
+    maze = make_maze(size, seed)
+
+    def run(counters):
+        profiler = SimProfiler()
+        sim = ProfiledSim(sim_factory(maze), profiler)
+        robot = sim.getObject('/BubbleRobot')
+        sensor = sim.getObject('./SensingNose')
+        map_grid = [[[False, False, False, False] for _ in range(size)] for _ in range(size)]
+        with virtual_sleep(counters):
+            navigator = robot_solve.RobotNavigator(sim, robot, map_grid, sensor, maze.cell_size)
+            navigator.set_position(0, 0)
+            counters['reached'] = navigator.navigate_to(size - 1, size - 1)
+        counters['probes'] = navigator.probe_count
+        counters['moves'] = navigator.motion_count
+        counters['planner_expansions'] = navigator.planner.expansions
+        count_calls(profiler, counters)
+    return run
+
+
+def bench_explore_exit(size, seed, sim_factory):
+    """Explore an unmapped maze only until the shortest route to the exit is proven"""
+    maze = make_maze(size, seed)
+
+    def run(counters):
+        profiler = SimProfiler()
+        sim = ProfiledSim(sim_factory(maze), profiler)
+        robot = sim.getObject('/BubbleRobot')
+        sensor = sim.getObject('./SensingNose')
+        map_grid = [[[False, False, False, False] for _ in range(size)] for _ in range(size)]
+        with virtual_sleep(counters):
+            navigator = robot_solve.RobotNavigator(sim, robot, map_grid, sensor, maze.cell_size)
+            navigator.set_position(0, 0)
+            route = robot_solve.explore_to_goal(navigator, (size - 1, size - 1))
+        counters['route_cells'] = len(route) if route is not None else -1
+        counters['probes'] = navigator.probe_count
+        counters['moves'] = navigator.motion_count
+        count_calls(profiler, counters)
+    return run
+
+
+def bench_drive(size, seed, sim_factory):
+    maze = make_maze(size, seed)
+
+    def run(counters):
+        profiler = SimProfiler()
+        sim = ProfiledSim(sim_factory(maze), profiler)
+        robot = sim.getObject('/BubbleRobot')
+        sensor = sim.getObject('./SensingNose')
+        map_grid = [[[False, False, False, False] for _ in range(size)] for _ in range(size)]
+        with virtual_sleep(counters):
+            navigator = robot_solve.RobotNavigator(sim, robot, map_grid, sensor, maze.cell_size)
+            robot_solve.load_ground_truth(maze, navigator.knowledge)
+            navigator.set_position(0, 0)
+            route = robot_solve.find_route(navigator.knowledge, (0, 0), (size - 1, size - 1))
+            left_motor, right_motor = find_motors(sim)
+            controller = WheelMotionController(sim, robot, left_motor, right_motor, maze.cell_size)
+            stats = controller.drive(route, start_yaw=0.0)
+        counters['route_cells'] = stats['cells']
+        counters['sim_seconds'] = round(stats['sim_time'], 6)
+        counters['pose_polls'] = stats['pose_polls']
+        count_calls(profiler, counters)
+    return run
+
+
+def build_cases(sizes, scan_sizes, seed, sim_factory):
+    cases = {}
+    for size in sizes:
+        cases[f'generate_prim/{size}'] = bench_generate(size, seed)
+        cases[f'find_shortest_path/{size}'] = bench_shortest_path(size, seed)
+        cases[f'place_obstacles/{size}'] = bench_place_obstacles(size, seed)
+        cases[f'create_in_coppeliasim/{size}'] = bench_build_scene(size, seed, sim_factory)
+    for size in scan_sizes:
+        cases[f'scan/{size}'] = bench_scan(size, seed, sim_factory)
+        cases[f'navigate_to/{size}'] = bench_navigate(size, seed, sim_factory)
+        cases[f'explore_to/{size}'] = bench_explore_to(size, seed, sim_factory)
+        cases[f'explore_exit/{size}'] = bench_explore_exit(size, seed, sim_factory)
+        cases[f'drive/{size}'] = bench_drive(size, seed, sim_factory)
+    return cases
+
+
+def live_sim_factory():
+    """
+    Factory returning the live CoppeliaSim `sim` with the given maze built in the
+    scene (an empty scene for None). The maze built for the previous case is
+    removed first; factory.close() removes the last one.
+    """
+    from .connection import connect, get_api
+    client = connect()
+    client.setStepping(True)
+    sim = get_api(client)
+    built = []
+
+    def close():
+        if built:
+            built.pop().remove_from_coppeliasim(sim)
+
+    def factory(maze):
+        if built and built[0] is maze:
+            return sim
+        close()
+        if maze is not None:
+            maze.create_in_coppeliasim(sim)
+            built.append(maze)
+        return sim
+    factory.close = close
+    return factory
+
+
+def run_benchmarks(args):
+    sim_factory = live_sim_factory() if args.live else FakeSim
+    cases = build_cases(args.sizes, args.scan_sizes, args.seed, sim_factory)
+    results = {}
+    try:
+        for name, func in cases.items():
+            if args.filter and args.filter not in name:
+                continue
+            timing, counters = measure(func, args.repeats)
+            results[name] = {**timing, 'counters': counters}
+            print(f"{name:32s} median {timing['time_median'] * 1000:10.3f}ms  "
+                  f"min {timing['time_min'] * 1000:10.3f}ms  "
+                  + "  ".join(f"{k}={v}" for k, v in counters.items() if '.' not in k))
+    finally:
+        if hasattr(sim_factory, 'close'):
+            sim_factory.close()
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': 'live' if args.live else 'fake',
+            'seed': args.seed,
+            'repeats': args.repeats,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'results': results
+    }
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\nResults written to {args.out}")
+
+
+def compare_results(args):
+    with open(args.base) as f:
+        base = json.load(f)['results']
+    with open(args.new) as f:
+        new = json.load(f)['results']
+
+    regressions = 0
+    for name in sorted(set(base) | set(new)):
+        if name not in base or name not in new:
+            print(f"{name:32s} only in {'new' if name in new else 'base'}")
+            continue
+        old_time, new_time = base[name]['time_median'], new[name]['time_median']
+        change = (new_time - old_time) / old_time if old_time else 0.0
+        flag = ''
+        if change > args.tolerance:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif change < -args.tolerance:
+            flag = '  faster'
+        print(f"{name:32s} {old_time * 1000:10.3f}ms -> {new_time * 1000:10.3f}ms {change * 100:+7.1f}%{flag}")
+
+        old_counters, new_counters = base[name]['counters'], new[name]['counters']
+        for key in sorted(set(old_counters) | set(new_counters)):
+            if old_counters.get(key) != new_counters.get(key):
+                print(f"    {key}: {old_counters.get(key)} -> {new_counters.get(key)}")
+                if (isinstance(new_counters.get(key), (int, float))
+                        and isinstance(old_counters.get(key), (int, float))
+                        and new_counters[key] > old_counters[key]
+                        and ('calls' in key or key in ('probes', 'sleep_seconds'))):
+                    regressions += 1
+
+    print(f"\n{regressions} regression(s)")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maze tool benchmarks")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help="run the benchmark suite")
+    run.add_argument('--out', help="write results as JSON")
+    run.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    run.add_argument('--scan-sizes', type=int, nargs='+', default=SCAN_SIZES)
+    run.add_argument('--repeats', type=int, default=5)
+    run.add_argument('--seed', type=int, default=1)
+    run.add_argument('--filter', help="only run cases whose name contains this text")
+    run.add_argument('--live', action='store_true', help="use a running CoppeliaSim instead of FakeSim")
+
+    compare = sub.add_parser('compare', help="compare two result files")
+    compare.add_argument('base')
+    compare.add_argument('new')
+    compare.add_argument('--tolerance', type=float, default=0.10,
+                         help="relative slowdown reported as a regression (default: 0.10)")
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run_benchmarks(args)
+    else:
+        sys.exit(compare_results(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Connecting to CoppeliaSim with a cached remote API description
+
+RemoteAPIClient.getObject('sim') downloads the description of every `sim`
+function and constant on each connect. It only changes with the CoppeliaSim
+version, so it is kept in a cache file and handed back to getObject, and a
+connect costs a single version query instead of the full download.
+
+    MAZE_API_CACHE=0      disable the cache
+    MAZE_API_CACHE=DIR    keep the cache in DIR (default: ~/.cache/coppelia_maze)
+"""
+
+import json
+import os
+
+CACHE_ENV = 'MAZE_API_CACHE'
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'coppelia_maze')
+
+# Constant in the `sim` description naming the parameter that holds the program version
+VERSION_PARAM = 'intparam_program_full_version'
+
+
+def cache_path(name):
+    """Cache file for the description of API object `name`, or None if caching is disabled"""
+    setting = os.environ.get(CACHE_ENV, '')
+    if setting == '0':
+        return None
+    return os.path.join(setting or DEFAULT_CACHE_DIR, f'{name}_api.json')
+
+
+def load_api_info(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_api_info(path, entry):
+    """Write the cache atomically, so concurrent processes never read half a file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, path)
+
+
+def server_version(client, info):
+    """CoppeliaSim version reported by the server, or None if the description has no version parameter"""
+    param = info.get(VERSION_PARAM, {}).get('const')
+    if param is None:
+        return None
+    return client.call('sim.getInt32Param', [param])
+
+
+def connect(host='localhost', port=23000, session=True):
+    """
+    Client for CoppeliaSim: the running maze session if there is one (see session.py),
+    otherwise a new ZMQ remote API client (imported here so the tools load without it).
+
+    Args:
+        session: attach to a running session; False always opens a direct connection
+    """
+    if session:
+        from .session import attach
+        client = attach()
+        if client is not None:
+            return client
+    from coppeliasim_zmqremoteapi_client import RemoteAPIClient
+    return RemoteAPIClient(host, port)
+
+
+def get_api(client, name='sim', refresh=False):
+    """
+    client.getObject(name), using the cached API description when it matches the server.
+
+    Args:
+        refresh: ignore the cache and download the description again
+    """
+    if getattr(client, 'sim', None) is not None and name == 'sim':
+        return client.sim  # session client: the API is already loaded in the session
+    if name != 'sim':
+        client.call('zmqRemoteApi.require', [name])  # load the module on the server side
+    path = cache_path(name)
+    entry = None if refresh or path is None else load_api_info(path)
+    if entry is not None:
+        info = entry.get('info', {})
+        if name != 'sim' or server_version(client, info) == entry.get('version'):
+            return client.getObject(name, _info=info)
+
+    info = client.call('zmqRemoteApi.info', [name])
+    if path is not None:
+        version = server_version(client, info) if name == 'sim' else None
+        save_api_info(path, {'version': version, 'info': info})
+    return client.getObject(name, _info=info)
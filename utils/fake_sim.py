@@ -0,0 +1,239 @@
+"""
+Offline stand-in for the CoppeliaSim `sim` object
+
+Implements the part of the remote API used by the tools in this folder
+(object creation and poses, stepping, object lookup and the front proximity
+sensor), backed by a MazeGenerator layout instead of a physics scene.
+Pass a sensor_model.SensorModel for analytic ray casting against walls and obstacles.
+Used for benchmarks and for trying the scanner without a running simulator.
+"""
+
+import math
+
+
+class FakeSim:
+    """In-process `sim` replacement driven by a MazeGenerator maze"""
+
+    # Constants used by the tools
+    handle_all = -2
+    handle_world = -1
+    handle_scene = -12
+    handle_sandboxscript = -11
+    simulation_stopped = 0
+    simulation_advancing_running = 17
+    primitiveshape_cuboid = 3
+    primitiveshape_cylinder = 5
+    colorcomponent_ambient_diffuse = 0
+    shapeintparam_respondable = 3004
+    object_shape_type = 0
+    object_joint_type = 1
+    object_visionsensor_type = 9
+    object_proximitysensor_type = 5
+
+    def __init__(self, maze=None, dt=0.05, sensor_range=2.0, wall_thickness=0.05,
+                 wheel_radius=0.04, half_track=0.1, sensor_model=None):
+        """
+        Args:
+            maze: MazeGenerator whose walls the proximity sensor sees (None for an empty world)
+            dt: simulation time step in seconds
+            sensor_range: detection range of the proximity sensor in meters
+            wall_thickness: wall thickness used by create_in_coppeliasim
+            wheel_radius, half_track: differential drive geometry used when the motors turn
+            sensor_model: sensor_model.SensorModel to answer proximity queries with
+                (walls, obstacles, any heading, noise); by default walls are looked up
+                on the grid along the nearest axis
+        """
+        self.maze = maze
+        self.sensor_model = sensor_model
+        self.dt = dt
+        self.sensor_range = sensor_range
+        self.wall_thickness = wall_thickness
+        self.wheel_radius = wheel_radius
+        self.half_track = half_track
+        self.joint_velocities = {}
+        self.time = 0.0
+        self.state = self.simulation_stopped
+        self.objects = {}
+        self.next_handle = 1
+
+        self.robot = self._add_object('BubbleRobot', self.object_shape_type,
+                                      position=[1.0, 1.0, 0.138])
+        self.sensor = self._add_object('SensingNose', self.object_proximitysensor_type,
+                                       parent=self.robot)
+        self.left_motor = self._add_object('leftMotor', self.object_joint_type, parent=self.robot)
+        self.right_motor = self._add_object('rightMotor', self.object_joint_type, parent=self.robot)
+
+    def _add_object(self, alias, obj_type, position=None, parent=-1):
+        handle = self.next_handle
+        self.next_handle += 1
+        self.objects[handle] = {
+            'alias': alias,
+            'type': obj_type,
+            'parent': parent,
+            'position': list(position or [0.0, 0.0, 0.0]),
+            'orientation': [0.0, 0.0, 0.0]
+        }
+        return handle
+
+    # --- Scene objects -------------------------------------------------------
+
+    def createPrimitiveShape(self, shape_type, sizes, options=0):
+        handle = self._add_object(f'Shape{self.next_handle}', self.object_shape_type)
+        self.objects[handle]['size'] = list(sizes)
+        return handle
+
+    def removeObjects(self, handles, *args):
+        for handle in handles:
+            self.objects.pop(handle, None)
+
+    def getObject(self, path, options=None):
+        alias = path.split('/')[-1]
+        for handle, obj in self.objects.items():
+            if obj['alias'] == alias:
+                return handle
+        raise Exception(f"object does not exist: {path}")
+
+    def getObjectAlias(self, handle, options=-1):
+        if options != 2:
+            return self.objects[handle]['alias']
+        # options=2: full path through the parents
+        names = []
+        while handle != -1:
+            names.append(self.objects[handle]['alias'])
+            handle = self.objects[handle]['parent']
+        return '/' + '/'.join(reversed(names))
+
+    def setObjectAlias(self, handle, alias):
+        self.objects[handle]['alias'] = alias
+
+    def getObjectsInTree(self, base, obj_type=-2, options=0):
+        def in_tree(handle):
+            while handle != -1:
+                if handle == base:
+                    return True
+                handle = self.objects[handle]['parent']
+            return base == self.handle_scene
+
+        handles = []
+        for handle, obj in self.objects.items():
+            if obj_type != self.handle_all and obj['type'] != obj_type:
+                continue
+            if options & 1 and handle == base:
+                continue
+            if options & 2 and obj['parent'] != (-1 if base == self.handle_scene else base):
+                continue
+            if in_tree(handle):
+                handles.append(handle)
+        return handles
+
+    def getObjectPosition(self, handle, relative_to=-1):
+        return list(self.objects[handle]['position'])
+
+    def setObjectPosition(self, handle, relative_to, position):
+        self.objects[handle]['position'] = list(position)
+
+    def getObjectOrientation(self, handle, relative_to=-1):
+        return list(self.objects[handle]['orientation'])
+
+    def setObjectOrientation(self, handle, relative_to, orientation):
+        self.objects[handle]['orientation'] = list(orientation)
+
+    def setObjectColor(self, handle, index, component, color):
+        pass
+
+    def setObjectInt32Param(self, handle, param, value):
+        pass
+
+    # --- Simulation ----------------------------------------------------------
+
+    def setJointTargetVelocity(self, handle, velocity, *args):
+        self.joint_velocities[handle] = velocity
+
+    def step(self):
+        self.time += self.dt
+        left = self.joint_velocities.get(self.left_motor, 0.0)
+        right = self.joint_velocities.get(self.right_motor, 0.0)
+        if left or right:
+            self._drive(left, right)
+
+    def _drive(self, left, right):
+        """Move the robot one time step as an ideal differential drive"""
+        robot = self.objects[self.robot]
+        linear = self.wheel_radius * (left + right) / 2
+        angular = self.wheel_radius * (right - left) / (2 * self.half_track)
+        yaw = robot['orientation'][2]
+        mid_yaw = yaw + angular * self.dt / 2
+        robot['position'][0] += linear * math.cos(mid_yaw) * self.dt
+        robot['position'][1] += linear * math.sin(mid_yaw) * self.dt
+        yaw += angular * self.dt
+        robot['orientation'][2] = math.atan2(math.sin(yaw), math.cos(yaw))
+
+    def getSimulationTime(self):
+        return self.time
+
+    def getSimulationTimeStep(self):
+        return self.dt
+
+    def getSimulationState(self):
+        return self.state
+
+    def startSimulation(self):
+        self.state = self.simulation_advancing_running
+
+    def stopSimulation(self):
+        self.state = self.simulation_stopped
+        self.time = 0.0
+
+    def setStepping(self, enable=True):
+        pass
+
+    # --- Sensors -------------------------------------------------------------
+
+    def checkProximitySensor(self, sensor_handle, entity=-2):
+        """
+        Distance from the robot center to the first wall along the robot heading.
+        Returns (detected, distance, ...) like the remote API.
+        """
+        if self.sensor_model is not None:
+            robot = self.objects[self.robot]
+            distance = float(self.sensor_model.measure(robot['position'][:2], robot['orientation'][2]))
+            distance = None if math.isnan(distance) else distance
+        else:
+            distance = self.wall_distance(self.robot)
+        if distance is not None and distance <= self.sensor_range:
+            return (1, distance, [0.0, 0.0, distance], -1, [0.0, 0.0, -1.0])
+        return (0, 0.0, [0.0, 0.0, 0.0], -1, [0.0, 0.0, 0.0])
+
+    def readProximitySensor(self, sensor_handle):
+        return self.checkProximitySensor(sensor_handle)
+
+    def wall_distance(self, handle):
+        """Distance to the first maze wall along the object's heading, snapped to the grid axes"""
+        maze = self.maze
+        if maze is None:
+            return None
+        x, y = self.objects[handle]['position'][:2]
+        yaw = self.objects[handle]['orientation'][2]
+        heading = round(yaw / (math.pi / 2)) % 4  # 0: +X, 1: +Y, 2: -X, 3: -Y
+        wall, step = [('east', (1, 0)), ('south', (0, 1)), ('west', (-1, 0)), ('north', (0, -1))][heading]
+
+        size = maze.cell_size
+        cx, cy = int(x // size), int(y // size)
+        if not (0 <= cx < maze.width and 0 <= cy < maze.height):
+            return None
+
+        # distance from the robot to the far edge of its own cell along the heading
+        if step[0]:
+            edge = (cx + (step[0] > 0)) * size
+            distance = abs(edge - x)
+        else:
+            edge = (cy + (step[1] > 0)) * size
+            distance = abs(edge - y)
+
+        while True:
+            if maze.cells[cy][cx]['walls'][wall]:
+                return max(distance - self.wall_thickness / 2, 0.0)
+            cx, cy = cx + step[0], cy + step[1]
+            if not (0 <= cx < maze.width and 0 <= cy < maze.height) or distance > self.sensor_range:
+                return None
+            distance += size
@@ -0,0 +1,324 @@
+"""
+Table-driven state machine for Python controllers
+
+statemachine.lua looks up handlers by name ("onbefore" .. event) on every
+transition. Here a definition (the format of machine.create, or the
+transitions listed in assets/fsm.graphql) is compiled once into integer
+tables: transition[event][state] -> state, and one handler slot per state
+or event. Firing an event is two list lookups plus the handlers, so
+controllers can fire events on every control tick.
+
+    machine = StateMachine(load_graphql())
+    E, S = machine.fsm.E, machine.fsm.S
+    machine.on_enter(S.wall_follow, start_timer)
+    machine.fire(E.obstacle_detected)        # False if not allowed from the current state
+    if machine.state == S.following: ...
+
+Handlers (same order as statemachine.lua):
+    before[event](machine, event, source, target)   returning False cancels the transition
+    leave[source](...)                              runs even then; returning False also cancels
+    enter[target](...), after[event](...)
+
+fire_async() awaits handlers that are coroutine functions, for transitions
+that wait on I/O. Time spent in every state and a source x target transition
+count matrix are kept for profiling (see stats() and report()).
+"""
+
+import argparse
+import inspect
+import os
+import re
+import time
+from collections import namedtuple
+
+GRAPHQL_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'assets', 'fsm.graphql')
+
+NO_TRANSITION = -1
+
+# "  - obstacle_detected: following -> turning_away" in the description block
+TRANSITION_LINE = re.compile(r'^\s*-\s*(\w+):\s*(\w+)\s*->\s*(\w+)\s*$')
+# "| t1 | obstacle_detected | FOLLOWING    | TURNING_AWAY  |" in the example table
+TRANSITION_ROW = re.compile(r'^\|\s*\w+\s*\|\s*(\w+)\s*\|\s*(\w+)\s*\|\s*(\w+)\s*\|\s*$')
+INITIAL_LINE = re.compile(r'^\s*-\s*initial:\s*(\w+)')
+STATES_LINE = re.compile(r'^\s*-\s*states:\s*(.+)$')
+
+
+class CompiledFSM:
+    """
+    Integer tables of a state machine definition.
+
+    Attributes:
+        states, events: names by index
+        S, E: namedtuples of the state and event indices by name (S.following, E.timeout)
+        transitions: transitions[event][state] -> target state, NO_TRANSITION if not allowed
+        initial: index of the initial state
+    """
+
+    def __init__(self, definition):
+        """
+        Args:
+            definition: dict like statemachine.lua's machine.create:
+                {'initial': 'following',
+                 'events': [{'name': 'timeout', 'from': 'wall_follow', 'to': 'searching'}, ...]}
+                'from' may also be a list of states or '*' for any state; as in
+                statemachine.lua, '*' is a fallback for states without their own
+                transition for the event.
+                An optional 'states' list fixes the state order.
+        """
+        states = list(definition.get('states', []))
+        events = []
+        for event in definition['events']:
+            sources = event['from']
+            sources = [sources] if isinstance(sources, str) else list(sources)
+            for name in sources + [event['to']]:
+                if name != '*' and name not in states:
+                    states.append(name)
+            if event['name'] not in events:
+                events.append(event['name'])
+        initial = definition.get('initial', states[0] if states else None)
+        if initial not in states:
+            raise ValueError(f"Initial state {initial!r} is not a state of the machine")
+
+        self.states = tuple(states)
+        self.events = tuple(events)
+        self.S = namedtuple('States', states)(*range(len(states)))
+        self.E = namedtuple('Events', events)(*range(len(events)))
+        self.initial = states.index(initial)
+
+        self.transitions = [[NO_TRANSITION] * len(states) for _ in events]
+        wildcards = {}  # event -> target of its '*' transition
+        for event in definition['events']:
+            sources = event['from']
+            sources = [sources] if isinstance(sources, str) else list(sources)
+            row = self.transitions[events.index(event['name'])]
+            target = states.index(event['to'])
+            for source in sources:
+                if source == '*':
+                    wildcards[events.index(event['name'])] = target
+                else:
+                    row[states.index(source)] = target
+        for event, target in wildcards.items():
+            row = self.transitions[event]
+            row[:] = [target if t == NO_TRANSITION else t for t in row]
+
+    def state_id(self, name):
+        return self.states.index(name)
+
+    def event_id(self, name):
+        return self.events.index(name)
+
+    def edges(self):
+        """(event, source, target) names of every allowed transition"""
+        return [(self.events[e], self.states[s], self.states[t])
+                for e, row in enumerate(self.transitions) for s, t in enumerate(row) if t != NO_TRANSITION]
+
+
+def parse_graphql(text):
+    """FSM definition from the description in fsm.graphql (see CompiledFSM)"""
+    definition = {'events': []}
+    for line in text.splitlines():
+        match = INITIAL_LINE.match(line)
+        if match:
+            definition['initial'] = match.group(1)
+            continue
+        match = STATES_LINE.match(line)
+        if match:
+            definition['states'] = [name.strip() for name in match.group(1).split(',')]
+            continue
+        match = TRANSITION_LINE.match(line)
+        if match:
+            name, source, target = match.groups()
+            definition['events'].append({'name': name, 'from': source, 'to': target})
+
+    if not definition['events']:
+        # No description block: use the example table (state names are upper case there)
+        for line in text.splitlines():
+            match = TRANSITION_ROW.match(line)
+            if match and match.group(1) != 'event':
+                name, source, target = match.groups()
+                definition['events'].append({'name': name, 'from': source.lower(), 'to': target.lower()})
+    if not definition['events']:
+        raise ValueError("No transitions found")
+    return definition
+
+
+def load_graphql(path=GRAPHQL_FILE):
+    """Compile the FSM described in a .graphql file (default: assets/fsm.graphql)"""
+    with open(path) as f:
+        return CompiledFSM(parse_graphql(f.read()))
+
+
+class StateMachine:
+    """Running instance of a CompiledFSM with integer-indexed handler tables"""
+
+    def __init__(self, fsm, initial=None, clock=time.perf_counter):
+        """
+        Args:
+            fsm: CompiledFSM
+            initial: start state index (default: the definition's initial state)
+            clock: time source for the per-state timing
+        """
+        self.fsm = fsm
+        n_states, n_events = len(fsm.states), len(fsm.events)
+        self.transitions = fsm.transitions
+        self.state = fsm.initial if initial is None else initial
+        self.before = [None] * n_events
+        self.after = [None] * n_events
+        self.enter = [None] * n_states
+        self.leave = [None] * n_states
+        self._async = set()  # registered handlers that are coroutine functions
+        self.in_transition = False
+
+        self.clock = clock
+        self.entered_at = clock()
+        self.time_in_state = [0.0] * n_states
+        self.counts = [[0] * n_states for _ in range(n_states)]  # counts[source][target]
+        self.rejected = [0] * n_events  # events fired where they are not allowed
+
+    def _set(self, table, index, handler):
+        table[index] = handler
+        # Recomputed from all slots, so replacing or removing (None) a handler forgets it
+        self._async = {h for slots in (self.before, self.after, self.enter, self.leave)
+                       for h in slots if h is not None and inspect.iscoroutinefunction(h)}
+
+    def on_before(self, event, handler):
+        self._set(self.before, event, handler)
+
+    def on_after(self, event, handler):
+        self._set(self.after, event, handler)
+
+    def on_enter(self, state, handler):
+        self._set(self.enter, state, handler)
+
+    def on_leave(self, state, handler):
+        self._set(self.leave, state, handler)
+
+    def can(self, event):
+        return self.transitions[event][self.state] != NO_TRANSITION
+
+    def is_state(self, state):
+        return self.state == state
+
+    def _switch(self, source, target):
+        now = self.clock()
+        self.time_in_state[source] += now - self.entered_at
+        self.entered_at = now
+        self.counts[source][target] += 1
+        self.state = target
+
+    def fire(self, event):
+        """
+        Take the transition for event (an index from fsm.E).
+        Returns True if the state changed, False if the event is not allowed
+        here or a before or leave handler cancelled it (by returning False).
+        """
+        source = self.state
+        target = self.transitions[event][source]
+        if target == NO_TRANSITION:
+            self.rejected[event] += 1
+            return False
+        if self.in_transition:
+            raise RuntimeError("Event fired while an async transition is in progress")
+        if self._async:
+            raise RuntimeError("Machines with coroutine handlers are driven with fire_async()")
+
+        # Like statemachine.lua, leave runs even if before cancels
+        handler = self.before[event]
+        before = handler(self, event, source, target) if handler is not None else None
+        handler = self.leave[source]
+        leave = handler(self, event, source, target) if handler is not None else None
+        if before is False or leave is False:
+            return False
+        self._switch(source, target)
+        handler = self.enter[target]
+        if handler is not None:
+            handler(self, event, source, target)
+        handler = self.after[event]
+        if handler is not None:
+            handler(self, event, source, target)
+        return True
+
+    async def fire_async(self, event):
+        """fire() that awaits coroutine handlers; other events are refused until it completes"""
+        source = self.state
+        target = self.transitions[event][source]
+        if target == NO_TRANSITION:
+            self.rejected[event] += 1
+            return False
+        if self.in_transition:
+            raise RuntimeError("Event fired while an async transition is in progress")
+
+        self.in_transition = True
+        try:
+            before = await self._call(self.before[event], event, source, target)
+            leave = await self._call(self.leave[source], event, source, target)
+            if before is False or leave is False:
+                return False
+            self._switch(source, target)
+            await self._call(self.enter[target], event, source, target)
+            await self._call(self.after[event], event, source, target)
+        finally:
+            self.in_transition = False
+        return True
+
+    async def _call(self, handler, event, source, target):
+        if handler is None:
+            return None
+        if handler in self._async:
+            return await handler(self, event, source, target)
+        return handler(self, event, source, target)
+
+    def stats(self):
+        """Time per state (including the current one so far) and transition counts, by name"""
+        states = self.fsm.states
+        times = list(self.time_in_state)
+        times[self.state] += self.clock() - self.entered_at
+        return {
+            'state': states[self.state],
+            'time_in_state': dict(zip(states, times)),
+            'transitions': {f'{states[s]} -> {states[t]}': count
+                            for s, row in enumerate(self.counts) for t, count in enumerate(row) if count},
+            'rejected': {self.fsm.events[e]: count for e, count in enumerate(self.rejected) if count}
+        }
+
+    def report(self):
+        """Text table of the time per state and the transition count matrix"""
+        states = self.fsm.states
+        stats = self.stats()
+        width = max(len(name) for name in states) + 2
+        lines = [f"{'state':{width}s} {'time':>10s}"]
+        lines += [f"{name:{width}s} {stats['time_in_state'][name]:9.4f}s" for name in states]
+        header = 'from \\ to'
+        lines += ["", f"{header:{width}s}" + "".join(f"{name:>{width}s}" for name in states)]
+        lines += [f"{name:{width}s}" + "".join(f"{count:>{width}d}" for count in row)
+                  for name, row in zip(states, self.counts)]
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile an FSM description and time its transitions")
+    parser.add_argument('path', nargs='?', default=GRAPHQL_FILE,
+                        help="FSM .graphql description (default: assets/fsm.graphql)")
+    parser.add_argument('--events', type=int, default=1_000_000, help="events fired by the benchmark")
+    args = parser.parse_args()
+
+    fsm = load_graphql(args.path)
+    print(f"✓ {len(fsm.states)} states, {len(fsm.events)} events, initial: {fsm.states[fsm.initial]}")
+    for event, source, target in fsm.edges():
+        print(f"  {event:20s} {source:14s} -> {target}")
+
+    # Cycle through every event; the ones not allowed in the current state are rejected
+    machine = StateMachine(fsm)
+    events = list(range(len(fsm.events)))
+    fire = machine.fire
+    start = time.perf_counter()
+    for i in range(args.events):
+        fire(events[i % len(events)])
+    elapsed = time.perf_counter() - start
+    print(f"\n{args.events} events in {elapsed:.3f}s ({args.events / elapsed:,.0f} events/s)\n")
+    print(machine.report())
+
+
+if __name__ == "__main__":
+    main()
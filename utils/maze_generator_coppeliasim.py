@@ -2,9 +2,26 @@
 CoppeliaSim Maze Generator using Prim's Algorithm
 """
 
+import json
 import random
-from collections import deque
-from coppeliasim_zmqremoteapi_client import RemoteAPIClient
+from .sim_profiler import instrument
+from .connection import connect, get_api
+from .planner import astar
+
+# Default file the generated layout is saved to (read back by robot_solve.py)
+MAZE_FILE = 'maze_layout.json'
+
+# Bit used for each wall in a saved layout.
+# North is -Y in world coordinates, south is +Y.
+WALL_BITS = {'north': 1, 'south': 2, 'east': 4, 'west': 8}
+
+# Scene geometry, in meters
+WALL_HEIGHT = 0.3       # 30cm walls
+WALL_THICKNESS = 0.05   # 5cm thick walls
+LINE_WIDTH = 0.08       # 8cm wide guide lines
+LINE_LENGTH = 1.0       # Length of line segments from center
+OBSTACLE_HEIGHT = 0.4   # 40cm tall
+OBSTACLE_RADIUS = 0.25  # 25cm radius (50cm diameter)
 
 class MazeGenerator:
     def __init__(self, width, height, cell_size=2.0, seed=None):
@@ -24,6 +41,8 @@ class MazeGenerator:
         self.cells = []
         self.walls = []
         self.obstacles = set()  # Track cells with obstacles
+        self.floor = None
+        self.handles = {}  # (x, y) -> handles of the cell's scene objects
 
         # Initialize grid
         for y in range(height):
@@ -175,26 +194,12 @@ class MazeGenerator:
         return neighbors
 
     def find_shortest_path(self, start_x, start_y, end_x, end_y):
-        """Find shortest path using BFS from start to end"""
-        queue = deque([(start_x, start_y, [])])
-        visited = set()
-        visited.add((start_x, start_y))
-
-        while queue:
-            x, y, path = queue.popleft()
-            current_path = path + [(x, y)]
-
-            # Check if we reached the goal
-            if x == end_x and y == end_y:
-                return current_path
+        """Find shortest path using A* from start to end"""
+        def neighbors(cell):
+            return [(nx, ny) for nx, ny in self.get_accessible_neighbors(*cell)
+                    if 0 <= nx < self.width and 0 <= ny < self.height]
 
-            # Explore neighbors
-            for nx, ny in self.get_accessible_neighbors(x, y):
-                if (nx, ny) not in visited:
-                    visited.add((nx, ny))
-                    queue.append((nx, ny, current_path))
-
-        return []  # No path found
+        return astar((start_x, start_y), (end_x, end_y), neighbors)
 
     def place_obstacles(self, num_obstacles=5):
         """Place obstacles in cells NOT on the shortest path
@@ -235,14 +240,81 @@ class MazeGenerator:
         print(f"Placed {num_obstacles} obstacles")
         print(f"Shortest path length: {len(shortest_path)} cells")
 
+    def wall_mask(self, x, y):
+        """Walls of cell (x, y) packed into an int using WALL_BITS"""
+        walls = self.cells[y][x]['walls']
+        mask = 0
+        for name, bit in WALL_BITS.items():
+            if walls[name]:
+                mask |= bit
+        return mask
+
+    def wall_arrays(self):
+        """
+        (walls, obstacles): (height, width) uint8 wall_mask values and bool obstacle cells,
+        indexed [y, x]
+        """
+        import numpy as np
+        walls = np.array([[self.wall_mask(x, y) for x in range(self.width)] for y in range(self.height)],
+                         dtype=np.uint8)
+        obstacles = np.zeros(walls.shape, dtype=bool)
+        for x, y in self.obstacles:
+            obstacles[y, x] = True
+        return walls, obstacles
+
+    def save(self, path=MAZE_FILE):
+        """Save the maze layout (walls and obstacles) as JSON"""
+        layout = {
+            'width': self.width,
+            'height': self.height,
+            'cell_size': self.cell_size,
+            'seed': self.seed,
+            'walls': [[self.wall_mask(x, y) for x in range(self.width)]
+                      for y in range(self.height)],
+            'obstacles': sorted([x, y] for x, y in self.obstacles)
+        }
+        with open(path, 'w') as f:
+            json.dump(layout, f)
+
+    @classmethod
+    def load(cls, path=MAZE_FILE):
+        """Load a maze layout written by save()"""
+        with open(path) as f:
+            layout = json.load(f)
+
+        maze = cls(layout['width'], layout['height'],
+                   cell_size=layout['cell_size'], seed=layout['seed'])
+        for y, row in enumerate(layout['walls']):
+            for x, mask in enumerate(row):
+                cell = maze.cells[y][x]
+                cell['visited'] = True
+                for name, bit in WALL_BITS.items():
+                    cell['walls'][name] = bool(mask & bit)
+        for x, y in layout['obstacles']:
+            maze.cells[y][x]['has_obstacle'] = True
+            maze.obstacles.add((x, y))
+        return maze
+
     def create_in_coppeliasim(self, sim):
-        """Create the maze in CoppeliaSim"""
-        wall_height = 0.3  # 30cm walls
-        wall_thickness = 0.05  # 5cm thick walls
-        line_width = 0.08  # 8cm wide guide lines
-        line_length = 1.0 # Length of line segments from center
-        
-        # Create floor
+        """Create the maze in CoppeliaSim; the created handles are kept in self.handles per cell"""
+        self.floor = self.create_floor(sim)
+        self.handles = {}
+        for y in range(self.height):
+            for x in range(self.width):
+                self.handles[(x, y)] = self.create_cell(sim, x, y)
+
+    def remove_from_coppeliasim(self, sim):
+        """Remove the objects created by create_in_coppeliasim (or streamed cells) and the floor"""
+        handles = [h for cell in self.handles.values() for h in cell]
+        if self.floor is not None:
+            handles.append(self.floor)
+        if handles:
+            sim.removeObjects(handles)
+        self.handles = {}
+        self.floor = None
+
+    def create_floor(self, sim):
+        """Create the floor under the whole maze"""
         floor_width = self.width * self.cell_size
         floor_height = self.height * self.cell_size
         floor = sim.createPrimitiveShape(sim.primitiveshape_cuboid, 
@@ -250,75 +322,68 @@ class MazeGenerator:
         sim.setObjectPosition(floor, -1, [floor_width/2, floor_height/2, -0.005])
         sim.setObjectColor(floor, 0, sim.colorcomponent_ambient_diffuse, [0.8, 0.8, 0.8])
         sim.setObjectAlias(floor, 'MazeFloor')
-        
-        # Create walls and lines
-        for y in range(self.height):
-            for x in range(self.width):
-                cell = self.cells[y][x]
-                
-                # Cell center position in world coordinates
-                cx = (x + 0.5) * self.cell_size
-                cy = (y + 0.5) * self.cell_size
-                
-                # Count open passages
-                open_count = sum([
-                    not cell['walls']['north'],
-                    not cell['walls']['south'],
-                    not cell['walls']['east'],
-                    not cell['walls']['west']
-                ])
-                
-                # Create center square if there are 2+ open passages (L, T, or + shape)
-                if open_count >= 2:
-                    self._create_guide_line(sim, cx, cy, 
-                                          line_width, line_width, 0)
-                
-                # Create guide lines based on open passages
-                # Lines extend from center towards open walls
-                if not cell['walls']['north']:
-                    # Line going north (towards negative Y)
-                    self._create_guide_line(sim, cx, cy - line_length/2, 
-                                          line_width, line_length, 0)
-                
-                if not cell['walls']['south']:
-                    # Line going south (towards positive Y)
-                    self._create_guide_line(sim, cx, cy + line_length/2, 
-                                          line_width, line_length, 0)
-                
-                if not cell['walls']['east']:
-                    # Line going east (towards positive X)
-                    self._create_guide_line(sim, cx + line_length/2, cy, 
-                                          line_length, line_width, 0)
-                
-                if not cell['walls']['west']:
-                    # Line going west (towards negative X)
-                    self._create_guide_line(sim, cx - line_length/2, cy, 
-                                          line_length, line_width, 0)
-                
-                # Create walls with proper dimensions for each direction
-                if cell['walls']['north']:
-                    # Horizontal wall (runs along X axis)
-                    self._create_wall(sim, cx, cy - self.cell_size/2, 
-                                    self.cell_size, wall_thickness, wall_height)
-                
-                if cell['walls']['south']:
-                    # Horizontal wall (runs along X axis)
-                    self._create_wall(sim, cx, cy + self.cell_size/2, 
-                                    self.cell_size, wall_thickness, wall_height)
-                
-                if cell['walls']['east']:
-                    # Vertical wall (runs along Y axis) - swap X and Y dimensions
-                    self._create_wall(sim, cx + self.cell_size/2, cy, 
-                                    wall_thickness, self.cell_size, wall_height)
-                
-                if cell['walls']['west']:
-                    # Vertical wall (runs along Y axis) - swap X and Y dimensions
-                    self._create_wall(sim, cx - self.cell_size/2, cy,
-                                    wall_thickness, self.cell_size, wall_height)
-
-                # Create obstacle if this cell has one
-                if cell['has_obstacle']:
-                    self._create_obstacle(sim, cx, cy)
+        return floor
+
+    def cell_parts(self, x, y):
+        """
+        Scene objects of cell (x, y) as (kind, x, y, width, depth, height) tuples,
+        kind being 'line', 'wall' or 'obstacle' and x, y world coordinates
+        """
+        cell = self.cells[y][x]
+        walls = cell['walls']
+        parts = []
+
+        # Cell center position in world coordinates
+        cx = (x + 0.5) * self.cell_size
+        cy = (y + 0.5) * self.cell_size
+
+        # Count open passages
+        open_count = sum(not walls[side] for side in ('north', 'south', 'east', 'west'))
+
+        # Create center square if there are 2+ open passages (L, T, or + shape)
+        if open_count >= 2:
+            parts.append(('line', cx, cy, LINE_WIDTH, LINE_WIDTH, 0.001))
+
+        # Guide lines extend from the center towards open walls
+        if not walls['north']:
+            # Line going north (towards negative Y)
+            parts.append(('line', cx, cy - LINE_LENGTH/2, LINE_WIDTH, LINE_LENGTH, 0.001))
+        if not walls['south']:
+            # Line going south (towards positive Y)
+            parts.append(('line', cx, cy + LINE_LENGTH/2, LINE_WIDTH, LINE_LENGTH, 0.001))
+        if not walls['east']:
+            # Line going east (towards positive X)
+            parts.append(('line', cx + LINE_LENGTH/2, cy, LINE_LENGTH, LINE_WIDTH, 0.001))
+        if not walls['west']:
+            # Line going west (towards negative X)
+            parts.append(('line', cx - LINE_LENGTH/2, cy, LINE_LENGTH, LINE_WIDTH, 0.001))
+
+        # Horizontal walls run along the X axis, vertical walls swap X and Y dimensions
+        if walls['north']:
+            parts.append(('wall', cx, cy - self.cell_size/2, self.cell_size, WALL_THICKNESS, WALL_HEIGHT))
+        if walls['south']:
+            parts.append(('wall', cx, cy + self.cell_size/2, self.cell_size, WALL_THICKNESS, WALL_HEIGHT))
+        if walls['east']:
+            parts.append(('wall', cx + self.cell_size/2, cy, WALL_THICKNESS, self.cell_size, WALL_HEIGHT))
+        if walls['west']:
+            parts.append(('wall', cx - self.cell_size/2, cy, WALL_THICKNESS, self.cell_size, WALL_HEIGHT))
+
+        # Create obstacle if this cell has one
+        if cell['has_obstacle']:
+            parts.append(('obstacle', cx, cy, OBSTACLE_RADIUS * 2, OBSTACLE_RADIUS * 2, OBSTACLE_HEIGHT))
+        return parts
+
+    def create_cell(self, sim, x, y):
+        """Create the walls, guide lines and obstacle of cell (x, y); returns their handles"""
+        handles = []
+        for kind, px, py, width, depth, height in self.cell_parts(x, y):
+            if kind == 'wall':
+                handles.append(self._create_wall(sim, px, py, width, depth, height))
+            elif kind == 'line':
+                handles.append(self._create_guide_line(sim, px, py, width, depth, 0))
+            else:
+                handles.append(self._create_obstacle(sim, px, py))
+        return handles
 
     def _create_obstacle(self, sim, x, y):
         """Create an obstacle (cylinder) in the cell
@@ -326,12 +391,9 @@ class MazeGenerator:
         Args:
             x, y: position in world coordinates
         """
-        obstacle_height = 0.4  # 40cm tall
-        obstacle_radius = 0.25  # 25cm radius (50cm diameter)
-
         obstacle = sim.createPrimitiveShape(sim.primitiveshape_cylinder,
-                                           [obstacle_radius * 2, obstacle_radius * 2, obstacle_height])
-        sim.setObjectPosition(obstacle, -1, [x, y, obstacle_height / 2])
+                                           [OBSTACLE_RADIUS * 2, OBSTACLE_RADIUS * 2, OBSTACLE_HEIGHT])
+        sim.setObjectPosition(obstacle, -1, [x, y, OBSTACLE_HEIGHT / 2])
         sim.setObjectColor(obstacle, 0, sim.colorcomponent_ambient_diffuse, [0.8, 0.2, 0.2])
         sim.setObjectAlias(obstacle, f'Obstacle_{x}_{y}')
         return obstacle
@@ -372,8 +434,8 @@ class MazeGenerator:
 def main():
     """Main function to connect to CoppeliaSim and generate maze"""
     print("Connecting to CoppeliaSim...")
-    client = RemoteAPIClient()
-    sim = client.require('sim')
+    client = connect()
+    sim = instrument(get_api(client))
     
     # Stop simulation if running
     if sim.getSimulationState() != sim.simulation_stopped:
@@ -396,12 +458,14 @@ def main():
 
     print("Creating maze in CoppeliaSim...")
     maze.create_in_coppeliasim(sim)
+    maze.save(MAZE_FILE)
 
     print("Maze generation complete!")
     print(f"Maze size: {maze.width}x{maze.height} cells")
     print(f"Cell size: {maze.cell_size}m")
     print(f"Total area: {maze.width * maze.cell_size}m x {maze.height * maze.cell_size}m")
     print(f"Number of obstacles: {len(maze.obstacles)}")
+    print(f"Layout saved to {MAZE_FILE}")
     print("\nYou can now start the simulation")
 
 
@@ -0,0 +1,316 @@
+"""
+Raster rendering of mazes and scan maps
+
+Walls come in as an (H, W) array of MazeGenerator.wall_mask values (north =
+-Y, see MazeGenerator.wall_arrays), optionally with a second mask of the walls that are still unknown, as
+in a partial robot_solve map. Rendering works on whole arrays: the result is
+an image of palette indices, which is written as an indexed PNG, converted to
+RGB for PPM, or printed with half-block characters in a terminal.
+
+Cells are (y, x) like robot_solve. By default the image has +Y at the top,
+like display_map and the CoppeliaSim top view.
+
+    python -m utils render --layout maze_layout.json --path --out maze.png
+    python -m utils render --layout maze_layout.json --ansi
+    python -m utils render --checkpoint scan_checkpoint.bin --out scan.png
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from .maze_generator_coppeliasim import MazeGenerator, MAZE_FILE, WALL_BITS
+from .scan_checkpoint import load_checkpoint
+
+# Palette indices; where things overlap the higher index is shown
+FLOOR, FRONTIER, UNKNOWN, WALL, OBSTACLE, PATH, ROBOT = range(7)
+PALETTE = np.array([
+    [235, 235, 235],  # floor
+    [170, 210, 250],  # frontier
+    [150, 150, 150],  # unknown wall
+    [40, 40, 190],    # wall (scene wall color)
+    [200, 50, 50],    # obstacle
+    [30, 170, 60],    # path
+    [240, 200, 0],    # robot
+], dtype=np.uint8)
+
+# robot_solve map_grid order (UP = +Y, RIGHT, DOWN = -Y, LEFT) as generator wall bits
+MAP_GRID_BITS = (WALL_BITS['south'], WALL_BITS['east'], WALL_BITS['north'], WALL_BITS['west'])
+
+
+def map_grid_arrays(map_grid, known=None):
+    """
+    (walls, unknown) masks of a robot_solve map_grid, with known being
+    WallKnowledge.known (None if every wall is known)
+    """
+    grid = np.asarray(map_grid, dtype=bool)
+    bits = np.array(MAP_GRID_BITS, dtype=np.uint8)
+    walls = (grid * bits).sum(axis=2).astype(np.uint8)
+    unknown = None
+    if known is not None:
+        unknown = (~np.asarray(known, dtype=bool) * bits).sum(axis=2).astype(np.uint8)
+    return walls, unknown
+
+
+def frontier_cells(unknown):
+    """Cells with some but not all of their walls known"""
+    unknown = np.asarray(unknown)
+    return (unknown != 0) & (unknown != 15)
+
+
+def default_scale(height, width, max_pixels=4000):
+    """Pixels per cell so the image stays within max_pixels on its longer side"""
+    return int(max(2, min(16, max_pixels // max(height, width, 1))))
+
+
+def _boundaries(walls, unknown):
+    """Codes of the horizontal (H+1, W) and vertical (H, W+1) cell boundaries"""
+    h, w = walls.shape
+    north, south = WALL_BITS['north'], WALL_BITS['south']
+    east, west = WALL_BITS['east'], WALL_BITS['west']
+
+    def edges(mask):
+        horizontal = np.zeros((h + 1, w), dtype=bool)
+        horizontal[:h] |= (mask & north) != 0
+        horizontal[1:] |= (mask & south) != 0
+        vertical = np.zeros((h, w + 1), dtype=bool)
+        vertical[:, :w] |= (mask & west) != 0
+        vertical[:, 1:] |= (mask & east) != 0
+        return horizontal, vertical
+
+    horizontal, vertical = edges(walls)
+    horizontal = horizontal.astype(np.uint8) * WALL
+    vertical = vertical.astype(np.uint8) * WALL
+    if unknown is not None:
+        unknown_h, unknown_v = edges(unknown)
+        horizontal[unknown_h] = UNKNOWN
+        vertical[unknown_v] = UNKNOWN
+    return horizontal, vertical
+
+
+def _fill_cells(image, cells, code, scale, inset):
+    """Paint the interior of the marked cells (an (H, W) bool array)"""
+    h, w = cells.shape
+    lo, hi = 1 + inset, scale - inset
+    if lo >= hi:
+        lo, hi = 0, scale
+    # Paint through a (H, scale, W, scale) view of the image instead of building a full-size pixel mask
+    interiors = image[:h * scale, :w * scale].reshape(h, scale, w, scale)[:, lo:hi, :, lo:hi]
+    np.maximum(interiors, cells[:, None, :, None] * np.uint8(code), out=interiors)
+
+
+def _cell_mask(shape, cells):
+    """(H, W) bool array from a bool array or a sequence of (y, x) cells"""
+    cells_array = np.asarray(cells)
+    if cells_array.shape == shape and cells_array.dtype == bool:
+        return cells_array
+    mask = np.zeros(shape, dtype=bool)
+    if cells_array.size:
+        cells_array = cells_array.reshape(-1, 2)
+        mask[cells_array[:, 0], cells_array[:, 1]] = True
+    return mask
+
+
+def _draw_path(image, path, scale):
+    """Line through the centers of consecutive (y, x) cells"""
+    path = np.asarray(path, dtype=np.int64).reshape(-1, 2)
+    if len(path) == 0:
+        return
+    center = path * scale + scale // 2
+    if len(path) > 1:
+        delta = np.sign(path[1:] - path[:-1])
+        steps = np.arange(scale + 1)
+        rows = center[:-1, 0:1] + delta[:, 0:1] * steps  # (segments, scale + 1)
+        cols = center[:-1, 1:2] + delta[:, 1:2] * steps
+    else:
+        rows, cols = center[:, 0:1], center[:, 1:2]
+    # Square brush around every pixel of the center line
+    width = max(1, scale // 4)
+    offsets = np.arange(width) - (width - 1) // 2
+    rows = np.broadcast_to(rows[..., None, None] + offsets[:, None], rows.shape + (width, width)).reshape(-1)
+    cols = np.broadcast_to(cols[..., None, None] + offsets[None, :], cols.shape + (width, width)).reshape(-1)
+    valid = (rows >= 0) & (rows < image.shape[0]) & (cols >= 0) & (cols < image.shape[1])
+    rows, cols = rows[valid], cols[valid]
+    image[rows, cols] = np.maximum(image[rows, cols], PATH)
+
+
+def render(walls, unknown=None, obstacles=None, path=None, robot=None, frontier=None,
+           scale=None, flip_y=True):
+    """
+    Render a maze or scan map to an image of palette indices.
+
+    Args:
+        walls: (H, W) wall masks (MazeGenerator.wall_mask bits)
+        unknown: (H, W) masks of walls not known yet (drawn gray), or None
+        obstacles, robot, frontier: cells to mark, as (H, W) bool arrays or (y, x) sequences
+        path: sequence of (y, x) cells, drawn as a line through the cell centers
+        scale: pixels per cell (default: default_scale)
+        flip_y: put +Y (the maze's south side) at the top of the image
+    Returns:
+        (H*scale + 1, W*scale + 1) uint8 image, see PALETTE
+    """
+    walls = np.asarray(walls, dtype=np.uint8)
+    h, w = walls.shape
+    scale = scale or default_scale(h, w)
+    image = np.zeros((h * scale + 1, w * scale + 1), dtype=np.uint8)
+
+    if frontier is not None:
+        _fill_cells(image, _cell_mask(walls.shape, frontier), FRONTIER, scale, 0)
+    if obstacles is not None:
+        _fill_cells(image, _cell_mask(walls.shape, obstacles), OBSTACLE, scale, scale // 4)
+    if path is not None:
+        _draw_path(image, path, scale)
+    if robot is not None:
+        _fill_cells(image, _cell_mask(walls.shape, robot), ROBOT, scale, scale // 5)
+
+    horizontal, vertical = _boundaries(walls, unknown)
+    # Each boundary segment covers scale + 1 pixels, so neighboring segments share their corner pixel
+    rows = np.zeros((h + 1, w * scale + 1), dtype=np.uint8)
+    rows[:, :-1] = np.repeat(horizontal, scale, axis=1)
+    rows[:, scale::scale] = np.maximum(rows[:, scale::scale], horizontal)
+    line = image[::scale]
+    image[::scale] = np.where(rows > 0, rows, line)
+
+    columns = np.zeros((h * scale + 1, w + 1), dtype=np.uint8)
+    columns[:-1] = np.repeat(vertical, scale, axis=0)
+    columns[scale::scale] = np.maximum(columns[scale::scale], vertical)
+    line = image[:, ::scale]
+    image[:, ::scale] = np.where(columns > 0, columns, line)
+
+    return image[::-1] if flip_y else image
+
+
+def to_rgb(image, palette=PALETTE):
+    return palette[image]
+
+
+def write_png(path, image, palette=PALETTE, level=1):
+    """Write an index image as an 8-bit palette PNG (zlib level 1: big mazes compress well even so)"""
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    height, width = image.shape
+    raw = np.zeros((height, width + 1), dtype=np.uint8)  # filter type 0 before each row
+    raw[:, 1:] = image
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 3, 0, 0, 0)))
+        f.write(chunk(b'PLTE', np.ascontiguousarray(palette, dtype=np.uint8).tobytes()))
+        f.write(chunk(b'IDAT', zlib.compress(raw.tobytes(), level)))
+        f.write(chunk(b'IEND', b''))
+
+
+def write_ppm(path, image, palette=PALETTE):
+    """Write an index image as a binary PPM"""
+    rgb = np.ascontiguousarray(to_rgb(image, palette))
+    with open(path, 'wb') as f:
+        f.write(f'P6 {rgb.shape[1]} {rgb.shape[0]} 255\n'.encode())
+        f.write(rgb.tobytes())
+
+
+def write_image(path, image, palette=PALETTE):
+    """PNG or PPM, by file extension"""
+    if os.path.splitext(path)[1].lower() in ('.ppm', '.pnm'):
+        write_ppm(path, image, palette)
+    else:
+        write_png(path, image, palette)
+
+
+def reduce(image, factor):
+    """Shrink by an integer factor, keeping the highest index of each block so thin walls survive"""
+    if factor <= 1:
+        return image
+    h, w = image.shape
+    h, w = -(-h // factor) * factor, -(-w // factor) * factor
+    padded = np.zeros((h, w), dtype=image.dtype)
+    padded[:image.shape[0], :image.shape[1]] = image
+    return padded.reshape(h // factor, factor, w // factor, factor).max(axis=(1, 3))
+
+
+def to_ansi(image, palette=PALETTE, max_width=None):
+    """
+    Terminal text with two pixel rows per line ('▀' with foreground = upper and
+    background = lower pixel), reduced to fit max_width columns (default: the terminal).
+    """
+    if max_width is None:
+        max_width = os.get_terminal_size().columns if sys.stdout.isatty() else 120
+    image = reduce(image, -(-image.shape[1] // max_width))
+    if image.shape[0] % 2:
+        image = np.vstack([image, np.zeros((1, image.shape[1]), dtype=image.dtype)])
+
+    colors = [f'{r};{g};{b}' for r, g, b in palette.tolist()]
+    lines = []
+    for top, bottom in zip(image[0::2].tolist(), image[1::2].tolist()):
+        parts = []
+        last = None
+        for pair in zip(top, bottom):
+            if pair != last:
+                parts.append(f'\x1b[38;2;{colors[pair[0]]}m\x1b[48;2;{colors[pair[1]]}m')
+                last = pair
+            parts.append('▀')
+        parts.append('\x1b[0m')
+        lines.append(''.join(parts))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a maze layout as PNG/PPM or in the terminal")
+    parser.add_argument('--layout', default=MAZE_FILE, help=f"saved maze layout (default: {MAZE_FILE})")
+    parser.add_argument('--random', type=int, metavar='SIZE',
+                        help="render a random SIZE x SIZE wall grid instead (for timing)")
+    parser.add_argument('--checkpoint', metavar='PATH',
+                        help="render the partial map of a robot_solve scan checkpoint instead")
+    parser.add_argument('--out', help="image file to write (.png or .ppm)")
+    parser.add_argument('--ansi', action='store_true', help="print the image with half-block characters")
+    parser.add_argument('--scale', type=int, help="pixels per cell")
+    parser.add_argument('--path', action='store_true', help="draw the shortest path from the entrance to the exit")
+    args = parser.parse_args()
+
+    path = None
+    obstacles = unknown = frontier = robot = None
+    if args.random:
+        walls = np.random.default_rng(0).integers(0, 16, (args.random, args.random), dtype=np.uint8)
+    elif args.checkpoint:
+        try:
+            state = load_checkpoint(args.checkpoint)
+        except (OSError, ValueError) as e:
+            print(f"✗ Could not read checkpoint: {e}")
+            return
+        walls, unknown = map_grid_arrays([[walls for walls, known in row] for row in state.cells],
+                                         [[known for walls, known in row] for row in state.cells])
+        frontier = frontier_cells(unknown)
+        robot = [state.position]
+    else:
+        try:
+            maze = MazeGenerator.load(args.layout)
+        except OSError as e:
+            print(f"✗ Could not read maze layout: {e}")
+            return
+        walls, obstacles = maze.wall_arrays()
+        if args.path:
+            path = [(y, x) for x, y in maze.find_shortest_path(0, 0, maze.width - 1, maze.height - 1)]
+
+    start = time.perf_counter()
+    image = render(walls, unknown, obstacles=obstacles, path=path, robot=robot, frontier=frontier,
+                   scale=args.scale)
+    elapsed = time.perf_counter() - start
+    print(f"✓ Rendered {walls.shape[1]}x{walls.shape[0]} cells to "
+          f"{image.shape[1]}x{image.shape[0]} pixels in {elapsed:.3f}s")
+
+    if args.out:
+        start = time.perf_counter()
+        write_image(args.out, image)
+        print(f"✓ Wrote {args.out} in {time.perf_counter() - start:.3f}s")
+    if args.ansi or not args.out:
+        print(to_ansi(image))
+
+
+if __name__ == "__main__":
+    main()
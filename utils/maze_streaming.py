@@ -0,0 +1,278 @@
+"""
+Windowed scene streaming for large mazes
+
+create_in_coppeliasim builds every wall, guide line and obstacle up front,
+which slows CoppeliaSim to a crawl for big mazes. The streamer reads the saved
+layout, splits it into square chunks of cells and only keeps the chunks within
+a radius of the robots in the scene. Chunks the robots left behind are removed
+least recently used first once more than max_chunks are loaded, so the scene
+stays bounded however large the maze is.
+
+    python -m utils generate            # or any layout written by MazeGenerator.save
+    python -m utils stream --chunk 8 --radius 1
+"""
+
+import argparse
+import time
+from collections import OrderedDict
+
+from .connection import connect, get_api
+from .maze_generator_coppeliasim import MazeGenerator, MAZE_FILE
+from .sim_profiler import instrument
+
+PART_KINDS = {'wall': 0, 'line': 1, 'obstacle': 2}
+
+# Creates the parts of a chunk in one remote call, like MazeGenerator._create_wall,
+# _create_guide_line and _create_obstacle; returns the handles in part order.
+# If a part fails, the objects already created are removed before the error is raised,
+# so a failed chunk leaves nothing behind for the per-object fallback to duplicate.
+CHUNK_LUA = """(function()
+    local parts = {%s}
+    local handles = {}
+    local ok, err = pcall(function()
+        for i = 1, #parts, 6 do
+            local kind, x, y = parts[i], parts[i + 1], parts[i + 2]
+            local size = {parts[i + 3], parts[i + 4], parts[i + 5]}
+            local shape, z, color
+            if kind == 2 then
+                shape = sim.createPrimitiveShape(sim.primitiveshape_cylinder, size)
+                handles[#handles + 1] = shape
+                z, color = size[3] / 2, {0.8, 0.2, 0.2}
+                sim.setObjectAlias(shape, 'Obstacle_' .. x .. '_' .. y)
+            else
+                shape = sim.createPrimitiveShape(sim.primitiveshape_cuboid, size)
+                handles[#handles + 1] = shape
+                if kind == 1 then
+                    z, color = 0.002, {0, 0, 0}
+                    sim.setObjectInt32Param(shape, sim.shapeintparam_respondable, 0)
+                else
+                    z, color = size[3] / 2, {0.2, 0.2, 0.8}
+                end
+            end
+            sim.setObjectPosition(shape, -1, {x, y, z})
+            sim.setObjectColor(shape, 0, sim.colorcomponent_ambient_diffuse, color)
+        end
+    end)
+    if not ok then
+        if #handles > 0 then
+            sim.removeObjects(handles)
+        end
+        error(err)
+    end
+    return handles
+end)()@lua"""
+
+
+class MazeStreamer:
+    """Keeps only the maze chunks near the robots in the scene"""
+
+    def __init__(self, sim, maze, chunk_size=8, radius=1, max_chunks=None):
+        """
+        Args:
+            sim: CoppeliaSim API object
+            maze: MazeGenerator, usually from MazeGenerator.load
+            chunk_size: chunk edge length in cells
+            radius: chunks around the robot's chunk that are kept loaded (1 = 3x3 window)
+            max_chunks: loaded chunks before unused ones are removed
+                        (default: twice the window, so turning back doesn't reload)
+        """
+        self.sim = sim
+        self.maze = maze
+        self.chunk_size = chunk_size
+        self.radius = radius
+        window = (2 * radius + 1) ** 2
+        self.max_chunks = max(max_chunks or 2 * window, window)
+        self.loaded = OrderedDict()  # chunk -> handles, least recently used first
+        self.loads = 0
+        self.unloads = 0
+        self.bulk = hasattr(sim, 'executeScriptString')
+
+    def start(self):
+        """Create the floor under the whole maze (a single object)"""
+        if self.maze.floor is None:
+            self.maze.floor = self.maze.create_floor(self.sim)
+
+    def chunk_of(self, position):
+        """Chunk (cx, cy) containing world position (x, y, ...), clamped to the maze"""
+        span = self.chunk_size * self.maze.cell_size
+        cx = min(max(int(position[0] // span), 0), (self.maze.width - 1) // self.chunk_size)
+        cy = min(max(int(position[1] // span), 0), (self.maze.height - 1) // self.chunk_size)
+        return (cx, cy)
+
+    def chunks_around(self, chunk):
+        columns = (self.maze.width - 1) // self.chunk_size
+        rows = (self.maze.height - 1) // self.chunk_size
+        cx, cy = chunk
+        return [(x, y)
+                for y in range(max(cy - self.radius, 0), min(cy + self.radius, rows) + 1)
+                for x in range(max(cx - self.radius, 0), min(cx + self.radius, columns) + 1)]
+
+    def chunk_cells(self, chunk):
+        cx, cy = chunk
+        size = self.chunk_size
+        return [(x, y)
+                for y in range(cy * size, min((cy + 1) * size, self.maze.height))
+                for x in range(cx * size, min((cx + 1) * size, self.maze.width))]
+
+    def load(self, chunk):
+        """Create the objects of all cells in the chunk; returns their handles"""
+        cells = self.chunk_cells(chunk)
+        handles = None
+        if self.bulk:
+            parts = [self.maze.cell_parts(x, y) for x, y in cells]
+            values = ', '.join(', '.join([str(PART_KINDS[part[0]])] + [repr(float(v)) for v in part[1:]])
+                               for cell_parts in parts for part in cell_parts)
+            try:
+                created = self.sim.executeScriptString(CHUNK_LUA % values, self.sim.handle_sandboxscript)
+            except Exception as e:
+                print(f"Chunk script unavailable, creating objects one by one: {e}")
+                self.bulk = False
+            else:
+                handles = self._assign_handles(cells, parts, created)
+        if handles is None:
+            handles = []
+            for x, y in cells:
+                self.maze.handles[(x, y)] = self.maze.create_cell(self.sim, x, y)
+                handles += self.maze.handles[(x, y)]
+        self.loaded[chunk] = handles
+        self.loads += 1
+        return handles
+
+    def _assign_handles(self, cells, parts, created):
+        """
+        Split the handles returned by CHUNK_LUA over the cells. If the result is not
+        one handle per part, whatever handles it holds are removed and None is returned,
+        so the chunk is created object by object without leaving duplicates.
+        """
+        # Older API versions return (result, value)
+        if isinstance(created, tuple):
+            created = created[-1]
+        returned = list(created) if isinstance(created, (list, tuple)) else []
+        if (len(returned) != sum(len(cell_parts) for cell_parts in parts)
+                or not all(isinstance(handle, int) for handle in returned)):
+            stray = [handle for handle in returned if isinstance(handle, int)]
+            if stray:
+                self.sim.removeObjects(stray)
+            print(f"Unexpected chunk script result {created!r:.60}, creating the chunk's objects one by one")
+            return None
+        handles = []
+        for cell, cell_parts in zip(cells, parts):
+            self.maze.handles[cell] = returned[:len(cell_parts)]
+            del returned[:len(cell_parts)]
+            handles += self.maze.handles[cell]
+        return handles
+
+    def unload(self, chunk):
+        """Remove the objects of the chunk from the scene"""
+        handles = self.loaded.pop(chunk)
+        for cell in self.chunk_cells(chunk):
+            self.maze.handles.pop(cell, None)
+        if handles:
+            self.sim.removeObjects(handles)
+        self.unloads += 1
+
+    def update(self, positions):
+        """
+        Load the chunks around the given robot positions and unload the least
+        recently used chunks beyond max_chunks.
+
+        Returns:
+            (chunks loaded, chunks unloaded) by this update
+        """
+        wanted = []
+        for position in positions:
+            for chunk in self.chunks_around(self.chunk_of(position)):
+                if chunk not in wanted:
+                    wanted.append(chunk)
+
+        loaded = 0
+        for chunk in wanted:
+            if chunk in self.loaded:
+                self.loaded.move_to_end(chunk)
+            else:
+                self.load(chunk)
+                loaded += 1
+
+        unloaded = 0
+        for chunk in list(self.loaded):
+            if len(self.loaded) <= self.max_chunks:
+                break
+            if chunk not in wanted:
+                self.unload(chunk)
+                unloaded += 1
+        return loaded, unloaded
+
+    def object_count(self):
+        return sum(len(handles) for handles in self.loaded.values())
+
+    def close(self):
+        """Remove all streamed objects and the floor"""
+        for chunk in list(self.loaded):
+            self.unload(chunk)
+        if self.maze.floor is not None:
+            self.sim.removeObjects([self.maze.floor])
+            self.maze.floor = None
+
+
+def robot_positions(sim, path='/BubbleRobot'):
+    """Positions of every object matching path (all robots of that kind in the scene)"""
+    positions = []
+    seen = set()
+    index = 0
+    while True:
+        try:
+            handle = sim.getObject(path, {'index': index, 'noError': True})
+        except Exception:
+            break
+        if handle == -1 or handle in seen:
+            break
+        seen.add(handle)
+        positions.append(sim.getObjectPosition(handle, -1))
+        index += 1
+    return positions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream the maze scene around the robots")
+    parser.add_argument('--layout', default=MAZE_FILE, help=f"saved maze layout (default: {MAZE_FILE})")
+    parser.add_argument('--chunk', type=int, default=8, help="chunk size in cells (default: 8)")
+    parser.add_argument('--radius', type=int, default=1, help="chunks kept around each robot (default: 1)")
+    parser.add_argument('--max-chunks', type=int, help="loaded chunks before unloading (default: twice the window)")
+    parser.add_argument('--robot', default='/BubbleRobot', help="object path of the robots to follow")
+    parser.add_argument('--interval', type=float, default=0.2, help="seconds between updates (default: 0.2)")
+    parser.add_argument('--keep', action='store_true', help="leave the streamed objects in the scene on exit")
+    args = parser.parse_args()
+
+    try:
+        maze = MazeGenerator.load(args.layout)
+    except OSError as e:
+        print(f"✗ Could not read maze layout: {e}")
+        return
+
+    print("Connecting to CoppeliaSim...")
+    client = connect()
+    sim = instrument(get_api(client))
+
+    streamer = MazeStreamer(sim, maze, args.chunk, args.radius, args.max_chunks)
+    streamer.start()
+    print(f"✓ Streaming {maze.width}x{maze.height} maze in {args.chunk}x{args.chunk} chunks "
+          f"(radius {args.radius}, at most {streamer.max_chunks} loaded)")
+    print("Press Ctrl+C to stop\n")
+    try:
+        while True:
+            positions = robot_positions(sim, args.robot)
+            loaded, unloaded = streamer.update(positions)
+            if loaded or unloaded:
+                print(f"Robots: {len(positions)} | +{loaded} -{unloaded} chunks | "
+                      f"{len(streamer.loaded)} chunks, {streamer.object_count()} objects loaded")
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\nStopping...")
+    finally:
+        if not args.keep:
+            streamer.close()
+        print(f"Chunks loaded: {streamer.loads}, unloaded: {streamer.unloads}")
+
+
+if __name__ == "__main__":
+    main()
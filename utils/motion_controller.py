@@ -0,0 +1,195 @@
+"""
+Continuous differential-drive motion along a compressed route
+
+Instead of teleporting the robot cell by cell, the route is turned into a
+precomputed wheel velocity profile (straight runs joined by quarter-circle
+curves through the corner cells, like precomputeCurve in
+assets/mazeBot_rightFollowing.lua) and played back on the robot's motor joints.
+The robot keeps moving through corners, and the pose is only polled every few
+steps to trim heading drift on straight segments.
+"""
+
+import math
+import time
+
+from .robot_solve import Direction, SCAN_YAWS, compress_route
+
+# BubbleRob geometry (see notes/coppelia_scribble.txt)
+WHEEL_RADIUS = 0.04
+HALF_TRACK = 0.1  # distance from the body center to each wheel
+
+MOTOR_PATHS = [
+    ('/BubbleRobot/leftMotor', '/BubbleRobot/rightMotor'),
+    ('/bubbleRob_leftMotor', '/bubbleRob_rightMotor')
+]
+
+
+class Segment:
+    """One constant wheel-velocity piece of a motion profile"""
+
+    __slots__ = ('kind', 'left', 'right', 'duration', 'yaw')
+
+    def __init__(self, kind, left, right, duration, yaw):
+        self.kind = kind          # 'straight', 'curve' or 'spin'
+        self.left = left          # left wheel angular velocity (rad/s)
+        self.right = right        # right wheel angular velocity (rad/s)
+        self.duration = duration  # seconds
+        self.yaw = yaw            # heading at the end of the segment
+
+    def __repr__(self):
+        return (f"Segment({self.kind}, wL={self.left:.3f}, wR={self.right:.3f}, "
+                f"t={self.duration:.3f}s)")
+
+
+def turn_between(current: Direction, new: Direction):
+    """+1 for a left (counter-clockwise) turn, -1 for right, 2 for reversing, 0 for straight"""
+    change = (new.value - current.value) % 4
+    return {0: 0, 1: -1, 2: 2, 3: 1}[change]
+
+
+def find_motors(sim, robot_path='/BubbleRobot'):
+    """Handles of the left and right motor joints"""
+    candidates = [(f'{robot_path}/leftMotor', f'{robot_path}/rightMotor')] + MOTOR_PATHS
+    for left_path, right_path in candidates:
+        try:
+            return sim.getObject(left_path), sim.getObject(right_path)
+        except Exception:
+            continue
+    raise ValueError(f"No leftMotor/rightMotor joints found under {robot_path}")
+
+
+class WheelMotionController:
+    """Drives a route with the motor joints following a precomputed velocity profile"""
+
+    def __init__(self, sim, robot_handle, left_motor, right_motor, cell_size=2.0,
+                 speed=0.5, spin_speed=0.2, wheel_radius=WHEEL_RADIUS, half_track=HALF_TRACK,
+                 poll_steps=10, heading_gain=2.0):
+        """
+        Args:
+            speed: linear speed of the body on straights and curves (m/s)
+            spin_speed: wheel rim speed when turning on the spot (m/s)
+            poll_steps: simulation steps between pose polls (heading correction)
+            heading_gain: proportional gain from heading error (rad) to turn rate (rad/s)
+        """
+        self.sim = sim
+        self.robot_handle = robot_handle
+        self.left_motor = left_motor
+        self.right_motor = right_motor
+        self.cell_size = cell_size
+        self.speed = speed
+        self.spin_speed = spin_speed
+        self.wheel_radius = wheel_radius
+        self.half_track = half_track
+        self.poll_steps = poll_steps
+        self.heading_gain = heading_gain
+
+    def wheel_speeds(self, linear, angular):
+        """Wheel angular velocities for a body linear (m/s) and angular (rad/s) velocity"""
+        left = (linear - self.half_track * angular) / self.wheel_radius
+        right = (linear + self.half_track * angular) / self.wheel_radius
+        return left, right
+
+    def spin_segment(self, yaw, turn):
+        """Turn on the spot by turn * 90 degrees (positive is counter-clockwise)"""
+        angle = turn * math.pi / 2
+        rate = math.copysign(self.spin_speed / self.half_track, angle)
+        left, right = self.wheel_speeds(0.0, rate)
+        return Segment('spin', left, right, abs(angle) / abs(rate), yaw + angle)
+
+    def build_profile(self, route, start_yaw=None):
+        """
+        Precompute the velocity profile for a list of Directions.
+
+        Straight runs go from cell center to cell center. At each 90 degree
+        corner the last and first half cells are replaced by a quarter circle of
+        radius cell_size / 2, so the robot never stops. Reversals and the initial
+        alignment (if start_yaw is given) are done as spins on the spot.
+        """
+        runs = compress_route(route)
+        if not runs:
+            return []
+
+        profile = []
+        half = self.cell_size / 2
+        yaw = SCAN_YAWS[runs[0][0]]
+        if start_yaw is not None:
+            error = math.atan2(math.sin(yaw - start_yaw), math.cos(yaw - start_yaw))
+            if abs(error) > 1e-3:
+                rate = math.copysign(self.spin_speed / self.half_track, error)
+                left, right = self.wheel_speeds(0.0, rate)
+                profile.append(Segment('spin', left, right, abs(error) / abs(rate), yaw))
+
+        curve_rate = self.speed / half
+        curve_time = (math.pi / 2) / curve_rate
+        for i, (direction, cells) in enumerate(runs):
+            yaw = SCAN_YAWS[direction]
+            turn_in = turn_between(runs[i - 1][0], direction) if i > 0 else 0
+            turn_out = turn_between(direction, runs[i + 1][0]) if i + 1 < len(runs) else 0
+
+            length = cells * self.cell_size
+            if turn_in in (1, -1):
+                length -= half  # first half cell was covered by the incoming curve
+            if turn_out in (1, -1):
+                length -= half  # last half cell is covered by the outgoing curve
+            if length > 1e-9:
+                left, right = self.wheel_speeds(self.speed, 0.0)
+                profile.append(Segment('straight', left, right, length / self.speed, yaw))
+
+            if turn_out in (1, -1):
+                left, right = self.wheel_speeds(self.speed, turn_out * curve_rate)
+                profile.append(Segment('curve', left, right, curve_time, yaw + turn_out * math.pi / 2))
+            elif turn_out == 2:
+                profile.append(self.spin_segment(yaw, 2))
+        return profile
+
+    def set_wheels(self, left, right):
+        self.sim.setJointTargetVelocity(self.left_motor, left)
+        self.sim.setJointTargetVelocity(self.right_motor, right)
+
+    def drive(self, route, start_yaw=None):
+        """
+        Play the profile for route on the motors, stepping the simulation.
+        Segment boundaries are scheduled on absolute simulation time so rounding
+        to the time step does not accumulate.
+
+        Returns:
+            dict with cells, sim_time, wall_time, steps, pose_polls and cells_per_sim_second
+        """
+        profile = self.build_profile(route, start_yaw)
+        sim = self.sim
+        wall_start = time.perf_counter()
+        # Simulation time is tracked locally from the step size instead of queried every step
+        dt = sim.getSimulationTimeStep()
+        start = now = sim.getSimulationTime()
+        steps = polls = 0
+        end_time = start
+
+        for segment in profile:
+            end_time += segment.duration
+            left, right = segment.left, segment.right
+            self.set_wheels(left, right)
+            since_poll = 0
+            while now < end_time - 1e-9:
+                sim.step()
+                now += dt
+                steps += 1
+                since_poll += 1
+                if segment.kind == 'straight' and since_poll >= self.poll_steps:
+                    since_poll = 0
+                    polls += 1
+                    yaw = sim.getObjectOrientation(self.robot_handle, -1)[2]
+                    error = math.atan2(math.sin(segment.yaw - yaw), math.cos(segment.yaw - yaw))
+                    trim_left, trim_right = self.wheel_speeds(self.speed, self.heading_gain * error)
+                    self.set_wheels(trim_left, trim_right)
+
+        self.set_wheels(0.0, 0.0)
+        sim_time = now - start
+        cells = len(route)
+        return {
+            'cells': cells,
+            'sim_time': sim_time,
+            'wall_time': time.perf_counter() - wall_start,
+            'steps': steps,
+            'pose_polls': polls,
+            'cells_per_sim_second': cells / sim_time if sim_time > 0 else 0.0
+        }
@@ -0,0 +1,360 @@
+"""
+Path planners for 4-connected grids with walls between cells
+
+Cells are (y, x) tuples and directions are indexed like robot_solve.Direction:
+0 = UP (+y), 1 = RIGHT (+x), 2 = DOWN (-y), 3 = LEFT (-x).
+
+- astar: Manhattan-heuristic A* over any neighbor function
+- jump_point_search: A* that jumps along straight lines and only queues jump
+  points (maze_no_obstacles style scenes with few walls). The line scans still
+  touch every cell, so in Python plain astar is usually just as fast.
+- DStarLite: incremental planner that keeps its search state between queries
+  and only repairs the affected part when a wall is discovered
+"""
+
+import heapq
+import itertools
+
+INF = float('inf')
+
+# (dy, dx) for each direction index
+STEPS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+
+
+def manhattan(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+class WallGrid:
+    """
+    4-connected grid whose edges are answered by a blocked(y, x, d) callable.
+    Moves off the grid are always blocked.
+    """
+
+    def __init__(self, height, width, blocked):
+        self.height = height
+        self.width = width
+        self.blocked = blocked
+
+    def in_bounds(self, y, x):
+        return 0 <= y < self.height and 0 <= x < self.width
+
+    def is_open(self, y, x, d):
+        dy, dx = STEPS[d]
+        return (0 <= y + dy < self.height and 0 <= x + dx < self.width
+                and not self.blocked(y, x, d))
+
+    def neighbors(self, cell):
+        y, x = cell
+        height, width, blocked = self.height, self.width, self.blocked
+        return [(y + dy, x + dx) for d, (dy, dx) in enumerate(STEPS)
+                if 0 <= y + dy < height and 0 <= x + dx < width and not blocked(y, x, d)]
+
+
+def reconstruct(came_from, node):
+    path = [node]
+    while came_from[node] is not None:
+        node = came_from[node]
+        path.append(node)
+    path.reverse()
+    return path
+
+
+def astar(start, goal, neighbors, heuristic=manhattan):
+    """
+    A* search with unit edge costs.
+
+    Args:
+        neighbors: callable returning the cells reachable in one step from a cell
+    Returns:
+        list of cells from start to goal (inclusive), or [] if goal is unreachable
+    """
+    counter = itertools.count()
+    # ties on f are broken towards larger g, i.e. nodes closer to the goal
+    open_heap = [(heuristic(start, goal), 0, next(counter), start)]
+    g_score = {start: 0}
+    came_from = {start: None}
+    closed = set()
+
+    while open_heap:
+        _, neg_g, _, node = heapq.heappop(open_heap)
+        if node in closed:
+            continue
+        if node == goal:
+            return reconstruct(came_from, node)
+        closed.add(node)
+
+        g = -neg_g + 1
+        for neighbor in neighbors(node):
+            if g < g_score.get(neighbor, INF):
+                g_score[neighbor] = g
+                came_from[neighbor] = node
+                heapq.heappush(open_heap, (g + heuristic(neighbor, goal), -g, next(counter), neighbor))
+    return []
+
+
+def jump_point_search(grid, start, goal):
+    """
+    Jump point search on a WallGrid.
+
+    Vertical moves play the role of diagonals in classic JPS: a vertical jump
+    checks for horizontal jump points at every cell it passes, while a
+    horizontal jump only stops at the goal or where a vertical neighbor is
+    forced, i.e. cannot be reached as cheaply through the row it came from.
+    Only jump points enter the open list, so long open stretches cost one node.
+
+    Returns:
+        list of cells from start to goal (inclusive), or [] if goal is unreachable
+    """
+    is_open = grid.is_open
+
+    def forced_vertical(y, x, d):
+        """Vertical directions forced at (y, x) when arriving horizontally in direction d"""
+        py, px = y - STEPS[d][0], x - STEPS[d][1]
+        forced = []
+        for v in (0, 2):
+            if is_open(y, x, v):
+                vy = py + STEPS[v][0]
+                if not is_open(py, px, v) or not is_open(vy, px, d):
+                    forced.append(v)
+        return forced
+
+    # Horizontal jumps only depend on the grid and the goal, so every cell
+    # passed on the way shares the result; this keeps each row scanned once
+    horizontal = {}
+
+    def jump_horizontal(y, x, d):
+        dy, dx = STEPS[d]
+        passed = []
+        point = None
+        while is_open(y, x, d):
+            passed.append((y, x, d))
+            y, x = y + dy, x + dx
+            if (y, x, d) in horizontal:
+                point = horizontal[(y, x, d)]
+                if (y, x) == goal or forced_vertical(y, x, d):
+                    point = (y, x)
+                break
+            if (y, x) == goal or forced_vertical(y, x, d):
+                point = (y, x)
+                break
+        for key in passed:
+            horizontal[key] = point
+        return point
+
+    def jump_vertical(y, x, d):
+        dy, dx = STEPS[d]
+        while is_open(y, x, d):
+            y, x = y + dy, x + dx
+            if (y, x) == goal or jump_horizontal(y, x, 1) or jump_horizontal(y, x, 3):
+                return (y, x)
+        return None
+
+    def jump(y, x, d):
+        return jump_vertical(y, x, d) if d % 2 == 0 else jump_horizontal(y, x, d)
+
+    counter = itertools.count()
+    open_heap = [(manhattan(start, goal), 0, next(counter), start, None)]
+    g_score = {start: 0}
+    came_from = {start: None}
+    closed = set()
+
+    while open_heap:
+        _, neg_g, _, node, arrived = heapq.heappop(open_heap)
+        if node in closed:
+            continue
+        if node == goal:
+            return expand_jumps(reconstruct(came_from, node))
+        closed.add(node)
+
+        y, x = node
+        if arrived is None:
+            directions = (0, 1, 2, 3)
+        elif arrived % 2 == 0:
+            directions = (arrived, 1, 3)
+        else:
+            directions = [arrived] + forced_vertical(y, x, arrived)
+
+        for d in directions:
+            point = jump(y, x, d)
+            if point is None:
+                continue
+            g = -neg_g + manhattan(node, point)
+            if g < g_score.get(point, INF):
+                g_score[point] = g
+                came_from[point] = node
+                heapq.heappush(open_heap, (g + manhattan(point, goal), -g, next(counter), point, d))
+    return []
+
+
+def expand_jumps(points):
+    """Fill in the straight cells between consecutive jump points"""
+    path = [points[0]]
+    for (y, x), (ty, tx) in zip(points, points[1:]):
+        dy = (ty > y) - (ty < y)
+        dx = (tx > x) - (tx < x)
+        while (y, x) != (ty, tx):
+            y, x = y + dy, x + dx
+            path.append((y, x))
+    return path
+
+
+def path_directions(path):
+    """Direction indices of the steps along a cell path"""
+    return [STEPS.index((b[0] - a[0], b[1] - a[1])) for a, b in zip(path, path[1:])]
+
+
+class DStarLite:
+    """
+    Incremental shortest-path planner (D* Lite, Koenig & Likhachev 2002).
+
+    The search runs backwards from the goal, so when the robot moves only the
+    heuristic offset changes, and a newly discovered wall only re-expands the
+    cells whose distance to the goal actually changed.
+
+    Usage:
+        planner = DStarLite(grid, start, goal)
+        path = planner.path()
+        # robot moves / probes ...
+        planner.move_start(new_cell)
+        planner.edge_changed(cell, d, was_blocked)   # after grid.blocked changed
+        path = planner.path()                        # repairs only what the change affects
+    """
+
+    def __init__(self, grid, start, goal):
+        self.grid = grid
+        self.start = start
+        self.goal = goal
+        self.last = start
+        self.km = 0
+        self.g = {}
+        self.rhs = {goal: 0}
+        self.queue = []
+        self.queued = {}  # node -> key currently valid in the heap
+        self.counter = itertools.count()
+        self.expansions = 0
+        self.changed = set()  # cells next to edges changed since the last query
+        self._push(goal)
+
+    def _key(self, node):
+        best = min(self.g.get(node, INF), self.rhs.get(node, INF))
+        start = self.start
+        return (best + abs(start[0] - node[0]) + abs(start[1] - node[1]) + self.km, best)
+
+    def _push(self, node):
+        key = self._key(node)
+        self.queued[node] = key
+        heapq.heappush(self.queue, (key, next(self.counter), node))
+
+    def _top_key(self):
+        while self.queue:
+            key, _, node = self.queue[0]
+            if self.queued.get(node) == key:
+                return key
+            heapq.heappop(self.queue)  # stale entry
+        return (INF, INF)
+
+    def _best_rhs(self, node):
+        g = self.g
+        best = INF
+        for neighbor in self.grid.neighbors(node):
+            cost = g.get(neighbor, INF)
+            if cost < best:
+                best = cost
+        return best + 1
+
+    def _requeue(self, node):
+        if self.g.get(node, INF) != self.rhs.get(node, INF):
+            self._push(node)
+        else:
+            self.queued.pop(node, None)
+
+    def _update_vertex(self, node):
+        if node != self.goal:
+            self.rhs[node] = self._best_rhs(node)
+        self._requeue(node)
+
+    def compute(self):
+        """Expand nodes until the start's distance is consistent"""
+        if self.changed:
+            self.km += manhattan(self.last, self.start)
+            self.last = self.start
+            for node in self.changed:
+                self._update_vertex(node)
+            self.changed.clear()
+
+        start = self.start
+        while (self._top_key() < self._key(start)
+               or self.rhs.get(start, INF) != self.g.get(start, INF)):
+            key_old, _, node = heapq.heappop(self.queue)
+            if self.queued.get(node) != key_old:
+                continue
+            self.expansions += 1
+            key_new = self._key(node)
+            if key_old < key_new:
+                self._push(node)
+                continue
+            del self.queued[node]
+
+            g_node, rhs_node = self.g.get(node, INF), self.rhs.get(node, INF)
+            if g_node > rhs_node:
+                # distance went down: neighbors can only improve through this node
+                self.g[node] = rhs_node
+                for neighbor in self.grid.neighbors(node):
+                    if rhs_node + 1 < self.rhs.get(neighbor, INF):
+                        self.rhs[neighbor] = rhs_node + 1
+                        self._requeue(neighbor)
+            else:
+                self.g[node] = INF
+                self._update_vertex(node)
+                for neighbor in self.grid.neighbors(node):
+                    self._update_vertex(neighbor)
+
+    def move_start(self, cell):
+        """Tell the planner the robot is now at cell"""
+        if cell != self.start:
+            self.km += manhattan(self.last, cell)
+            self.last = cell
+            self.start = cell
+
+    def edge_changed(self, cell, d, was_blocked):
+        """
+        Note that the wall on side d of cell changed; call after grid.blocked
+        already reflects the new state. Changes are collected and repaired
+        together on the next query.
+        """
+        y, x = cell
+        dy, dx = STEPS[d]
+        other = (y + dy, x + dx)
+        if not self.grid.in_bounds(*other):
+            return
+        if was_blocked == (not self.grid.is_open(y, x, d)):
+            return
+        self.changed.add(cell)
+        self.changed.add(other)
+
+    def distance(self):
+        """Length of the current shortest path from start to goal (inf if none)"""
+        self.compute()
+        return self.g.get(self.start, INF)
+
+    def path(self):
+        """Current shortest path from start to goal (inclusive), or [] if the goal is unreachable"""
+        if self.distance() == INF:
+            return []
+        node = self.start
+        path = [node]
+        while node != self.goal:
+            y, x = node
+            best, best_cost = None, INF
+            for d, (dy, dx) in enumerate(STEPS):
+                if self.grid.is_open(y, x, d):
+                    neighbor = (y + dy, x + dx)
+                    cost = 1 + self.g.get(neighbor, INF)
+                    if cost < best_cost:
+                        best, best_cost = neighbor, cost
+            if best is None or best_cost == INF or len(path) > self.grid.height * self.grid.width:
+                return []
+            node = best
+            path.append(node)
+        return path
@@ -0,0 +1,369 @@
+"""
+Offline, vectorized evaluation of the robot policies on maze cell grids
+
+Reproduces the decision logic of the Lua controllers one cell at a time:
+
+- wall follower (assets/mazeBot_rightFollowing.lua): curve right when the
+  right wall ends, drive on along the wall, turn left in place when a wall
+  is in front
+- line follower (assets/line_following.lua): the following / turning_away /
+  wall_follow / searching state machine, where "following" takes the guide
+  line with right priority and the proximity sensors see walls and obstacles
+
+Every agent of every maze advances one decision per step in the same NumPy
+operations, so thousands of mazes are scored in one run. A policy that can
+never reach the exit repeats a state; this is found with Brent's cycle check
+and reported as a loop instead of running into the step limit.
+
+Mazes are (M, H, W) arrays of MazeGenerator.wall_mask values (north = -Y).
+Cells with obstacles are treated as blocked. The entrance and exit openings
+are closed: agents start inside the maze and finish when they reach the exit cell.
+
+    python -m utils policy --mazes 1000 --size 16 --obstacles 8
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+import numpy as np
+
+from .maze_generator_coppeliasim import MazeGenerator, WALL_BITS
+
+# Headings in clockwise order, so turning right is +1
+NORTH, EAST, SOUTH, WEST = range(4)
+HEADING_WALLS = (WALL_BITS['north'], WALL_BITS['east'], WALL_BITS['south'], WALL_BITS['west'])
+HEADING_OFFSETS = ((0, -1), (1, 0), (0, 1), (-1, 0))  # (dx, dy)
+
+# Line follower states, in assets/fsm.graphql order
+FOLLOWING, TURNING_AWAY, WALL_FOLLOW, SEARCHING = range(4)
+
+# Agent outcomes
+EXITED, LOOP, STEP_LIMIT = range(3)
+STATUS_NAMES = ('exited', 'loop', 'step limit')
+
+
+def masks_from_mazes(mazes):
+    """
+    Stack MazeGenerator mazes of the same size.
+
+    Returns:
+        (walls, obstacles): (M, H, W) uint8 wall masks and (M, H, W) bool obstacle cells
+    """
+    walls, obstacles = zip(*(maze.wall_arrays() for maze in mazes))
+    return np.stack(walls), np.stack(obstacles)
+
+
+def edge_tables(walls, obstacles=None):
+    """
+    Per-cell heading bitmasks (bit h set = blocked in heading h), flattened to (M, H*W).
+
+    Returns:
+        (lines, blocked): lines marks the open passages (where guide lines run),
+        blocked additionally closes the edges into obstacle cells
+    """
+    walls = np.asarray(walls, dtype=np.uint8)
+    m, h, w = walls.shape
+    closed = np.zeros(walls.shape, dtype=np.uint8)
+    for heading, bit in enumerate(HEADING_WALLS):
+        closed |= ((walls & bit) != 0).astype(np.uint8) << heading
+    # The grid boundary is closed, including the entrance and exit openings
+    closed[:, 0, :] |= 1 << NORTH
+    closed[:, -1, :] |= 1 << SOUTH
+    closed[:, :, 0] |= 1 << WEST
+    closed[:, :, -1] |= 1 << EAST
+
+    blocked = closed.copy()
+    if obstacles is not None:
+        obstacles = np.asarray(obstacles, dtype=bool)
+        blocked[:, 1:, :] |= obstacles[:, :-1, :].astype(np.uint8) << NORTH
+        blocked[:, :-1, :] |= obstacles[:, 1:, :].astype(np.uint8) << SOUTH
+        blocked[:, :, :-1] |= obstacles[:, :, 1:].astype(np.uint8) << EAST
+        blocked[:, :, 1:] |= obstacles[:, :, :-1].astype(np.uint8) << WEST
+    return ~closed.reshape(m, h * w) & 15, blocked.reshape(m, h * w)
+
+
+def _is_set(bits, heading):
+    return ((bits >> heading) & 1).astype(bool)
+
+
+def _right_hand(blocked_bits, heading):
+    """Wall follower decision: (new heading, moves)"""
+    right = (heading + 1) & 3
+    left = (heading + 3) & 3
+    open_right = ~_is_set(blocked_bits, right)
+    open_front = ~_is_set(blocked_bits, heading)
+    heading = np.where(open_right, right, np.where(open_front, heading, left))
+    return heading, open_right | open_front
+
+
+class _Agents:
+    """Flat state of all agents still running, plus their results"""
+
+    def __init__(self, walls, starts, headings, exits):
+        m, h, w = walls.shape
+        starts = np.asarray(starts, dtype=np.int64).reshape(m, -1, 2)
+        per_maze = starts.shape[1]
+        count = m * per_maze
+        self.width = w
+        self.offsets = np.array([dx + dy * w for dx, dy in HEADING_OFFSETS], dtype=np.int64)
+
+        self.id = np.arange(count)
+        self.maze = np.repeat(np.arange(m), per_maze)
+        self.pos = (starts[..., 1] * w + starts[..., 0]).reshape(-1)
+        self.heading = np.broadcast_to(np.asarray(headings, dtype=np.int64), (m, per_maze)).reshape(-1).copy()
+        exits = np.asarray(exits, dtype=np.int64).reshape(-1, 2)
+        self.exit = np.broadcast_to((exits[:, 1] * w + exits[:, 0])[:, None], (m, per_maze)).reshape(-1).copy()
+        self.state = np.zeros(count, dtype=np.int64)
+        self.phase = np.zeros(count, dtype=np.int64)
+        self.saved = np.full(count, -1, dtype=np.int64)
+
+        self.visited = np.zeros((count, h * w), dtype=bool)
+        self.visited[self.id, self.pos] = True
+        self.result = {
+            'maze': self.maze.copy(),
+            'agent': np.tile(np.arange(per_maze), m),
+            'status': np.full(count, STEP_LIMIT, dtype=np.int8),
+            'steps': np.zeros(count, dtype=np.int64),
+            'moves': np.zeros(count, dtype=np.int64),
+            'revisits': np.zeros(count, dtype=np.int64),
+        }
+
+    def move(self, heading, moves):
+        """Advance the agents in `moves` one cell along heading, counting revisits"""
+        self.heading = heading
+        movers = np.nonzero(moves)[0]
+        if len(movers):
+            self.pos[movers] += self.offsets[heading[movers]]
+            ids, pos = self.id[movers], self.pos[movers]
+            self.result['moves'][ids] += 1
+            self.result['revisits'][ids] += self.visited[ids, pos]
+            self.visited[ids, pos] = True
+
+    def finish(self, step, key):
+        """Retire agents at the exit or in a loop; returns False when none are left"""
+        self.result['steps'][self.id] = step
+        exited = self.pos == self.exit
+        looped = ~exited & (key == self.saved)
+        done = exited | looped
+        if done.any():
+            self.result['status'][self.id[exited]] = EXITED
+            self.result['status'][self.id[looped]] = LOOP
+            keep = ~done
+            for name in ('id', 'maze', 'pos', 'heading', 'exit', 'state', 'phase', 'saved'):
+                setattr(self, name, getattr(self, name)[keep])
+            key = key[keep]
+        # Brent's cycle check: remember the state at every power of two
+        if step & (step - 1) == 0:
+            self.saved = key.copy()
+        return len(self.id) > 0
+
+
+def _defaults(walls, starts, headings, exits, max_steps, states_per_cell):
+    walls = np.asarray(walls, dtype=np.uint8)
+    m, h, w = walls.shape
+    if starts is None:
+        starts = np.zeros((m, 1, 2), dtype=np.int64)
+    if exits is None:
+        exits = np.tile([w - 1, h - 1], (m, 1))
+    if max_steps is None:
+        # Brent's check finds any cycle well within three passes over the state space
+        max_steps = 3 * states_per_cell * h * w + 1
+    return walls, starts, headings, exits, max_steps
+
+
+def simulate_wall_follower(walls, obstacles=None, starts=None, headings=SOUTH, exits=None, max_steps=None):
+    """
+    Right-hand wall following on a batch of mazes.
+
+    Args:
+        walls: (M, H, W) wall masks, see masks_from_mazes
+        obstacles: (M, H, W) bool obstacle cells, or None
+        starts: (M, A, 2) start cells (x, y) of A agents per maze (default: one agent at (0, 0))
+        headings: start heading(s), broadcast to (M, A) (default: SOUTH, into the maze)
+        exits: (M, 2) exit cell (x, y) per maze (default: the far corner)
+        max_steps: step limit (default: enough to detect any loop)
+    Returns:
+        dict of (M*A,) arrays: maze, agent, status (EXITED/LOOP/STEP_LIMIT), steps, moves, revisits
+    """
+    walls, starts, headings, exits, max_steps = _defaults(walls, starts, headings, exits, max_steps, 4)
+    _, blocked = edge_tables(walls, obstacles)
+    agents = _Agents(walls, starts, headings, exits)
+    if not agents.finish(0, agents.pos * 4 + agents.heading):
+        return agents.result
+
+    for step in range(1, max_steps + 1):
+        heading, moves = _right_hand(blocked[agents.maze, agents.pos], agents.heading)
+        agents.move(heading, moves)
+        if not agents.finish(step, agents.pos * 4 + agents.heading):
+            break
+    return agents.result
+
+
+def simulate_line_follower(walls, obstacles=None, starts=None, headings=SOUTH, exits=None, max_steps=None,
+                           wall_follow_steps=3, search_steps=2):
+    """
+    The line_following.lua state machine on a batch of mazes (arguments and result as
+    simulate_wall_follower).
+
+    One step is one decision at a cell:
+        following     take the line to the right, ahead, left or back (right priority);
+                      an obstacle ahead -> turning_away
+        turning_away  turn left until the front is clear -> wall_follow
+        wall_follow   right-hand wall following; back on a line with nothing ahead
+                      -> following, after wall_follow_steps -> searching
+        searching     turn right; a line ahead -> following, after search_steps -> wall_follow;
+                      an obstacle ahead: turn left and stay searching
+
+    Args:
+        wall_follow_steps: cell-step equivalent of the 3s wall_follow timeout
+        search_steps: cell-step equivalent of the 2s search timeout
+    """
+    phases = max(wall_follow_steps, search_steps) + 2
+    walls, starts, headings, exits, max_steps = _defaults(walls, starts, headings, exits, max_steps, 16 * phases)
+    lines, blocked = edge_tables(walls, obstacles)
+    obstacle_ahead = blocked & lines  # open passage, but the next cell is an obstacle
+    agents = _Agents(walls, starts, headings, exits)
+
+    def key():
+        return ((agents.pos * 4 + agents.heading) * 4 + agents.state) * phases + np.minimum(agents.phase, phases - 1)
+
+    if not agents.finish(0, key()):
+        return agents.result
+
+    for step in range(1, max_steps + 1):
+        maze, pos, heading, state = agents.maze, agents.pos, agents.heading, agents.state
+        cell_lines, cell_blocked = lines[maze, pos], blocked[maze, pos]
+        sees_obstacle = _is_set(obstacle_ahead[maze, pos], heading)
+        right, left, back = (heading + 1) & 3, (heading + 3) & 3, (heading + 2) & 3
+
+        new_heading = heading.copy()
+        new_state = state.copy()
+        phase = agents.phase + 1
+        moves = np.zeros(len(pos), dtype=bool)
+
+        # following: right priority along the guide lines, spin right when the line ends
+        following = state == FOLLOWING
+        line_heading = np.where(_is_set(cell_lines, right), right,
+                                np.where(_is_set(cell_lines, heading), heading,
+                                         np.where(_is_set(cell_lines, left), left, back)))
+        avoid = following & sees_obstacle
+        follow = following & ~sees_obstacle
+        new_heading[follow] = line_heading[follow]
+        moves |= follow & ~_is_set(cell_blocked, line_heading)
+
+        # an obstacle in front while following: start turning away
+        new_state[avoid] = TURNING_AWAY
+        new_heading[avoid] = left[avoid]
+        phase[avoid] = 0
+
+        # turning_away: turn left until the front is clear
+        turning = state == TURNING_AWAY
+        new_heading[turning] = left[turning]
+        clear = turning & ~_is_set(cell_blocked, left)
+        new_state[clear] = WALL_FOLLOW
+        phase[clear] = 0
+
+        # wall_follow: right-hand rule until back on a line with nothing ahead, or timeout
+        wall_following = state == WALL_FOLLOW
+        wall_heading, wall_moves = _right_hand(cell_blocked, heading)
+        new_heading[wall_following] = wall_heading[wall_following]
+        moves |= wall_following & wall_moves
+        arrived_lines = lines[maze, pos + agents.offsets[wall_heading] * wall_moves]
+        ahead_obstacle = _is_set(obstacle_ahead[maze, pos + agents.offsets[wall_heading] * wall_moves],
+                                 wall_heading)
+        found = wall_following & wall_moves & (arrived_lines != 0) & ~ahead_obstacle
+        new_state[found] = FOLLOWING
+        timeout = wall_following & ~found & (phase > wall_follow_steps)
+        new_state[timeout] = SEARCHING
+        phase[found | timeout] = 0
+
+        # searching: spin right until a line is ahead, or timeout. The Lua fires
+        # obstacle_detected here too, but that event only leaves following, so the
+        # robot just turns left for that step and keeps searching
+        searching = state == SEARCHING
+        blocked_search = searching & sees_obstacle
+        new_heading[blocked_search] = left[blocked_search]
+        search = searching & ~sees_obstacle
+        new_heading[search] = right[search]
+        found = search & _is_set(cell_lines, right)
+        new_state[found] = FOLLOWING
+        timeout = search & ~found & (phase > search_steps)
+        new_state[timeout] = WALL_FOLLOW
+        phase[found | timeout] = 0
+
+        agents.state, agents.phase = new_state, phase
+        agents.move(new_heading, moves)
+        if not agents.finish(step, key()):
+            break
+    return agents.result
+
+
+def summarize(result):
+    """Aggregate numbers of a simulate_* result"""
+    status = result['status']
+    exited = status == EXITED
+    summary = {'agents': len(status)}
+    for code, name in enumerate(STATUS_NAMES):
+        summary[name] = int((status == code).sum())
+    if exited.any():
+        summary['mean_steps'] = float(result['steps'][exited].mean())
+        summary['median_steps'] = float(np.median(result['steps'][exited]))
+        summary['mean_revisits'] = float(result['revisits'][exited].mean())
+    return summary
+
+
+def generate_corpus(count, size, obstacles=0, seed=0):
+    """`count` seeded MazeGenerator mazes as (walls, obstacles) arrays"""
+    mazes = []
+    with contextlib.redirect_stdout(io.StringIO()):  # the generator reports each maze
+        for i in range(count):
+            maze = MazeGenerator(size, size, seed=seed + i)
+            maze.generate_prim()
+            if obstacles:
+                random.seed(seed + i)
+                maze.place_obstacles(num_obstacles=obstacles)
+            mazes.append(maze)
+    return masks_from_mazes(mazes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score the wall and line follower policies on many mazes")
+    parser.add_argument('--mazes', type=int, default=1000, help="generated mazes (default: 1000)")
+    parser.add_argument('--size', type=int, default=16, help="maze width and height in cells (default: 16)")
+    parser.add_argument('--obstacles', type=int, default=0, help="obstacles per generated maze")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first maze")
+    parser.add_argument('--layouts', nargs='+', metavar='LAYOUT',
+                        help="score saved layouts (all the same size) instead of generated mazes")
+    parser.add_argument('--policy', choices=['wall', 'line', 'both'], default='both')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.layouts:
+        walls, obstacles = masks_from_mazes([MazeGenerator.load(path) for path in args.layouts])
+    else:
+        walls, obstacles = generate_corpus(args.mazes, args.size, args.obstacles, args.seed)
+    print(f"✓ {len(walls)} mazes of {walls.shape[2]}x{walls.shape[1]} cells "
+          f"({time.perf_counter() - start:.2f}s)")
+
+    policies = {'wall': ('wall follower', simulate_wall_follower),
+                'line': ('line follower', simulate_line_follower)}
+    for key, (name, simulate) in policies.items():
+        if args.policy not in (key, 'both'):
+            continue
+        start = time.perf_counter()
+        result = simulate(walls, obstacles)
+        elapsed = time.perf_counter() - start
+        summary = summarize(result)
+        print(f"\n{name}: {elapsed:.2f}s, {result['steps'].sum() / max(elapsed, 1e-9):,.0f} agent steps/s")
+        print(f"  exited {summary['exited']}/{summary['agents']}, loops {summary['loop']}, "
+              f"step limit {summary['step limit']}")
+        if 'mean_steps' in summary:
+            print(f"  steps to exit: mean {summary['mean_steps']:.1f}, median {summary['median_steps']:.0f}; "
+                  f"revisits: mean {summary['mean_revisits']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,76 @@
-from coppeliasim_zmqremoteapi_client import RemoteAPIClient
+import argparse
+import os
+import re
+import selectors
 import time
 import sys
 import math
 import termios
 import tty
 
+from .connection import connect, get_api
+
+STEP_SIZE = 1.0  # meters moved per arrow key / F step
+
+# World-axis moves, as recorded from the arrow keys
+AXIS_MOVES = {'+X': (1.0, 0.0), '-X': (-1.0, 0.0), '+Y': (0.0, 1.0), '-Y': (0.0, -1.0)}
+ARROW_COMMANDS = {'A': '+Y', 'B': '-Y', 'C': '+X', 'D': '-X'}
+
+# Keys understood by the live mode; arrow keys arrive as ESC [ A..D
+LIVE_KEYS = {'r': 'L', 'R': 'R', '\x03': 'quit', 'q': 'quit'}
+
+COMMAND_PATTERN = re.compile(r'([FBLR]|[+-][XY])(\d*)$', re.IGNORECASE)
+
+# Applies a chunk of poses and reads the front sensor after each one, all in one remote call
+BATCH_POSES_LUA = """(function()
+    local robot, sensor = %d, %d
+    local poses = {%s}
+    local out = {}
+    for i = 1, #poses, 4 do
+        sim.setObjectPosition(robot, -1, {poses[i], poses[i + 1], poses[i + 2]})
+        sim.setObjectOrientation(robot, -1, {0, 0, poses[i + 3]})
+        local distance = -1
+        if sensor >= 0 then
+            local detected, d = sim.checkProximitySensor(sensor, sim.handle_all)
+            if detected > 0 then distance = d end
+        end
+        out[#out + 1] = distance
+    end
+    return out
+end)()@lua"""
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Drive the robot from the keyboard or from a command script")
+    parser.add_argument('--script', metavar='PATH',
+                        help="run commands from a file ('-' for stdin) instead of the keyboard, "
+                             "e.g. 'F3 R F2 L' (F/B n steps along the heading, L/R n quarter turns, "
+                             "+X/-X/+Y/-Y n steps along a world axis, # starts a comment)")
+    parser.add_argument('--commands', metavar='TEXT', help="run the given commands instead of the keyboard")
+    parser.add_argument('--log', metavar='PATH', help="write poses and sensor readings to a telemetry log")
+    parser.add_argument('--record', metavar='PATH',
+                        help="save the keys pressed in interactive mode as a replayable script")
+    parser.add_argument('--batch-size', type=int, default=256,
+                        help="script steps sent to the simulator per remote call (default: 256)")
+    parser.add_argument('--live', action='store_true',
+                        help="keep stepping and streaming the sensor while waiting for keys")
+    parser.add_argument('--rate', type=float, default=20.0,
+                        help="simulation steps per second in live mode (default: 20)")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+
     # Connect to CoppeliaSim
     print("Connecting to CoppeliaSim...")
     try:
-        client = RemoteAPIClient()
+        client = connect()
         client.setStepping(True)
     except Exception as e:
         print(f"Error connecting to CoppeliaSim: {e}")
         print("Make sure CoppeliaSim is running with ZMQ Remote API enabled.")
         return
 
-    sim = client.getObject('sim')
+    sim = get_api(client)
     
     try:
         # Find the robot and sensor
@@ -42,6 +96,39 @@ def main():
         # Get initial position
         pos = sim.getObjectPosition(robot_handle, -1)
         print(f"\nInitial position: X={pos[0]:.4f} Y={pos[1]:.4f} Z={pos[2]:.4f}")
+
+        if args.script or args.commands:
+            if args.commands:
+                text = args.commands
+            elif args.script == '-':
+                text = sys.stdin.read()
+            else:
+                with open(args.script) as f:
+                    text = f.read()
+            try:
+                commands = parse_commands(text)
+            except ValueError as e:
+                print(f"Invalid script: {e}")
+                return
+            run_script(sim, robot_handle, front_sensor, commands, args.log, args.batch_size)
+            return
+
+        if args.live:
+            print("\n=== Live Robot Control ===")
+            print(f"Stepping at {args.rate:g} Hz; keys pressed within one step are combined")
+            print("Arrow Keys: Move along X/Y axis | R / Shift+R: Rotate left / right | q or Ctrl+C: exit\n")
+            recorded = []
+            old_settings = enable_raw_input()
+            try:
+                live_loop(sim, robot_handle, front_sensor, args.rate, args.log, recorded)
+            finally:
+                disable_raw_input(old_settings)
+                print()
+                if args.record:
+                    with open(args.record, 'w') as f:
+                        f.write(format_commands(recorded) + "\n")
+                    print(f"Recorded {len(recorded)} commands to {args.record}")
+            return
         
         print("\n=== Robot Control ===")
         print("Arrow Keys: Move along X/Y axis")
@@ -54,8 +141,10 @@ def main():
         # Enable raw input
         old_settings = enable_raw_input()
         
-        # Track robot orientation (in radians, 0 = facing +X)
-        current_yaw = 0
+        # Track robot orientation (in radians, 0 = facing +X), starting from the real one
+        # like --script and --live do, so a --record session replays the same way
+        current_yaw = sim.getObjectOrientation(robot_handle, -1)[2]
+        recorded = []  # commands for --record
         
         try:
             while True:
@@ -85,6 +174,7 @@ def main():
                             print(f"Moving -X: ", end="")
                         else:
                             continue
+                        recorded.append(ARROW_COMMANDS[direction])
                         
                         # Set new position
                         sim.setObjectPosition(robot_handle, -1, new_pos)
@@ -117,6 +207,7 @@ def main():
                         # R: rotate 90° left (counter-clockwise)
                         current_yaw += math.pi / 2
                         rotation_text = "Rotating 90° left (counter-clockwise)"
+                    recorded.append('R' if is_shift else 'L')
                     
                     # Normalize yaw to [-π, π]
                     current_yaw = math.atan2(math.sin(current_yaw), math.cos(current_yaw))
@@ -150,26 +241,289 @@ def main():
         finally:
             # Restore terminal settings
             disable_raw_input(old_settings)
+            if args.record:
+                with open(args.record, 'w') as f:
+                    f.write(format_commands(recorded) + "\n")
+                print(f"Recorded {len(recorded)} commands to {args.record}")
     
     finally:
         client.setStepping(False)
         print("Disconnected from CoppeliaSim.")
 
 
-def find_robot(sim):
-    """Find the robot in the scene"""
+def parse_commands(text):
+    """
+    Parse a command script such as "F3 R F2 L" into (command, count) pairs.
+    Raises ValueError for unknown commands.
+    """
+    commands = []
+    for line_number, line in enumerate(text.splitlines(), 1):
+        for token in line.split('#', 1)[0].split():
+            match = COMMAND_PATTERN.match(token)
+            if not match:
+                raise ValueError(f"line {line_number}: unknown command {token!r}")
+            command = match.group(1).upper()
+            commands.append((command, int(match.group(2) or 1)))
+    return commands
+
+
+def format_commands(commands):
+    """Inverse of parse_commands for single-step commands, merging repeats (+X +X -> +X2)"""
+    tokens = []
+    for command in commands:
+        if tokens and tokens[-1][0] == command:
+            tokens[-1][1] += 1
+        else:
+            tokens.append([command, 1])
+    return ' '.join(command if count == 1 else f'{command}{count}' for command, count in tokens)
+
+
+def plan_poses(commands, position, yaw):
+    """
+    Expand commands into one (command, position, yaw) pose per step, exactly as
+    pressing the corresponding key that many times would.
+    """
+    x, y, z = position
+    poses = []
+    for command, count in commands:
+        for _ in range(count):
+            if command in ('L', 'R'):
+                yaw += math.pi / 2 if command == 'L' else -math.pi / 2
+                yaw = math.atan2(math.sin(yaw), math.cos(yaw))
+            else:
+                if command in AXIS_MOVES:
+                    dx, dy = AXIS_MOVES[command]
+                else:
+                    # heading snapped to the nearest axis, like the maze moves
+                    quarter = round(yaw / (math.pi / 2))
+                    sign = 1 if command == 'F' else -1
+                    dx = sign * round(math.cos(quarter * math.pi / 2))
+                    dy = sign * round(math.sin(quarter * math.pi / 2))
+                x, y = x + dx * STEP_SIZE, y + dy * STEP_SIZE
+            poses.append((command, (x, y, z), yaw))
+    return poses
+
+
+def apply_poses(sim, robot_handle, sensor_handle, poses, batch_size=256):
+    """
+    Move through the poses and read the front sensor after each one.
+    Yields (sim_time, distance or None) per pose.
+
+    Poses are sent in chunks through one sandbox script call each; if scripts
+    can't be run, every pose is applied with individual calls and one step.
+
+    Limitation of the batched mode: a sandbox script cannot step the simulation,
+    so the simulator only advances one step per chunk. The sim_time yielded for
+    each pose is synthetic: the time it would have had with one step per pose
+    (start time + (index + 1) * time step), so logs keep a regular frame timing.
+    """
+    sensor = sensor_handle if sensor_handle not in (None, -1) else -1
+    bulk = hasattr(sim, 'executeScriptString')
+    if bulk:
+        start_time = sim.getSimulationTime()
+        time_step = sim.getSimulationTimeStep()
+    for start in range(0, len(poses), batch_size):
+        chunk = poses[start:start + batch_size]
+        if bulk:
+            values = ', '.join(repr(float(v)) for _, p, yaw in chunk for v in (*p, yaw))
+            try:
+                distances = sim.executeScriptString(
+                    BATCH_POSES_LUA % (robot_handle, sensor, values), sim.handle_sandboxscript)
+                # Older API versions return (result, value)
+                if isinstance(distances, tuple):
+                    distances = distances[-1]
+                sim.step()
+                for index, distance in enumerate(distances, start + 1):
+                    yield start_time + index * time_step, (None if distance < 0 else distance)
+                continue
+            except Exception as e:
+                print(f"Batched poses unavailable, applying them one by one: {e}")
+                bulk = False
+
+        yaw = None
+        for _, position, new_yaw in chunk:
+            sim.setObjectPosition(robot_handle, -1, list(position))
+            if new_yaw != yaw:
+                sim.setObjectOrientation(robot_handle, -1, [0, 0, new_yaw])
+                yaw = new_yaw
+            sim.step()
+            distance = read_proximity_sensor(sim, sensor_handle) if sensor != -1 else None
+            yield sim.getSimulationTime(), distance
+
+
+def sensor_log_name(sim, sensor_handle):
+    """Telemetry column name of the front sensor: its alias, as in every mode's logs"""
+    if sensor_handle in (None, -1):
+        return 'SensingNose'
+    return sim.getObjectAlias(sensor_handle)
+
+
+def run_script(sim, robot_handle, sensor_handle, commands, log_path=None, batch_size=256):
+    """Execute parsed commands without waiting between steps, optionally logging each step"""
+    # Local import: telemetry needs NumPy, which the interactive mode does not
+    from .telemetry import TelemetryLogger
+
+    position = sim.getObjectPosition(robot_handle, -1)
+    yaw = sim.getObjectOrientation(robot_handle, -1)[2]
+    poses = plan_poses(commands, position, yaw)
+    log = TelemetryLogger(log_path, [sensor_log_name(sim, sensor_handle)]) if log_path else None
+    start = time.perf_counter()
+    walls = 0
+    try:
+        for frame, ((command, position, pose_yaw), (sim_time, distance)) in enumerate(
+                zip(poses, apply_poses(sim, robot_handle, sensor_handle, poses, batch_size))):
+            walls += is_wall_detected(distance)
+            if log is not None:
+                log.log(sim_time, frame, position, [0.0, 0.0, pose_yaw], [distance])
+    finally:
+        if log is not None:
+            log.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"Executed {len(commands)} commands ({len(poses)} steps) in {elapsed:.3f}s, "
+          f"wall detected after {walls} steps")
+    if poses:
+        _, position, pose_yaw = poses[-1]
+        print(f"Final position: X={position[0]:.4f} Y={position[1]:.4f} Z={position[2]:.4f} "
+              f"| Yaw: {math.degrees(pose_yaw):6.1f}°")
+    if log is not None:
+        print(f"Logged {log.records_written} steps to {log_path}")
+    return poses
+
+
+def decode_keys(data):
+    """
+    Split raw terminal input into commands (see AXIS_MOVES and LIVE_KEYS).
+
+    An ESC that doesn't start a '[' sequence is a lone ESC key: it is ignored
+    and the keys after it are decoded normally.
+
+    Returns:
+        (commands, rest) where rest is an incomplete escape sequence to prepend to the next read
+    """
+    commands = []
+    i = 0
+    while i < len(data):
+        char = data[i]
+        if char == '\x1b':
+            if data[i + 1:i + 2] not in ('[', ''):
+                i += 1  # lone ESC
+                continue
+            if len(data) - i < 3:
+                break
+            if data[i + 2] in ARROW_COMMANDS:
+                commands.append(ARROW_COMMANDS[data[i + 2]])
+            i += 3
+            continue
+        if char in LIVE_KEYS:
+            commands.append(LIVE_KEYS[char])
+        i += 1
+    return commands, data[i:]
+
+
+def live_loop(sim, robot_handle, sensor_handle, rate=20.0, log_path=None, recorded=None):
+    """
+    Step the simulation at a fixed rate and stream pose and sensor readings,
+    applying keys as they arrive (stdin must be in raw mode).
+
+    All keys received during one step are merged into a single move and
+    rotation, so a held arrow key costs one pose update per step instead of
+    one round trip per repeat.
+
+    Args:
+        rate: simulation steps per second
+        recorded: list that receives every command, for --record
+    """
+    period = 1.0 / rate
+    selector = selectors.DefaultSelector()
+    selector.register(sys.stdin, selectors.EVENT_READ)
+    log = None
+    if log_path:
+        from .telemetry import TelemetryLogger
+        log = TelemetryLogger(log_path, [sensor_log_name(sim, sensor_handle)])
+
+    yaw = sim.getObjectOrientation(robot_handle, -1)[2]
+    pending = ''
+    stale = ''  # incomplete escape sequence left over at the previous step
+    frame = 0
+    next_step = time.perf_counter()
     try:
-        index = 0
         while True:
-            obj_handle = sim.getObjects(index, sim.handle_all)
-            if obj_handle == -1:
+            # Collect keys until the next step is due
+            dx = dy = 0.0
+            turns = 0
+            stop = False
+            while True:
+                timeout = next_step - time.perf_counter()
+                if timeout <= 0:
+                    break
+                if not selector.select(timeout):
+                    continue
+                data = os.read(sys.stdin.fileno(), 1024).decode(errors='ignore')
+                commands, pending = decode_keys(pending + data)
+                for command in commands:
+                    if command == 'quit':
+                        stop = True
+                        break
+                    if recorded is not None:
+                        recorded.append(command)
+                    if command in AXIS_MOVES:
+                        dx += AXIS_MOVES[command][0] * STEP_SIZE
+                        dy += AXIS_MOVES[command][1] * STEP_SIZE
+                    else:
+                        turns += 1 if command == 'L' else -1
+                if stop:
+                    break
+            if stop:
+                print("\r\n\nControl stopped by user.\r")
                 break
-            
-            obj_name = sim.getObjectName(obj_handle).lower()
-            if 'robot' in obj_name or 'youbot' in obj_name:
-                return obj_handle
-            
-            index += 1
+            # An escape sequence still incomplete after a whole step is a lone ESC: flush it
+            if pending and pending == stale:
+                pending = ''
+            stale = pending
+            next_step = max(next_step + period, time.perf_counter())
+
+            pos = sim.getObjectPosition(robot_handle, -1)
+            if dx or dy:
+                pos = [pos[0] + dx, pos[1] + dy, pos[2]]
+                sim.setObjectPosition(robot_handle, -1, pos)
+            if turns % 4:
+                yaw += turns * math.pi / 2
+                yaw = math.atan2(math.sin(yaw), math.cos(yaw))
+                sim.setObjectOrientation(robot_handle, -1, [0, 0, yaw])
+            sim.step()
+
+            distance = read_proximity_sensor(sim, sensor_handle) if sensor_handle not in (None, -1) else None
+            if log is not None:
+                log.log(sim.getSimulationTime(), frame, pos, [0.0, 0.0, yaw], [distance])
+            frame += 1
+
+            if distance is not None:
+                wall_status = "WALL" if is_wall_detected(distance) else "clear"
+                sensor_text = f"{distance:.4f}m [{wall_status}]"
+            else:
+                sensor_text = "no detection [clear]"
+            if dx or dy or turns % 4:
+                sys.stdout.write(f"\rMoved dX={dx:+.1f} dY={dy:+.1f} turns={turns:+d}\x1b[K\r\n")
+            sys.stdout.write(f"\rPosition: X={pos[0]:7.4f} Y={pos[1]:7.4f} Z={pos[2]:7.4f}"
+                             f" | Yaw: {math.degrees(yaw):6.1f}° | Front Sensor: {sensor_text}\x1b[K")
+            sys.stdout.flush()
+    finally:
+        selector.close()
+        if log is not None:
+            log.close()
+    return frame
+
+
+def find_robot(sim):
+    """Find the robot in the scene, looking at the top-level objects first"""
+    try:
+        # options=2: direct children of the scene; options=0: every object, for robots nested under a dummy
+        for options in (2, 0):
+            for obj_handle in sim.getObjectsInTree(sim.handle_scene, sim.handle_all, options):
+                obj_name = sim.getObjectAlias(obj_handle).lower()
+                if 'robot' in obj_name or 'youbot' in obj_name:
+                    return obj_handle
         
         return None
     except Exception as e:
@@ -177,23 +531,16 @@ def find_robot(sim):
         return None
 
 
-def find_front_sensor(sim):
-    """Find the front sensor in the scene"""
+def find_front_sensor(sim, robot_handle=None):
+    """Find the front sensor (robot's subtree if given, otherwise the whole scene)"""
     try:
-        index = 0
-        while True:
-            obj_handle = sim.getObjects(index, sim.handle_all)
-            if obj_handle == -1:
-                break
-            
-            obj_name = sim.getObjectName(obj_handle).lower()
-            obj_type = sim.getObjectType(obj_handle)
-            
-            # Type 4 is vision sensor, Type 5 is proximity sensor
-            if (obj_type == 4 or obj_type == 5) and 'front' in obj_name:
-                return obj_handle
-            
-            index += 1
+        base = sim.handle_scene if robot_handle is None else robot_handle
+        # Only sensors are fetched, one call per sensor type
+        for obj_type in (sim.object_proximitysensor_type, sim.object_visionsensor_type):
+            for obj_handle in sim.getObjectsInTree(base, obj_type, 0):
+                obj_name = sim.getObjectAlias(obj_handle).lower()
+                if 'front' in obj_name:
+                    return obj_handle
         
         return None
     except Exception as e:
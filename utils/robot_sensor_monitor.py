@@ -1,20 +1,70 @@
-from coppeliasim_zmqremoteapi_client import RemoteAPIClient
+import argparse
+import json
 import time
 import sys
 import math
+from .sim_profiler import instrument
+from .connection import connect, get_api
+
+# Sensor names found on the last run, reused while the robot has the same sensor handles
+SENSOR_CACHE_FILE = '.sensor_cache.json'
+
+# Lua expression that reads every sensor in one remote call.
+# Proximity sensors return a distance, vision sensors their average intensity; -1 means no reading.
+BULK_READ_LUA = """(function()
+    local proximity = {%s}
+    local vision = {%s}
+    local out = {}
+    for i = 1, #proximity do
+        local detected, distance = sim.checkProximitySensor(proximity[i], sim.handle_all)
+        out[#out + 1] = (detected > 0) and distance or -1
+    end
+    for i = 1, #vision do
+        local result, data = sim.readVisionSensor(vision[i])
+        out[#out + 1] = (result >= 0 and data) and data[11] or -1
+    end
+    return out
+end)()@lua"""
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Monitor robot pose and sensors")
+    parser.add_argument('--log', metavar='PATH',
+                        help="record every simulation step to a binary telemetry log "
+                             "(runs at full rate, console output is decimated)")
+    parser.add_argument('--print-interval', type=float, default=1.0, metavar='SECONDS',
+                        help="seconds between console lines while logging (default: 1.0)")
+    parser.add_argument('--drop-when-full', action='store_true',
+                        help="drop frames when the log writer falls behind instead of "
+                             "waiting for it (the default keeps every step)")
+    return parser.parse_args()
+
+def format_frame(frame, pos, direction, sensor_data):
+    """One console line describing the robot pose and sensor values"""
+    line = (f"Frame {frame:04d} | Position: X={pos[0]:7.4f} Y={pos[1]:7.4f} Z={pos[2]:7.4f} | "
+            f"Direction: {direction}")
+    if sensor_data:
+        line += " | Sensors: "
+        for sensor_name, distance in sensor_data.items():
+            if distance is not None:
+                line += f"{sensor_name}={distance:.4f}m "
+            else:
+                line += f"{sensor_name}=no-detect "
+    return line
 
 def main():
+    args = parse_args()
+
     # Connect to CoppeliaSim
     print("Connecting to CoppeliaSim...")
     try:
-        client = RemoteAPIClient()
+        client = connect()
         client.setStepping(True)
     except Exception as e:
         print(f"Error connecting to CoppeliaSim: {e}")
         print("Make sure CoppeliaSim is running with ZMQ Remote API enabled.")
         return
 
-    sim = client.getObject('sim')
+    sim = instrument(get_api(client))
     
     try:
         # Find the robot
@@ -32,12 +82,19 @@ def main():
         
         # Find all sensors
         print("\nFinding sensors...")
-        sensors = find_all_sensors(sim)
+        proximity, vision = discover_sensors(sim, robot_handle)
+        reader = BulkSensorReader(sim, proximity, vision)
         
-        print(f"Found {len(sensors)} sensors:")
-        for sensor_name, sensor_handle in sensors.items():
-            print(f"  - {sensor_name} (Handle: {sensor_handle})")
+        print(f"Found {len(reader.names)} sensors:")
+        for sensor_name, sensor_handle in proximity.items():
+            print(f"  - {sensor_name} (Handle: {sensor_handle}, proximity)")
+        for sensor_name, sensor_handle in vision.items():
+            print(f"  - {sensor_name} (Handle: {sensor_handle}, vision)")
         
+        if args.log:
+            monitor_to_log(sim, robot_handle, reader, args.log, args.print_interval, args.drop_when_full)
+            return
+
         # Continuous monitoring loop
         print("\n=== Starting Sensor Monitoring (Press Ctrl+C to stop) ===\n")
         
@@ -53,23 +110,9 @@ def main():
                 # Convert orientation to direction (+X, -X, +Y, -Y)
                 direction = get_direction_from_orientation(orient)
                 
-                # Print robot coordinates
-                print(f"Frame {frame:04d} | Position: X={pos[0]:7.4f} Y={pos[1]:7.4f} Z={pos[2]:7.4f} | "
-                      f"Direction: {direction}", end="")
-                
-                # Read and display sensor values
-                sensor_data = read_all_sensors(sim, sensors)
-                
-                if sensor_data:
-                    sensor_str = " | Sensors: "
-                    for sensor_name, distance in sensor_data.items():
-                        if distance is not None:
-                            sensor_str += f"{sensor_name}={distance:.4f}m "
-                        else:
-                            sensor_str += f"{sensor_name}=no-detect "
-                    print(sensor_str, end="")
-                
-                print()  # Newline
+                # Read sensor values and print them with the robot coordinates
+                sensor_data = reader.read()
+                print(format_frame(frame, pos, direction, sensor_data))
                 
                 frame += 1
                 time.sleep(0.05)  # ~20 Hz update rate
@@ -82,6 +125,40 @@ def main():
         print("Disconnected from CoppeliaSim.")
 
 
+def monitor_to_log(sim, robot_handle, reader, path, print_interval=1.0, drop_when_full=False):
+    """Record every simulation step to a telemetry log, printing one line per print_interval"""
+    # Imported here so monitoring without --log doesn't need NumPy
+    from .telemetry import TelemetryLogger
+
+    print(f"\n=== Logging every step to {path} (Press Ctrl+C to stop) ===\n")
+
+    frame = 0
+    next_print = time.monotonic()
+    with TelemetryLogger(path, reader.names, drop_when_full=drop_when_full) as log:
+        try:
+            while True:
+                sim.step()
+                sim_time = sim.getSimulationTime()
+                pos = sim.getObjectPosition(robot_handle, -1)
+                orient = sim.getObjectOrientation(robot_handle, -1)
+                sensor_data = reader.read()
+                log.log(sim_time, frame, pos, orient, sensor_data)
+
+                now = time.monotonic()
+                if now >= next_print:
+                    direction = get_direction_from_orientation(orient)
+                    print(f"t={sim_time:8.3f}s " + format_frame(frame, pos, direction, sensor_data))
+                    next_print = now + print_interval
+                frame += 1
+
+        except KeyboardInterrupt:
+            print("\n\nMonitoring stopped by user.")
+
+    print(f"Logged {log.records_written} frames to {path}")
+    if log.buffer.dropped:
+        print(f"Warning: {log.buffer.dropped} frames dropped (writer could not keep up)")
+
+
 def find_robot(sim):
     """Find the robot in the scene"""
     try:
@@ -91,18 +168,129 @@ def find_robot(sim):
         return -1
 
 
-def find_all_sensors(sim):
-    """Find all proximity and vision sensors in the scene"""
+def find_all_sensors(sim, robot_handle=None):
+    """Find all proximity and vision sensors of the robot (falls back to the front sensor)"""
     sensors = {}
     try:
-        sensor_handle = sim.getObject('./SensingNose')
-        if sensor_handle != -1:
-            sensors['SensingNose'] = sensor_handle
+        if robot_handle is None:
+            robot_handle = find_robot(sim)
+        if robot_handle != -1:
+            proximity, vision = discover_sensors(sim, robot_handle)
+            sensors.update(proximity)
+            sensors.update(vision)
+        if not sensors:
+            sensor_handle = sim.getObject('./SensingNose')
+            if sensor_handle != -1:
+                sensors['SensingNose'] = sensor_handle
     except Exception as e:
         print(f"Error finding sensors: {e}")
     return sensors
 
 
+def load_sensor_cache(cache_path):
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def sensor_names(sim, handles):
+    """
+    Unique name for each handle: the alias, or the full object path where
+    several sensors share an alias (plus the handle if the paths match too).
+    """
+    aliases = {h: sim.getObjectAlias(h) for h in handles}
+    names = {}
+    for h in handles:
+        name = aliases[h]
+        if list(aliases.values()).count(name) > 1:
+            name = sim.getObjectAlias(h, 2)  # options=2: full path, e.g. /BubbleRobot/LeftSensor/Sensor
+        names[h] = name
+    for h in handles:
+        if list(names.values()).count(names[h]) > 1:
+            names[h] = f"{names[h]}#{h}"
+    return names
+
+
+def discover_sensors(sim, robot_handle, cache_path=SENSOR_CACHE_FILE):
+    """
+    Find every proximity and vision sensor in the robot's object tree.
+
+    Handles come from one getObjectsInTree call per sensor type on every run,
+    which also notices sensors added or removed since the last one. The cache
+    only saves the alias lookups: names are fetched again when the handles
+    differ from the cached run.
+
+    Returns:
+        (proximity, vision): dicts of sensor name (see sensor_names) -> handle
+    """
+    proximity_handles = sorted(sim.getObjectsInTree(robot_handle, sim.object_proximitysensor_type, 0))
+    vision_handles = sorted(sim.getObjectsInTree(robot_handle, sim.object_visionsensor_type, 0))
+
+    cache = load_sensor_cache(cache_path) if cache_path else None
+    if (cache and cache.get('robot') == robot_handle
+            and sorted(cache['proximity'].values()) == proximity_handles
+            and sorted(cache['vision'].values()) == vision_handles):
+        return cache['proximity'], cache['vision']
+
+    names = sensor_names(sim, proximity_handles + vision_handles)
+    proximity = {names[h]: h for h in proximity_handles}
+    vision = {names[h]: h for h in vision_handles}
+
+    if cache_path:
+        try:
+            with open(cache_path, 'w') as f:
+                json.dump({'robot': robot_handle, 'proximity': proximity, 'vision': vision}, f)
+        except OSError as e:
+            print(f"Could not write sensor cache: {e}")
+    return proximity, vision
+
+
+class BulkSensorReader:
+    """
+    Read all proximity and vision sensors with one remote call per frame.
+
+    The Lua reader is built once from the sensor handles and evaluated with
+    sim.executeScriptString. If that is unavailable the sensors are read one by one.
+    """
+
+    def __init__(self, sim, proximity, vision=None):
+        self.sim = sim
+        self.proximity = dict(proximity)
+        self.vision = dict(vision or {})
+        self.names = list(self.proximity) + list(self.vision)
+        self.bulk = True
+        self.code = BULK_READ_LUA % (
+            ', '.join(str(h) for h in self.proximity.values()),
+            ', '.join(str(h) for h in self.vision.values()))
+
+    def read(self):
+        """Returns dict of sensor name -> distance / intensity (None for no reading)"""
+        if self.bulk:
+            try:
+                values = self.sim.executeScriptString(self.code, self.sim.handle_sandboxscript)
+                # Older API versions return (result, value)
+                if isinstance(values, tuple):
+                    values = values[-1]
+                return {name: (None if value < 0 else value)
+                        for name, value in zip(self.names, values)}
+            except Exception as e:
+                print(f"Bulk sensor read unavailable, reading sensors individually: {e}")
+                self.bulk = False
+        return self.read_individually()
+
+    def read_individually(self):
+        sensor_data = read_all_sensors(self.sim, self.proximity)
+        for sensor_name, sensor_handle in self.vision.items():
+            try:
+                result, data = self.sim.readVisionSensor(sensor_handle)
+                sensor_data[sensor_name] = data[10] if result >= 0 and data else None
+            except Exception:
+                sensor_data[sensor_name] = None
+        return sensor_data
+
+
 def read_all_sensors(sim, sensors):
     """Read values from all sensors"""
     sensor_data = {}
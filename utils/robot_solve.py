@@ -1,10 +1,13 @@
-from coppeliasim_zmqremoteapi_client import RemoteAPIClient
+import argparse
+import random
 import time
 import math
-from rich.table import Table
-from rich.console import Console
-from collections import deque
 from enum import Enum
+from .maze_generator_coppeliasim import MazeGenerator, MAZE_FILE
+from .sim_profiler import instrument
+from .connection import connect, get_api
+from .planner import WallGrid, DStarLite, astar, jump_point_search, manhattan, path_directions
+from .scan_checkpoint import CHECKPOINT_FILE, ScanCheckpointer, load_checkpoint
 
 class Direction(Enum):
     UP = 0      # +Y
@@ -12,17 +15,156 @@ class Direction(Enum):
     DOWN = 2    # -Y
     LEFT = 3    # -X
 
+# Cell offset (dy, dx) for one step in each direction
+DIRECTION_OFFSETS = {
+    Direction.UP: (1, 0),
+    Direction.RIGHT: (0, 1),
+    Direction.DOWN: (-1, 0),
+    Direction.LEFT: (0, -1)
+}
+
+# Robot yaw that points the front sensor in each direction
+SCAN_YAWS = {
+    Direction.UP: math.pi/2,
+    Direction.RIGHT: 0,
+    Direction.DOWN: -math.pi/2,
+    Direction.LEFT: math.pi
+}
+
+# Generator wall name for each direction.
+# MazeGenerator uses the same (x, y) world layout, but its north is -Y, i.e. DOWN here.
+GENERATOR_WALLS = {
+    Direction.UP: 'south',
+    Direction.RIGHT: 'east',
+    Direction.DOWN: 'north',
+    Direction.LEFT: 'west'
+}
+
+def opposite_direction(direction: Direction) -> Direction:
+    """Direction pointing back across the same wall"""
+    return Direction((direction.value + 2) % 4)
+
+class WallKnowledge:
+    """
+    Tracks which walls of a map_grid are already known.
+
+    Every wall is shared by two cells, so recording a wall updates both sides
+    of the edge. The outer boundary of the grid starts out known as walls,
+    which means only interior edges ever need a sensor probe. The entrance and
+    exit openings are recorded as walls too: fine for planning, since the robot
+    never leaves the grid.
+
+    Listeners are called as listener((y, x), direction_index, was_blocked)
+    whenever an edge turns from open-or-unknown into a known wall or back.
+    """
+
+    def __init__(self, map_grid):
+        self.map_grid = map_grid
+        self.grid_size = len(map_grid)
+        self.known = [[[False, False, False, False] for _ in range(self.grid_size)]
+                      for _ in range(self.grid_size)]
+        self.listeners = []
+
+        last = self.grid_size - 1
+        for i in range(self.grid_size):
+            self.record(last, i, Direction.UP, True)
+            self.record(i, last, Direction.RIGHT, True)
+            self.record(0, i, Direction.DOWN, True)
+            self.record(i, 0, Direction.LEFT, True)
+
+    def neighbor(self, y, x, direction: Direction):
+        """Cell across the wall in the given direction, or None at the boundary"""
+        dy, dx = DIRECTION_OFFSETS[direction]
+        ny, nx = y + dy, x + dx
+        if 0 <= nx < self.grid_size and 0 <= ny < self.grid_size:
+            return ny, nx
+        return None
+
+    def is_known(self, y, x, direction: Direction) -> bool:
+        return self.known[y][x][direction.value]
+
+    def has_wall(self, y, x, direction: Direction) -> bool:
+        return self.map_grid[y][x][direction.value]
+
+    def record(self, y, x, direction: Direction, wall: bool):
+        """Store a wall observation on both sides of the shared edge"""
+        was_blocked = self.known[y][x][direction.value] and self.map_grid[y][x][direction.value]
+        self.map_grid[y][x][direction.value] = wall
+        self.known[y][x][direction.value] = True
+
+        other = self.neighbor(y, x, direction)
+        if other is not None:
+            ny, nx = other
+            back = opposite_direction(direction).value
+            self.map_grid[ny][nx][back] = wall
+            self.known[ny][nx][back] = True
+
+        if was_blocked != wall:
+            for listener in self.listeners:
+                listener((y, x), direction.value, was_blocked)
+
+    def unknown_directions(self, y, x) -> list:
+        """Directions of cell (y, x) whose wall still has to be probed"""
+        return [d for d in Direction if not self.known[y][x][d.value]]
+
+    def is_complete(self) -> bool:
+        return all(all(all(cell) for cell in row) for row in self.known)
+
+    def planning_grid(self, optimistic=True):
+        """
+        Planner view of the map (see planner.WallGrid).
+        Unknown walls count as open when optimistic, as walls otherwise.
+        """
+        def blocked(y, x, d):
+            if not self.known[y][x][d]:
+                return not optimistic
+            return self.map_grid[y][x][d]
+        return WallGrid(self.grid_size, self.grid_size, blocked)
+
 class RobotNavigator:
     """Manages robot movement with wall collision detection"""
     
-    def __init__(self, sim, robot_handle, map_grid, sensor_handle, cell_size=2.0):
+    def __init__(self, sim, robot_handle, map_grid, sensor_handle, cell_size=2.0, knowledge=None):
+        """
+        Args:
+            cell_size: cell edge in meters; must match the maze in the scene
+                       (MazeGenerator.cell_size, saved with the layout)
+        """
         self.sim = sim
         self.robot_handle = robot_handle
         self.map_grid = map_grid
         self.sensor_handle = sensor_handle
         self.cell_size = cell_size
+        self.wall_threshold = 0.55 * cell_size  # sensor distance that counts as a wall (1.1m for 2m cells)
         self.grid_size = len(map_grid)
         self.current_pos = (0, 0)  # (y, x)
+        self.knowledge = knowledge if knowledge is not None else WallKnowledge(map_grid)
+        self.probe_count = 0
+        self.motion_count = 0
+        self.cells_scanned = 0  # counted by scan_maze, also when it is interrupted
+        self.heading = None  # direction the robot was last turned to face, None if unknown
+        self.planner = None  # D* Lite search kept between navigate_to calls with the same target
+        self.plan_stale = False  # set when a wall changes under the route being driven
+        self.knowledge.listeners.append(self._wall_changed)
+
+    def cell_center(self, y, x):
+        """World position [x, y, z] of the robot standing in the middle of cell (y, x)"""
+        return [(x + 0.5) * self.cell_size, (y + 0.5) * self.cell_size, 0.138]
+
+    def detach(self):
+        """
+        Stop listening to the wall knowledge, e.g. before another navigator takes
+        over the same WallKnowledge. The planner gets its wall changes through
+        this navigator, so replacing it needs no listener of its own.
+        """
+        if self._wall_changed in self.knowledge.listeners:
+            self.knowledge.listeners.remove(self._wall_changed)
+        self.planner = None
+
+    def _wall_changed(self, cell, direction, was_blocked):
+        self.plan_stale = True
+        if self.planner is not None:
+            self.planner.edge_changed(cell, direction, was_blocked)
     
     def read_sensor_in_direction(self, direction: Direction) -> bool:
         """Read sensor in specified direction and return True if wall detected"""
@@ -43,13 +185,28 @@ class RobotNavigator:
         
         # Read sensor
         distance = read_proximity_sensor(self.sim, self.sensor_handle)
-        wall_detected = is_wall_detected(distance)
+        wall_detected = is_wall_detected(distance, self.wall_threshold)
+        self.probe_count += 1
         
         # Restore orientation
         self.sim.setObjectOrientation(self.robot_handle, -1, current_orient)
         self.sim.step()
+        self.heading = None
         
         return wall_detected
+
+    def is_blocked(self, direction: Direction) -> bool:
+        """
+        Check for a wall next to the current cell.
+        Known walls are answered from the map; unknown ones are probed once and recorded.
+        """
+        y, x = self.current_pos
+        if self.knowledge.is_known(y, x, direction):
+            return self.knowledge.has_wall(y, x, direction)
+
+        wall = self.read_sensor_in_direction(direction)
+        self.knowledge.record(y, x, direction, wall)
+        return wall
         
     def move(self, direction: Direction) -> bool:
         """
@@ -74,20 +231,67 @@ class RobotNavigator:
         if not (0 <= new_x < self.grid_size and 0 <= new_y < self.grid_size):
             raise ValueError(f"Movement would go out of bounds to ({new_y},{new_x})")
         
-        # Use sensor to check for wall in movement direction
-        if self.read_sensor_in_direction(direction):
+        # Use map knowledge or sensor to check for wall in movement direction
+        if self.is_blocked(direction):
             return False  # Wall detected, cannot move
         
         # Move robot
-        cell_x = new_x * self.cell_size + 1
-        cell_y = new_y * self.cell_size + 1
-        self.sim.setObjectPosition(self.robot_handle, -1, [cell_x, cell_y, 0.138])
+        self.sim.setObjectPosition(self.robot_handle, -1, self.cell_center(new_y, new_x))
         self.sim.step()
         time.sleep(0.1)
         
         self.current_pos = (new_y, new_x)
+        self.motion_count += 1
         return True
     
+    def move_run(self, direction: Direction, cells: int) -> int:
+        """
+        Move up to `cells` cells straight in one direction with a single motion command.
+        Walls already known are not probed; only the first unknown wall in front of the
+        robot is checked with the sensor. The run stops before the next unknown wall,
+        so callers continue from there.
+        Returns the number of cells moved (0 if a wall blocks the first step).
+        """
+        y, x = self.current_pos
+        if self.knowledge.neighbor(y, x, direction) is None:
+            raise ValueError(f"Movement would go out of bounds from ({y},{x}) going {direction.name}")
+        if self.is_blocked(direction):
+            return 0
+
+        # Extend the run over walls known to be open
+        dy, dx = DIRECTION_OFFSETS[direction]
+        moved = 1
+        end_y, end_x = y + dy, x + dx
+        while (moved < cells and self.knowledge.is_known(end_y, end_x, direction)
+               and not self.knowledge.has_wall(end_y, end_x, direction)):
+            end_y, end_x = end_y + dy, end_x + dx
+            moved += 1
+
+        # Turn to face the run (if needed) and jump to its end in one step
+        if self.heading != direction:
+            self.sim.setObjectOrientation(self.robot_handle, -1, [0, 0, SCAN_YAWS[direction]])
+            self.heading = direction
+        self.sim.setObjectPosition(self.robot_handle, -1, self.cell_center(end_y, end_x))
+        self.sim.step()
+        time.sleep(0.1)
+
+        self.current_pos = (end_y, end_x)
+        self.motion_count += 1
+        return moved
+
+    def execute_route(self, route) -> bool:
+        """
+        Drive a list of Directions as straight runs (see compress_route).
+        Returns False if an unexpected wall blocks the route.
+        """
+        for direction, cells in compress_route(route):
+            while cells > 0:
+                moved = self.move_run(direction, cells)
+                if moved == 0:
+                    return False
+                cells -= moved
+        return True
+
     def get_position(self):
         """Get current cell position (y, x)"""
         return self.current_pos
@@ -106,82 +310,68 @@ class RobotNavigator:
         if not (0 <= x < self.grid_size and 0 <= y < self.grid_size):
             raise ValueError(f"Position ({y},{x}) out of bounds")
         
-        cell_x = x * self.cell_size + 1
-        cell_y = y * self.cell_size + 1
-        self.sim.setObjectPosition(self.robot_handle, -1, [cell_x, cell_y, 0.138])
+        self.sim.setObjectPosition(self.robot_handle, -1, self.cell_center(y, x))
         self.sim.setObjectOrientation(self.robot_handle, -1, [0, 0, 0])
         self.sim.step()
         time.sleep(0.1)
         self.current_pos = (y, x)
+        self.heading = Direction.RIGHT
 
     def navigate_to(self, target_y, target_x):
         """
-        Navigate to target cell using BFS pathfinding.
-        Returns True if navigation successful, False if path blocked or target unreachable.
+        Navigate to target cell using D* Lite, treating unknown walls as open.
+        Walls are only probed when the robot is about to cross them; a newly found
+        wall repairs the current plan instead of searching from scratch.
+        Returns True if navigation successful, False if target unreachable.
         """
         start_y, start_x = self.current_pos
+        target = (target_y, target_x)
         
         # Check if already at target
-        if (start_y, start_x) == (target_y, target_x):
+        if self.current_pos == target:
             return True
         
         # Check if target is within bounds
         if not (0 <= target_x < self.grid_size and 0 <= target_y < self.grid_size):
             raise ValueError(f"Target ({target_y},{target_x}) out of bounds")
+
+        # Neighboring targets (most DFS scan steps) need no search unless a wall is in the way
+        for direction in Direction:
+            if self.knowledge.neighbor(start_y, start_x, direction) == target:
+                if self.move_run(direction, 1):
+                    return True
+                break
+
+        if self.planner is None or self.planner.goal != target:
+            self.planner = DStarLite(self.knowledge.planning_grid(), self.current_pos, target)
         
-        # BFS to find shortest path
-        queue = deque([(start_y, start_x, [])])
-        visited = {(start_y, start_x)}
-        
-        while queue:
-            current_y, current_x, path = queue.popleft()
+        route = None
+        while self.current_pos != target:
+            if route is None or self.plan_stale:
+                self.planner.move_start(self.current_pos)
+                path = self.planner.path()
+                if not path:
+                    print(f"No path found from ({start_y},{start_x}) to ({target_y},{target_x})")
+                    return False
+                route = [Direction(d) for d in path_directions(path)]
+                self.plan_stale = False
             
-            # Check all four directions
-            for direction in Direction:
-                if direction == Direction.UP:
-                    next_y, next_x = current_y + 1, current_x
-                elif direction == Direction.RIGHT:
-                    next_y, next_x = current_y, current_x + 1
-                elif direction == Direction.DOWN:
-                    next_y, next_x = current_y - 1, current_x
-                elif direction == Direction.LEFT:
-                    next_y, next_x = current_y, current_x - 1
-                
-                # Check bounds
-                if not (0 <= next_x < self.grid_size and 0 <= next_y < self.grid_size):
-                    continue
-                    
-                # Skip if already visited
-                if (next_y, next_x) in visited:
-                    continue
-                
-                # Temporarily move to current cell to check if path is clear
-                original_pos = self.current_pos
-                self.set_position(current_y, current_x)
-                
-                # Check if we can move in this direction using sensors
-                can_move = not self.read_sensor_in_direction(direction)
-                
-                # Restore original position
-                self.set_position(original_pos[0], original_pos[1])
-                
-                if can_move:
-                    new_path = path + [direction]
-                    
-                    # Check if we reached the target
-                    if (next_y, next_x) == (target_y, target_x):
-                        # Execute the path
-                        for move_direction in new_path:
-                            if not self.move(move_direction):
-                                print(f"Path blocked during execution at {self.current_pos}")
-                                return False
-                        return True
-                    
-                    visited.add((next_y, next_x))
-                    queue.append((next_y, next_x, new_path))
-        
-        print(f"No path found from ({start_y},{start_x}) to ({target_y},{target_x})")
-        return False
+            # Drive the next straight run; a wall found on the way marks the plan stale
+            direction, cells = compress_route(route)[0]
+            moved = self.move_run(direction, cells)
+            route = route[moved:]
+        return True
+
+    def scan_current_cell(self):
+        """Probe every wall of the current cell that is not known yet"""
+        y, x = self.current_pos
+        for direction in self.knowledge.unknown_directions(y, x):
+            self.sim.setObjectOrientation(self.robot_handle, -1, [0, 0, SCAN_YAWS[direction]])
+            self.heading = direction
+            self.sim.step()
+            dist = read_proximity_sensor(self.sim, self.sensor_handle)
+            self.knowledge.record(y, x, direction, is_wall_detected(dist, self.wall_threshold))
+            self.probe_count += 1
 
 def navigate_to_global(navigator, x, y):
     """Global navigate_to function for backward compatibility"""
@@ -213,7 +403,161 @@ def is_wall_detected(distance, threshold=1.1):
     """Check if wall is detected within threshold distance"""
     return distance is not None and distance <= threshold
 
+def scan_maze(navigator, visited, stack, on_cell_scanned=None):
+    """
+    Depth-first scan of every cell reachable from the cells on the stack.
+
+    visited and stack are updated in place so an interrupted scan can be inspected
+    or checkpointed; on_cell_scanned(y, x) runs once the cell's neighbors are queued.
+    Walls already known from neighboring cells or the boundary are not probed again.
+    A cell the robot cannot reach is dropped from the stack and from visited.
+    Returns the number of cells scanned (also added to navigator.cells_scanned).
+    """
+    knowledge = navigator.knowledge
+    cells_scanned = 0
+    while stack:
+        # The cell stays on the stack until it is scanned, so an interrupted scan resumes with it
+        y, x = stack[-1]
+
+        # Move robot to cell for scanning
+        if not navigator.navigate_to(y, x):
+            # Walls found on the way cut it off; a neighbor scanned later may queue it again
+            stack.pop()
+            visited.discard((y, x))
+            print(f"  Skipped cell ({y},{x}): not reachable from {navigator.current_pos}")
+            continue
+        navigator.scan_current_cell()
+        stack.pop()
+        cells_scanned += 1
+        navigator.cells_scanned += 1
+
+        # Add accessible neighbors to stack
+        for direction in Direction:
+            if knowledge.has_wall(y, x, direction):
+                continue
+            neighbor = knowledge.neighbor(y, x, direction)
+            if neighbor is not None and neighbor not in visited:
+                visited.add(neighbor)
+                stack.append(neighbor)
+                print(f"  Added cell ({neighbor[0]},{neighbor[1]}) to scan stack")
+        if on_cell_scanned:
+            on_cell_scanned(y, x)
+    return cells_scanned
+
+def explore_to_goal(navigator, goal, start=(0, 0), on_cell_scanned=None):
+    """
+    Map only as much of the maze as needed to prove the shortest route from start to goal.
+
+    With unknown walls counted as open, the shortest start-goal path is a lower
+    bound on the real route (kept up to date by a D* Lite search as walls are
+    found). The robot scans the cell at the unknown wall on that path closest to
+    it, until a route over known open walls is as short as the bound: then no
+    unexplored part of the maze can lead to a shorter one.
+
+    Returns:
+        the certified route as a list of Directions, or None if goal is unreachable
+    """
+    knowledge = navigator.knowledge
+    bound = DStarLite(knowledge.planning_grid(), start, goal)
+    knowledge.listeners.append(bound.edge_changed)
+    try:
+        while True:
+            path = bound.path()
+            if not path:
+                return None
+            directions = path_directions(path)
+            unknown = [(cell, d) for cell, d in zip(path, directions)
+                       if not knowledge.is_known(cell[0], cell[1], Direction(d))]
+            if not unknown:
+                return [Direction(d) for d in directions]
+            # Another route of the same length may already be fully known
+            route = find_route(knowledge, start, goal)
+            if route is not None and len(route) == len(directions):
+                return route
+
+            # Go to whichever side of the nearest unknown wall is closer and scan that cell
+            robot = navigator.current_pos
+            sides = [side for cell, d in unknown
+                     for side in (cell, knowledge.neighbor(cell[0], cell[1], Direction(d)))]
+            target = min(sides, key=lambda side: manhattan(robot, side))
+            if navigator.navigate_to(*target):
+                navigator.scan_current_cell()
+                if on_cell_scanned:
+                    on_cell_scanned(*target)
+    finally:
+        knowledge.listeners.remove(bound.edge_changed)
+
+def load_ground_truth(maze, knowledge):
+    """
+    Record every interior wall of a MazeGenerator maze in knowledge.
+    Generator cell (x, y) is cell (y, x) here. The entrance and exit openings are
+    left as boundary walls since the robot never leaves the grid.
+    """
+    if maze.width != knowledge.grid_size or maze.height != knowledge.grid_size:
+        raise ValueError(f"Maze is {maze.width}x{maze.height}, map grid is "
+                         f"{knowledge.grid_size}x{knowledge.grid_size}")
+
+    for y in range(maze.height):
+        for x in range(maze.width):
+            walls = maze.cells[y][x]['walls']
+            for direction in (Direction.UP, Direction.RIGHT):
+                if knowledge.neighbor(y, x, direction) is not None:
+                    knowledge.record(y, x, direction, walls[GENERATOR_WALLS[direction]])
+
+def validate_ground_truth(navigator, maze, samples=4):
+    """
+    Probe a few randomly chosen interior walls with the sensor and compare them to the map.
+    Cells holding obstacles are skipped. Returns a list of (y, x, direction) mismatches.
+    """
+    knowledge = navigator.knowledge
+    edges = []
+    for y in range(navigator.grid_size):
+        for x in range(navigator.grid_size):
+            if (x, y) in maze.obstacles:
+                continue
+            for direction in Direction:
+                if knowledge.neighbor(y, x, direction) is not None:
+                    edges.append((y, x, direction))
+
+    mismatches = []
+    for y, x, direction in random.sample(edges, min(samples, len(edges))):
+        navigator.set_position(y, x)
+        if navigator.read_sensor_in_direction(direction) != knowledge.has_wall(y, x, direction):
+            mismatches.append((y, x, direction))
+    return mismatches
+
+def compress_route(route):
+    """
+    Collapse a list of Directions into straight runs.
+    Example: [UP, UP, RIGHT, UP] -> [(UP, 2), (RIGHT, 1), (UP, 1)]
+    """
+    runs = []
+    for direction in route:
+        if runs and runs[-1][0] == direction:
+            runs[-1] = (direction, runs[-1][1] + 1)
+        else:
+            runs.append((direction, 1))
+    return runs
+
+def find_route(knowledge, start, goal, jump=False):
+    """
+    Shortest route over known open walls using A* (jump point search if jump is set,
+    which is faster on open scenes with few walls).
+    Returns the list of Directions from start to goal, or None if goal is unreachable.
+    """
+    grid = knowledge.planning_grid(optimistic=False)
+    if jump:
+        path = jump_point_search(grid, start, goal)
+    else:
+        path = astar(start, goal, grid.neighbors)
+    if not path:
+        return None
+    return [Direction(d) for d in path_directions(path)]
+
 def display_map(map_grid, current_pos=None):
+    from rich.table import Table
+    from rich.console import Console
+
     console = Console()
     table = Table(show_header=True, header_style="bold magenta")
     table.add_column("Y/X", justify="center")
@@ -236,16 +580,166 @@ def display_map(map_grid, current_pos=None):
         table.add_row(*row)
     console.print(table)
 
+def render_map(knowledge, path, current_pos=None):
+    """Write the scan map as an image (.png or .ppm): unknown walls gray, frontier cells shaded"""
+    # Imported here so the scanner runs without NumPy unless an image is asked for
+    from .maze_render import frontier_cells, map_grid_arrays, render, write_image
+
+    walls, unknown = map_grid_arrays(knowledge.map_grid, knowledge.known)
+    image = render(walls, unknown, robot=[current_pos] if current_pos else None,
+                   frontier=frontier_cells(unknown))
+    write_image(path, image)
+    print(f"✓ Map image written to {path}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scan the maze with the robot's front sensor")
+    # The map comes either from a saved layout or from a checkpointed scan, not both
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--ground-truth', nargs='?', const=MAZE_FILE, metavar='LAYOUT',
+                        help="load the layout saved by maze_generator_coppeliasim.py instead of "
+                             f"scanning (default file: {MAZE_FILE}); the map grid is square, "
+                             "so the layout must be too")
+    parser.add_argument('--validate-probes', type=int, default=4, metavar='N',
+                        help="sensor probes used to check the loaded layout (default: 4)")
+    parser.add_argument('--drive', action='store_true',
+                        help="with --ground-truth, drive the route with the wheel motors "
+                             "instead of teleporting the robot")
+    parser.add_argument('--checkpoint', nargs='?', const=CHECKPOINT_FILE, metavar='PATH',
+                        help=f"save the scan state periodically (default file: {CHECKPOINT_FILE})")
+    parser.add_argument('--checkpoint-interval', type=float, default=10.0, metavar='SEC',
+                        help="minimum seconds between checkpoints (default: 10)")
+    source.add_argument('--resume', nargs='?', const=CHECKPOINT_FILE, metavar='PATH',
+                        help="continue the scan saved in a checkpoint, without probing known walls "
+                             f"again (default file: {CHECKPOINT_FILE}); keeps checkpointing to it")
+    parser.add_argument('--explore', action='store_true',
+                        help="only explore until the shortest route to --target is proven, "
+                             "instead of scanning the whole maze")
+    parser.add_argument('--target', type=int, nargs=2, metavar=('Y', 'X'),
+                        help="target cell for --explore (default: the exit, the far corner)")
+    parser.add_argument('--compare', action='store_true',
+                        help="with --explore, also run a full scan and compare the cost")
+    parser.add_argument('--render', metavar='PATH',
+                        help="write the final (or partial) map as an image, .png or .ppm")
+    args = parser.parse_args()
+    if args.drive and not args.ground_truth:
+        parser.error("--drive requires --ground-truth")
+    if args.compare and not args.explore:
+        parser.error("--compare requires --explore")
+    # Exploration neither resumes nor writes scan checkpoints
+    if args.explore and (args.resume or args.checkpoint):
+        parser.error("--explore cannot be combined with --resume or --checkpoint")
+    return args
+
+def run_explore(navigator, goal, compare=False, render_path=None):
+    """Goal-directed exploration from (0, 0), optionally compared with a full scan of a fresh map"""
+    navigator.set_position(0, 0)
+    start = time.perf_counter()
+    route = explore_to_goal(navigator, goal,
+                            on_cell_scanned=lambda y, x: print(f"Scanned cell ({y},{x})"))
+    elapsed = time.perf_counter() - start
+    known = sum(all(cell) for row in navigator.knowledge.known for cell in row)
+    if route is None:
+        print(f"✗ No route from (0,0) to {goal}")
+    else:
+        print(f"\n✓ Shortest route to {goal} proven: {len(route)} moves")
+        print("  " + " ".join(f"{d.name[0]}{n}" for d, n in compress_route(route)))
+    display_map(navigator.map_grid, navigator.current_pos)
+    if render_path:
+        render_map(navigator.knowledge, render_path, navigator.current_pos)
+    results = [('explore', navigator.probe_count, navigator.motion_count, elapsed, known)]
+
+    if compare:
+        print("\nRunning a full scan for comparison...")
+        grid_size = navigator.grid_size
+        map_grid = [[[False, False, False, False] for _ in range(grid_size)] for _ in range(grid_size)]
+        full = RobotNavigator(navigator.sim, navigator.robot_handle, map_grid,
+                              navigator.sensor_handle, navigator.cell_size)
+        full.set_position(0, 0)
+        start = time.perf_counter()
+        scan_maze(full, {(0, 0)}, [(0, 0)])
+        elapsed = time.perf_counter() - start
+        known = sum(all(cell) for row in full.knowledge.known for cell in row)
+        results.append(('full scan', full.probe_count, full.motion_count, elapsed, known))
+
+    print(f"\n{'':10s} {'probes':>8s} {'moves':>8s} {'time':>9s} {'cells mapped':>13s}")
+    for name, probes, moves, seconds, cells in results:
+        print(f"{name:10s} {probes:8d} {moves:8d} {seconds:8.2f}s {cells:13d}")
+    return route
+
+def run_ground_truth(navigator, maze, samples, drive=False, render_path=None):
+    """
+    Build the map from a saved layout and drive the optimal route from the entrance to the exit.
+    With drive=True the route is driven continuously with the wheel motors.
+    Returns False if the sampled probes disagree with the layout.
+    Raises ValueError if the layout's cell size differs from the navigator's.
+    """
+    if maze.cell_size != navigator.cell_size:
+        raise ValueError(f"Layout has {maze.cell_size:g}m cells, navigator uses {navigator.cell_size:g}m cells")
+    load_ground_truth(maze, navigator.knowledge)
+    mismatches = validate_ground_truth(navigator, maze, samples)
+    if mismatches:
+        for y, x, direction in mismatches:
+            print(f"✗ Layout disagrees with sensor at cell ({y},{x}) facing {direction.name}")
+        return False
+    print(f"✓ Layout matches {samples} sampled sensor probes")
+
+    # Entrance is generator cell (0, 0), exit is the bottom-right cell (width-1, height-1)
+    goal = (maze.height - 1, maze.width - 1)
+    route = find_route(navigator.knowledge, (0, 0), goal)
+    if route is None:
+        print(f"✗ No route from (0,0) to {goal}")
+        return True
+    print(f"✓ Optimal route: {len(route)} moves")
+    display_map(navigator.map_grid)
+    if render_path:
+        render_map(navigator.knowledge, render_path)
+
+    runs = compress_route(route)
+    print(f"  {len(runs)} straight runs: " + " ".join(f"{d.name[0]}{n}" for d, n in runs))
+
+    navigator.set_position(0, 0)
+    if drive:
+        drive_route(navigator, route)
+    elif navigator.execute_route(route):
+        print(f"✓ Reached exit cell {goal}")
+    else:
+        print(f"✗ Route blocked at {navigator.current_pos}")
+    return True
+
+def drive_route(navigator, route):
+    """Drive a route with WheelMotionController and report the traversal throughput"""
+    # Imported here because motion_controller builds on this module
+    from .motion_controller import WheelMotionController, find_motors
+
+    sim = navigator.sim
+    if sim.getSimulationState() == sim.simulation_stopped:
+        sim.startSimulation()
+    left_motor, right_motor = find_motors(sim)
+    controller = WheelMotionController(sim, navigator.robot_handle, left_motor, right_motor,
+                                       navigator.cell_size)
+    yaw = sim.getObjectOrientation(navigator.robot_handle, -1)[2]
+    stats = controller.drive(route, start_yaw=yaw)
+
+    pos = sim.getObjectPosition(navigator.robot_handle, -1)
+    navigator.current_pos = (int(pos[1] // navigator.cell_size), int(pos[0] // navigator.cell_size))
+    navigator.heading = None
+    print(f"✓ Drove {stats['cells']} cells in {stats['sim_time']:.2f}s sim time "
+          f"({stats['cells_per_sim_second']:.3f} cells/s, {stats['steps']} steps, "
+          f"{stats['pose_polls']} pose polls, {stats['wall_time']:.2f}s wall time)")
+    print(f"  Final position: X={pos[0]:.3f} Y={pos[1]:.3f}, cell {navigator.current_pos}")
+
 def main():
+    args = parse_args()
+
     print("=" * 70)
     print("MAZE SCANNER - Robot Solve")
     print("=" * 70)
     print("\nConnecting to CoppeliaSim...")
     
     try:
-        client = RemoteAPIClient()
+        client = connect()
         client.setStepping(True)
-        sim = client.getObject('sim')
+        sim = instrument(get_api(client))
         print("✓ Connected to CoppeliaSim")
     except Exception as e:
         print(f"✗ Error connecting to CoppeliaSim: {e}")
@@ -267,80 +761,106 @@ def main():
         print(f"✗ Error getting sensor: {e}")
         return
 
-    # Initialize map grid
+    maze = None
     grid_size = 8
+    cell_size = 2.0
+    resumed = None
+    if args.resume:
+        try:
+            resumed = load_checkpoint(args.resume)
+            grid_size, cell_size = resumed.grid_size, resumed.cell_size
+            print(f"✓ Loaded checkpoint from {args.resume}: {len(resumed.visited) - len(resumed.stack)} "
+                  f"cells scanned, {len(resumed.stack)} queued")
+        except (OSError, ValueError) as e:
+            print(f"✗ Could not load checkpoint: {e}")
+            client.setStepping(False)
+            return
+    elif args.ground_truth:
+        try:
+            maze = MazeGenerator.load(args.ground_truth)
+            if maze.width != maze.height:
+                raise ValueError(f"layout is {maze.width}x{maze.height}, only square mazes can be mapped")
+            grid_size, cell_size = maze.width, maze.cell_size
+            print(f"✓ Loaded {maze.width}x{maze.height} layout with {cell_size:g}m cells "
+                  f"from {args.ground_truth}")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"✗ Could not load layout: {e}")
+            client.setStepping(False)
+            return
+
+    # Initialize map grid
     map_grid = [[[False, False, False, False] for _ in range(grid_size)] for _ in range(grid_size)]
-    directions = [
-        ("Up (+Y)",    0, math.pi/2),     # Index 0: Up wall - face +Y
-        ("Right (+X)", 1, 0),             # Index 1: Right wall - face +X  
-        ("Down (-Y)",  2, -math.pi/2),    # Index 2: Down wall - face -Y
-        ("Left (-X)",  3, math.pi)        # Index 3: Left wall - face -X
-    ]
 
     # Create navigator
-    navigator = RobotNavigator(sim, robot_handle, map_grid, front_sensor)
+    navigator = RobotNavigator(sim, robot_handle, map_grid, front_sensor, cell_size)
+
+    if maze is not None:
+        try:
+            if run_ground_truth(navigator, maze, args.validate_probes, args.drive, args.render):
+                client.setStepping(False)
+                return
+        except ValueError as e:
+            print(f"✗ {e}")
+            client.setStepping(False)
+            return
+        print("Falling back to a sensor scan...")
+        map_grid = [[[False, False, False, False] for _ in range(grid_size)] for _ in range(grid_size)]
+        navigator = RobotNavigator(sim, robot_handle, map_grid, front_sensor, cell_size)
+        navigator.set_position(0, 0)
     
-    # Assume robot starts at (1,1) as cell center, cell size 2m x 2m
-    cell_size = 2.0
-    start_cell = (0, 0)  # cell (0,0)
-    visited = set([start_cell])
-    stack = [start_cell]
-    cells_scanned = 0
+    if args.explore:
+        goal = tuple(args.target) if args.target else (grid_size - 1, grid_size - 1)
+        try:
+            run_explore(navigator, goal, args.compare, args.render)
+        except (ValueError, KeyboardInterrupt) as e:
+            print(f"\n✗ Exploration stopped: {e or 'interrupted by user'}")
+        finally:
+            client.setStepping(False)
+        return
+
+    checkpointer = None
+    if resumed is not None:
+        resumed.restore(navigator.knowledge)
+        visited, stack = resumed.visited, resumed.stack
+        navigator.probe_count, navigator.motion_count = resumed.probes, resumed.moves
+        # The simulator may have been restarted, so put the robot back explicitly
+        navigator.set_position(*resumed.position)
+    else:
+        # Assume robot starts at (1,1) as cell center, cell size 2m x 2m
+        start_cell = (0, 0)  # cell (0,0)
+        visited = set([start_cell])
+        stack = [start_cell]
+    checkpoint_path = args.resume or args.checkpoint
+    if checkpoint_path:
+        checkpointer = ScanCheckpointer(checkpoint_path, args.checkpoint_interval,
+                                        resumed.elapsed if resumed is not None else 0.0)
+        print(f"✓ Checkpointing to {checkpoint_path} every {args.checkpoint_interval:g}s")
+
+    def show_progress(y, x):
+        print(f"Scanned cell ({y},{x})")
+        if checkpointer is not None:
+            checkpointer.maybe_save(navigator, visited, stack)
+        display_map(map_grid)
+        input()
 
     print("\nScanning maze...")
     try:
-        while stack:
-            current_cell = stack.pop()
-            y, x = current_cell
-            
-            # Move robot to cell for scanning
-            navigator.navigate_to(y, x)
-            
-            # Scan all 4 directions for walls
-            for dir_name, wall_idx, yaw in directions:
-                sim.setObjectOrientation(robot_handle, -1, [0, 0, yaw])
-                sim.step()
-                dist = read_proximity_sensor(sim, front_sensor)
-                wall = is_wall_detected(dist)
-                map_grid[y][x][wall_idx] = wall
-            
-            cells_scanned += 1
-            print(f"Scanned cell ({y},{x})")
-            display_map(map_grid)
-            input()
-
-            # Add accessible neighbors to stack
-            neighbor_moves = [
-                (Direction.UP, 0),      # wall_idx=0
-                (Direction.RIGHT, 1),   # wall_idx=1
-                (Direction.DOWN, 2),    # wall_idx=2
-                (Direction.LEFT, 3)     # wall_idx=3
-            ]
-            for direction, wall_idx in neighbor_moves:
-                if not map_grid[y][x][wall_idx]:  # no wall in this direction
-                    if direction == Direction.UP:
-                        ny, nx = y + 1, x
-                    elif direction == Direction.RIGHT:
-                        ny, nx = y, x + 1
-                    elif direction == Direction.DOWN:
-                        ny, nx = y - 1, x
-                    else:  # LEFT
-                        ny, nx = y, x - 1
-                    
-                    if 0 <= nx < grid_size and 0 <= ny < grid_size and (ny, nx) not in visited:
-                        visited.add((ny, nx))
-                        stack.append((ny, nx))
-                        print(f"  Added cell ({ny},{nx}) to scan stack")
-        
+        scan_maze(navigator, visited, stack, on_cell_scanned=show_progress)
         print("\n✓ Maze scan complete!")
+        print(f"Sensor probes: {navigator.probe_count}")
         display_map(map_grid)
     except KeyboardInterrupt:
         print("\n\n✗ Scan interrupted by user")
-        print(f"Partial results: {cells_scanned} cells scanned")
+        print(f"Partial results: {navigator.cells_scanned} cells scanned")
         display_map(map_grid)
     except Exception as e:
         print(f"\n✗ Unexpected error: {e}")
     finally:
+        if args.render:
+            render_map(navigator.knowledge, args.render, navigator.current_pos)
+        if checkpointer is not None:
+            checkpointer.close(navigator, visited, stack)
+            print(f"Checkpoint saved to {checkpoint_path} (resume with --resume {checkpoint_path})")
         client.setStepping(False)
         print("\nDisconnected from CoppeliaSim.")
 
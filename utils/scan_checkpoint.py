@@ -0,0 +1,204 @@
+"""
+Checkpoints of a running maze scan
+
+A snapshot holds the wall map (with which walls are known), the visited set,
+the scan stack, the robot cell, the cell size and the probe/move counters.
+Snapshots are packed in the scan loop, which costs one pass over the grid
+every few seconds, and a writer thread writes them to disk, so the scan never
+waits on file I/O.
+Files are replaced atomically: an interrupted write leaves the previous
+checkpoint in place.
+
+File layout (little-endian):
+    8 bytes   magic b'RBSCN02\\n'
+    34 bytes  grid size, robot y, robot x (uint16), stack length,
+              probes, moves (uint32), scan seconds so far, cell size in
+              meters (float64)
+    N*N bytes one per cell (row y, then x): bits 0-3 walls, bits 4-7 known,
+              in Direction order
+    N*N/8     visited bitmap, same cell order
+    4 per     stack entries as (y, x) uint16 pairs, bottom first
+"""
+
+import os
+import struct
+import threading
+import time
+
+MAGIC = b'RBSCN02\n'
+HEADER = struct.Struct('<3H3Idd')
+
+# Default file for --checkpoint / --resume
+CHECKPOINT_FILE = 'scan_checkpoint.bin'
+
+
+class ScanState:
+    """Scan progress restored from a checkpoint"""
+
+    def __init__(self, grid_size, cells, visited, stack, position, probes=0, moves=0, elapsed=0.0,
+                 cell_size=2.0):
+        self.grid_size = grid_size
+        self.cells = cells        # [y][x] -> (walls, known), each a list of 4 bools
+        self.visited = visited
+        self.stack = stack
+        self.position = position  # robot cell (y, x)
+        self.probes = probes
+        self.moves = moves
+        self.elapsed = elapsed
+        self.cell_size = cell_size  # meters, as used by the navigator that saved it
+
+    def restore(self, knowledge):
+        """Copy the walls and known flags into a WallKnowledge of the same size"""
+        if knowledge.grid_size != self.grid_size:
+            raise ValueError(f"Checkpoint is for a {self.grid_size}x{self.grid_size} grid, "
+                             f"map grid is {knowledge.grid_size}x{knowledge.grid_size}")
+        for y, row in enumerate(self.cells):
+            for x, (walls, known) in enumerate(row):
+                knowledge.map_grid[y][x][:] = walls
+                knowledge.known[y][x][:] = known
+
+
+def pack_state(knowledge, visited, stack, position, probes=0, moves=0, elapsed=0.0, cell_size=2.0):
+    """Serialize the scan state into the checkpoint format"""
+    size = knowledge.grid_size
+    cells = bytearray(size * size)
+    visited_bits = bytearray((size * size + 7) // 8)
+    i = 0
+    for y in range(size):
+        map_row, known_row = knowledge.map_grid[y], knowledge.known[y]
+        for x in range(size):
+            walls, known = map_row[x], known_row[x]
+            cells[i] = (walls[0] | walls[1] << 1 | walls[2] << 2 | walls[3] << 3
+                        | known[0] << 4 | known[1] << 5 | known[2] << 6 | known[3] << 7)
+            i += 1
+    for y, x in visited:
+        i = y * size + x
+        visited_bits[i >> 3] |= 1 << (i & 7)
+
+    flat = [v for cell in stack for v in cell]
+    return b''.join([
+        MAGIC,
+        HEADER.pack(size, position[0], position[1], len(stack), probes, moves, elapsed, cell_size),
+        bytes(cells),
+        bytes(visited_bits),
+        struct.pack(f'<{len(flat)}H', *flat)
+    ])
+
+
+def unpack_state(data):
+    """Parse a checkpoint written by pack_state into a ScanState"""
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a scan checkpoint")
+    offset = len(MAGIC)
+    if len(data) < offset + HEADER.size:
+        raise ValueError("Truncated checkpoint")
+    size, y, x, stack_length, probes, moves, elapsed, cell_size = HEADER.unpack_from(data, offset)
+    offset += HEADER.size
+    if len(data) < offset + size * size + (size * size + 7) // 8 + 4 * stack_length:
+        raise ValueError("Truncated checkpoint")
+
+    cells = []
+    for row_start in range(offset, offset + size * size, size):
+        cells.append([([bool(b & 1), bool(b & 2), bool(b & 4), bool(b & 8)],
+                       [bool(b & 16), bool(b & 32), bool(b & 64), bool(b & 128)])
+                      for b in data[row_start:row_start + size]])
+    offset += size * size
+
+    visited_bits = data[offset:offset + (size * size + 7) // 8]
+    visited = {(i // size, i % size) for i in range(size * size) if visited_bits[i >> 3] >> (i & 7) & 1}
+    offset += len(visited_bits)
+
+    flat = struct.unpack_from(f'<{2 * stack_length}H', data, offset)
+    stack = [(flat[i], flat[i + 1]) for i in range(0, len(flat), 2)]
+    return ScanState(size, cells, visited, stack, (y, x), probes, moves, elapsed, cell_size)
+
+
+def write_checkpoint(path, data):
+    """Replace the checkpoint file atomically"""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path):
+    with open(path, 'rb') as f:
+        return unpack_state(f.read())
+
+
+class ScanCheckpointer:
+    """
+    Periodically saves the scan state from a writer thread.
+
+    Usage:
+        checkpointer = ScanCheckpointer('scan_checkpoint.bin', interval=10)
+        ... after each scanned cell:
+        checkpointer.maybe_save(navigator, visited, stack)
+        ...
+        checkpointer.close(navigator, visited, stack)   # writes a final checkpoint
+    """
+
+    def __init__(self, path, interval=10.0, elapsed=0.0):
+        """
+        Args:
+            interval: minimum seconds between checkpoints
+            elapsed: scan time already spent before this run (when resuming)
+        """
+        self.path = path
+        self.interval = interval
+        self.started = time.perf_counter() - elapsed
+        self.last_save = time.perf_counter()
+        self.saves = 0
+        self.cond = threading.Condition()
+        self._pending = None
+        self._closing = False
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='scan-checkpoint', daemon=True)
+        self._thread.start()
+
+    def snapshot(self, navigator, visited, stack):
+        return pack_state(navigator.knowledge, visited, stack, navigator.current_pos,
+                          navigator.probe_count, navigator.motion_count,
+                          time.perf_counter() - self.started, navigator.cell_size)
+
+    def save(self, navigator, visited, stack):
+        """Queue a checkpoint of the current state (replaces one not written yet)"""
+        data = self.snapshot(navigator, visited, stack)
+        self.last_save = time.perf_counter()
+        with self.cond:
+            self._pending = data
+            self.cond.notify()
+
+    def maybe_save(self, navigator, visited, stack):
+        """save() if the interval has passed since the last checkpoint"""
+        if time.perf_counter() - self.last_save >= self.interval:
+            self.save(navigator, visited, stack)
+
+    def close(self, navigator=None, visited=None, stack=None):
+        """Write the final state (if given) and stop the writer thread"""
+        if navigator is not None:
+            self.save(navigator, visited, stack)
+        with self.cond:
+            self._closing = True
+            self.cond.notify()
+        self._thread.join()
+        if self._error is not None:
+            print(f"✗ Could not write checkpoint: {self._error}")
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self._pending is None and not self._closing:
+                    self.cond.wait()
+                data, self._pending = self._pending, None
+                closing = self._closing
+            if data is not None:
+                try:
+                    write_checkpoint(self.path, data)
+                    self.saves += 1
+                except OSError as e:
+                    self._error = e
+            if closing:
+                return
@@ -0,0 +1,245 @@
+"""
+Analytic proximity-sensor model for the offline backend
+
+Casts rays against the same geometry create_in_coppeliasim builds: wall
+cuboids (cell_size long, 5cm thick) on the cell borders and 25cm radius
+obstacle cylinders in the cell centers. Walls shared by two cells are created
+twice in the scene but only kept once here.
+
+All queries are vectorized: origins and headings broadcast against each other,
+so one call can answer many robots times many directions. Like
+checkProximitySensor the result is the distance to the closest hit inside the
+sensor range (NaN if nothing is detected), optionally over a cone of rays and
+with Gaussian noise and random dropouts.
+"""
+
+import math
+
+import numpy as np
+
+WALL_THICKNESS = 0.05     # see create_in_coppeliasim
+OBSTACLE_RADIUS = 0.25    # see _create_obstacle
+DETECTION_THRESHOLD = 1.1  # default of robot_solve.is_wall_detected
+
+# Robot yaw for each map direction, in robot_solve.Direction order (UP, RIGHT, DOWN, LEFT)
+DIRECTION_YAWS = np.array([math.pi / 2, 0.0, -math.pi / 2, math.pi])
+
+
+def wall_boxes(maze, wall_thickness=WALL_THICKNESS):
+    """
+    Axis-aligned boxes of the maze walls as an (N, 4) array of
+    (xmin, ymin, xmax, ymax), with shared walls listed once.
+    """
+    size = maze.cell_size
+    half = wall_thickness / 2
+    horizontal = set()  # (x, row) of the wall on the -Y side of cell row `row`
+    vertical = set()    # (column, y) of the wall on the -X side of cell column `column`
+    for y in range(maze.height):
+        for x in range(maze.width):
+            walls = maze.cells[y][x]['walls']
+            if walls['north']:
+                horizontal.add((x, y))
+            if walls['south']:
+                horizontal.add((x, y + 1))
+            if walls['west']:
+                vertical.add((x, y))
+            if walls['east']:
+                vertical.add((x + 1, y))
+
+    boxes = [((x * size, row * size - half), ((x + 1) * size, row * size + half))
+             for x, row in sorted(horizontal)]
+    boxes += [((column * size - half, y * size), (column * size + half, (y + 1) * size))
+              for column, y in sorted(vertical)]
+    if not boxes:
+        return np.empty((0, 4))
+    return np.array(boxes, dtype=float).reshape(-1, 4)
+
+
+def obstacle_centers(maze):
+    """(N, 2) array of obstacle cylinder centers in world coordinates"""
+    size = maze.cell_size
+    centers = [((x + 0.5) * size, (y + 0.5) * size) for x, y in sorted(maze.obstacles)]
+    return np.array(centers, dtype=float).reshape(-1, 2)
+
+
+def z_order(ix, iy):
+    """Morton code of non-negative integer tile coordinates (up to 16 bits each)"""
+    code = np.zeros(np.shape(ix), dtype=np.int64)
+    for bit in range(16):
+        code |= ((ix >> bit) & 1) << (2 * bit)
+        code |= ((iy >> bit) & 1) << (2 * bit + 1)
+    return code
+
+
+def ray_box_distances(origins, directions, boxes):
+    """
+    Slab test of N rays against M boxes.
+
+    Returns:
+        (N, M) distances along each ray to the box (0 if the origin is inside), inf for misses
+    """
+    ox, oy = origins[:, 0:1], origins[:, 1:2]
+    dx, dy = directions[:, 0:1], directions[:, 1:2]
+    xmin, ymin, xmax, ymax = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tx1, tx2 = (xmin - ox) / dx, (xmax - ox) / dx
+        ty1, ty2 = (ymin - oy) / dy, (ymax - oy) / dy
+    # Rays parallel to a slab either always or never lie inside it
+    parallel_x = dx == 0
+    inside_x = (ox >= xmin) & (ox <= xmax)
+    tx_near = np.where(parallel_x, np.where(inside_x, -np.inf, np.inf), np.minimum(tx1, tx2))
+    tx_far = np.where(parallel_x, np.where(inside_x, np.inf, -np.inf), np.maximum(tx1, tx2))
+    parallel_y = dy == 0
+    inside_y = (oy >= ymin) & (oy <= ymax)
+    ty_near = np.where(parallel_y, np.where(inside_y, -np.inf, np.inf), np.minimum(ty1, ty2))
+    ty_far = np.where(parallel_y, np.where(inside_y, np.inf, -np.inf), np.maximum(ty1, ty2))
+
+    near = np.maximum(tx_near, ty_near)
+    far = np.minimum(tx_far, ty_far)
+    hit = (near <= far) & (far >= 0)
+    return np.where(hit, np.maximum(near, 0.0), np.inf)
+
+
+def ray_circle_distances(origins, directions, centers, radius):
+    """
+    N rays against M circles of equal radius (directions must be unit length).
+
+    Returns:
+        (N, M) distances along each ray to the circle (0 if the origin is inside), inf for misses
+    """
+    offset = origins[:, None, :] - centers[None, :, :]
+    b = np.einsum('nmk,nk->nm', offset, directions)
+    c = np.einsum('nmk,nmk->nm', offset, offset) - radius * radius
+    disc = b * b - c
+    with np.errstate(invalid='ignore'):
+        t = -b - np.sqrt(disc)
+    hit = (disc >= 0) & ((t >= 0) | (c <= 0))
+    return np.where(hit, np.where(c <= 0, 0.0, t), np.inf)
+
+
+class SensorModel:
+    """Vectorized proximity sensor over wall boxes and obstacle cylinders"""
+
+    def __init__(self, boxes, centers=None, obstacle_radius=OBSTACLE_RADIUS, max_range=2.0,
+                 cone_angle=0.0, cone_rays=1, noise_std=0.0, dropout=0.0, seed=None,
+                 chunk_size=64):
+        """
+        Args:
+            boxes: (N, 4) wall boxes, see wall_boxes
+            centers: (M, 2) obstacle centers, see obstacle_centers
+            max_range: detection range in meters; farther hits read as NaN
+            cone_angle: full opening angle of the detection cone in radians (0 for a single ray)
+            cone_rays: rays spread evenly over the cone; the closest hit is reported
+            noise_std: standard deviation of Gaussian noise added to detected distances
+            dropout: probability that a detection is lost (reads as NaN)
+            seed: seed of the noise generator, for reproducible runs
+            chunk_size: rays intersected per block (bounds the (rays, walls) working arrays)
+        """
+        self.boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        self.centers = np.asarray(centers if centers is not None else [], dtype=float).reshape(-1, 2)
+        self.obstacle_radius = obstacle_radius
+        self.max_range = max_range
+        self.cone_angle = cone_angle
+        self.cone_rays = max(int(cone_rays), 1)
+        self.noise_std = noise_std
+        self.dropout = dropout
+        self.rng = np.random.default_rng(seed)
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def from_maze(cls, maze, wall_thickness=WALL_THICKNESS, **kwargs):
+        """Model of the scene create_in_coppeliasim builds for a MazeGenerator maze"""
+        return cls(wall_boxes(maze, wall_thickness), obstacle_centers(maze), **kwargs)
+
+    def cast(self, origins, angles):
+        """
+        Exact distance along single rays, without cone, noise or dropout.
+
+        Args:
+            origins: (..., 2) ray start points
+            angles: (...) ray directions (yaw in radians); broadcast against origins
+        Returns:
+            distances with the broadcast shape, NaN where nothing is within range
+        """
+        origins = np.asarray(origins, dtype=float)
+        angles = np.asarray(angles, dtype=float)
+        shape = np.broadcast_shapes(origins.shape[:-1], angles.shape)
+        origins = np.broadcast_to(origins, shape + (2,)).reshape(-1, 2)
+        angles = np.broadcast_to(angles, shape).reshape(-1)
+        if len(origins) == 0:
+            return np.full(shape, np.nan)
+        directions = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+        # exact zeros keep axis-aligned rays out of the parallel-slab edge cases
+        directions[np.abs(directions) < 1e-12] = 0.0
+
+        distances = np.full(len(origins), np.inf)
+        # Rays are processed in Z-order blocks so each block covers a compact
+        # area and is only tested against the walls and obstacles near it
+        reach = self.max_range
+        tiles = np.floor((origins - origins.min(axis=0)) / reach).astype(np.int64)
+        order = np.argsort(z_order(tiles[:, 0], tiles[:, 1]), kind='stable')
+        for start in range(0, len(order), self.chunk_size):
+            index = order[start:start + self.chunk_size]
+            o, d = origins[index], directions[index]
+            low = o.min(axis=0) - reach
+            high = o.max(axis=0) + reach
+            best = np.full(len(index), np.inf)
+
+            near = ((self.boxes[:, 2] >= low[0]) & (self.boxes[:, 0] <= high[0])
+                    & (self.boxes[:, 3] >= low[1]) & (self.boxes[:, 1] <= high[1]))
+            if near.any():
+                best = np.minimum(best, ray_box_distances(o, d, self.boxes[near]).min(axis=1))
+
+            r = self.obstacle_radius
+            near = ((self.centers[:, 0] + r >= low[0]) & (self.centers[:, 0] - r <= high[0])
+                    & (self.centers[:, 1] + r >= low[1]) & (self.centers[:, 1] - r <= high[1]))
+            if near.any():
+                best = np.minimum(best, ray_circle_distances(o, d, self.centers[near], r).min(axis=1))
+            distances[index] = best
+
+        distances[distances > self.max_range] = np.nan
+        return distances.reshape(shape)
+
+    def measure(self, origins, headings):
+        """
+        Sensor reading: closest hit over the cone around each heading, with noise and dropout.
+        Shapes broadcast like cast().
+        """
+        headings = np.asarray(headings, dtype=float)
+        if self.cone_rays > 1 and self.cone_angle > 0:
+            spread = np.linspace(-self.cone_angle / 2, self.cone_angle / 2, self.cone_rays)
+            origins = np.asarray(origins, dtype=float)[..., None, :]
+            distances = self.cast(origins, headings[..., None] + spread)
+            with np.errstate(all='ignore'):
+                all_missed = np.isnan(distances).all(axis=-1)
+                distances = np.where(all_missed, np.nan,
+                                     np.nanmin(np.where(all_missed[..., None], 0.0, distances), axis=-1))
+        else:
+            distances = self.cast(origins, headings)
+
+        distances = np.asarray(distances, dtype=float)
+        if self.noise_std > 0:
+            distances = np.maximum(distances + self.rng.normal(0.0, self.noise_std, distances.shape), 0.0)
+        if self.dropout > 0:
+            distances = np.where(self.rng.random(distances.shape) < self.dropout, np.nan, distances)
+        return distances
+
+    def detect(self, origins, headings, threshold=DETECTION_THRESHOLD):
+        """Wall detected within threshold (is_wall_detected on every reading)"""
+        distances = self.measure(origins, headings)
+        with np.errstate(invalid='ignore'):
+            return distances <= threshold
+
+    def cell_walls(self, cells, cell_size, threshold=DETECTION_THRESHOLD):
+        """
+        Probe all four directions from the center of many cells at once.
+
+        Args:
+            cells: sequence of (y, x) cells as used by robot_solve
+        Returns:
+            (N, 4) bool array in Direction order (UP, RIGHT, DOWN, LEFT)
+        """
+        cells = np.asarray(cells, dtype=float).reshape(-1, 2)
+        origins = (cells[:, ::-1] + 0.5) * cell_size
+        return self.detect(origins[:, None, :], DIRECTION_YAWS[None, :], threshold)
@@ -0,0 +1,285 @@
+"""
+Long-lived CoppeliaSim session shared by the maze tools
+
+The session process holds one ZMQ connection (with the `sim` API already
+loaded) and caches object lookups such as getObject('/BubbleRobot'). Tools
+attach to it over a local multiprocessing connection: connection.connect()
+and get_api() return a session-backed client and `sim` whenever a session is
+running, so generate -> solve -> monitor runs skip connecting and handle
+discovery.
+
+    python -m utils session start [--background]
+    python -m utils session status
+    python -m utils session stop
+
+Cached lookups are cleared by scene-changing calls made through the session
+(creating or removing objects, loading scenes, starting or stopping the
+simulation). The session cannot see changes made elsewhere, such as a scene
+reloaded or edited in the CoppeliaSim GUI: run `session invalidate` after those.
+
+Set MAZE_SESSION=0 to make the tools connect directly even if a session runs.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+from .connection import DEFAULT_CACHE_DIR, connect, get_api
+
+SESSION_ENV = 'MAZE_SESSION'
+SESSION_FILE = os.path.join(DEFAULT_CACHE_DIR, 'session.json')
+
+# Lookups whose answers are cached until the scene changes
+CACHED_CALLS = ('getObject', 'getObjectsInTree', 'getObjectAlias')
+# Calls that may add, remove or rename objects, invalidating cached lookups.
+# Stopping the simulation restores the scene, which removes objects created while it ran.
+SCENE_CHANGING_PREFIXES = ('create', 'remove', 'load', 'close', 'copyPaste',
+                           'setObjectAlias', 'setObjectParent', 'addScript',
+                           'startSimulation', 'stopSimulation')
+
+
+def read_session_file(path=SESSION_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_session_file(address, authkey, path=SESSION_FILE):
+    """Store the address and key; only readable by the current user"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'address': address, 'authkey': authkey.hex(), 'pid': os.getpid()}, f)
+    os.replace(tmp_path, path)
+
+
+class SessionServer:
+    """Serves remote `sim` calls from attached tools over one shared ZMQ connection"""
+
+    def __init__(self, host='localhost', port=23000):
+        self.client = connect(host, port, session=False)
+        self.sim = get_api(self.client)
+        self.lock = threading.Lock()  # the ZMQ socket is not thread safe
+        self.cache = {}
+        self.calls = 0
+        self.cache_hits = 0
+        self.attached = 0
+        self.started = time.time()
+        self.running = False
+        self.listener = None
+        self.authkey = os.urandom(32)
+        self.constants = {name: value for name, value in vars(self.sim).items()
+                          if not name.startswith('_') and not callable(value)}
+
+    def call(self, name, args, kwargs):
+        key = (name, args) if name in CACHED_CALLS and not kwargs else None
+        # Lookups and their results are stored under the lock, so a lookup can't
+        # write back a handle after a scene-changing call cleared the cache
+        with self.lock:
+            if key is not None:
+                try:
+                    if key in self.cache:
+                        self.cache_hits += 1
+                        return self.cache[key]
+                except TypeError:  # unhashable arguments
+                    key = None
+            self.calls += 1
+            result = getattr(self.sim, name)(*args, **kwargs)
+            if name.startswith(SCENE_CHANGING_PREFIXES):
+                self.cache.clear()
+            elif key is not None:
+                self.cache[key] = result
+        return result
+
+    def invalidate(self):
+        with self.lock:
+            self.cache.clear()
+
+    def status(self):
+        return {
+            'pid': os.getpid(),
+            'uptime': time.time() - self.started,
+            'calls': self.calls,
+            'cache_hits': self.cache_hits,
+            'cached_lookups': len(self.cache),
+            'attached': self.attached
+        }
+
+    def serve_connection(self, conn):
+        self.attached += 1
+        try:
+            conn.send(('ok', self.constants))
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    break
+                kind = request[0]
+                try:
+                    if kind == 'call':
+                        reply = ('ok', self.call(*request[1:]))
+                    elif kind == 'status':
+                        reply = ('ok', self.status())
+                    elif kind == 'invalidate':
+                        self.invalidate()
+                        reply = ('ok', None)
+                    elif kind == 'shutdown':
+                        conn.send(('ok', None))
+                        self.stop()
+                        break
+                    else:
+                        reply = ('err', f"unknown request {kind!r}")
+                except Exception as e:
+                    reply = ('err', str(e))
+                conn.send(reply)
+        finally:
+            self.attached -= 1
+            conn.close()
+
+    def serve_forever(self, session_file=SESSION_FILE):
+        self.listener = Listener(authkey=self.authkey)
+        write_session_file(self.listener.address, self.authkey, session_file)
+        self.running = True
+        print(f"Session listening on {self.listener.address} (pid {os.getpid()})")
+        try:
+            while True:
+                try:
+                    conn = self.listener.accept()
+                except (OSError, EOFError, AuthenticationError):
+                    continue  # failed handshake, e.g. a client with a stale key
+                if not self.running:
+                    conn.close()
+                    break
+                threading.Thread(target=self.serve_connection, args=(conn,), daemon=True).start()
+        finally:
+            self.running = False
+            self.listener.close()
+            info = read_session_file(session_file)
+            if info is not None and info.get('pid') == os.getpid():
+                os.remove(session_file)
+
+    def stop(self):
+        """Stop accepting tools; the blocking accept() is woken by a last connection"""
+        self.running = False
+        try:
+            Client(self.listener.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+
+
+class SessionSim:
+    """`sim` stand-in whose constants are local and whose functions run in the session"""
+
+    def __init__(self, session, constants):
+        self.__dict__.update(constants)
+        self._session = session
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        request = self._session.request
+
+        def remote(*args, **kwargs):
+            return request('call', name, args, kwargs)
+
+        remote.__name__ = name
+        self.__dict__[name] = remote
+        return remote
+
+
+class SessionClient:
+    """Drop-in for RemoteAPIClient as used by the tools (setStepping, step, sim)"""
+
+    def __init__(self, info):
+        address = info['address']
+        if isinstance(address, list):  # (host, port) stored as a JSON list
+            address = tuple(address)
+        self.conn = Client(address, authkey=bytes.fromhex(info['authkey']))
+        self.lock = threading.Lock()
+        status, constants = self.conn.recv()
+        self.sim = SessionSim(self, constants)
+
+    def request(self, *message):
+        with self.lock:
+            self.conn.send(message)
+            status, value = self.conn.recv()
+        if status != 'ok':
+            raise Exception(value)
+        return value
+
+    def setStepping(self, enable=True):
+        return self.sim.setStepping(enable)
+
+    def step(self, *, wait=True):
+        return self.sim.step(wait)
+
+    def close(self):
+        self.conn.close()
+
+
+def attach(session_file=SESSION_FILE):
+    """SessionClient for the running session, or None if there is none (or MAZE_SESSION=0)"""
+    if os.environ.get(SESSION_ENV, '') == '0':
+        return None
+    info = read_session_file(session_file)
+    if info is None:
+        return None
+    try:
+        return SessionClient(info)
+    except (OSError, EOFError, AuthenticationError):
+        return None  # stale session file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared CoppeliaSim session for the maze tools")
+    parser.add_argument('action', choices=['start', 'stop', 'status', 'invalidate'])
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=23000)
+    parser.add_argument('--background', action='store_true', help="detach the session process")
+    args = parser.parse_args()
+
+    session = attach()
+    if args.action == 'start':
+        if session is not None:
+            print(f"Session already running (pid {session.request('status')['pid']})")
+            return
+        if args.background:
+            subprocess.Popen([sys.executable, '-m', __package__, 'session', 'start',
+                              '--host', args.host, '--port', str(args.port)],
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                             start_new_session=True)
+            print("Session started in the background")
+            return
+        server = SessionServer(args.host, args.port)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nSession stopped")
+        return
+
+    if session is None:
+        print("No session running")
+        return
+    if args.action == 'status':
+        for key, value in session.request('status').items():
+            print(f"{key:16s} {value:.1f}" if isinstance(value, float) else f"{key:16s} {value}")
+    elif args.action == 'invalidate':
+        session.request('invalidate')
+        print("Cached lookups cleared")
+    else:
+        session.request('shutdown')
+        print("Session stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Remote-call profiler for the CoppeliaSim `sim` object
+
+Wraps `sim` so every remote call is counted and timed by method name, with a
+latency histogram per method, and attributes time spent in time.sleep to the
+function that slept.
+
+Enable it with the SIM_PROFILE environment variable:
+    SIM_PROFILE=1 python -m utils solve           # summary printed at exit
+    SIM_PROFILE=scan.json python -m utils solve   # summary printed and exported as JSON
+
+When SIM_PROFILE is not set, instrument() returns the original `sim` object,
+so there is no overhead at all.
+"""
+
+import atexit
+import json
+import os
+import sys
+import time
+
+PROFILE_ENV = 'SIM_PROFILE'
+
+# Upper bounds (seconds) of the latency histogram buckets: 10us doubling up to ~5s, plus overflow
+BUCKET_BOUNDS = [1e-5 * 2 ** i for i in range(20)]
+
+
+class CallStats:
+    """Count, total time and latency histogram of one operation"""
+
+    __slots__ = ('count', 'total', 'min', 'max', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.histogram = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        if elapsed < self.min:
+            self.min = elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        bucket = 0
+        while bucket < len(BUCKET_BOUNDS) and elapsed > BUCKET_BOUNDS[bucket]:
+            bucket += 1
+        self.histogram[bucket] += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the histogram bucket holding the given fraction of calls"""
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target and count:
+                return min(BUCKET_BOUNDS[bucket], self.max) if bucket < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+    def to_dict(self):
+        histogram = {f'<={bound:g}': n for bound, n in zip(BUCKET_BOUNDS, self.histogram) if n}
+        if self.histogram[-1]:
+            histogram['overflow'] = self.histogram[-1]
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+            'p50': self.percentile(0.5),
+            'p99': self.percentile(0.99),
+            'histogram': histogram
+        }
+
+
+class SimProfiler:
+    """Collects per-operation statistics for remote calls and sleeps"""
+
+    def __init__(self):
+        self.calls = {}
+        self.sleeps = {}
+        self.started = time.perf_counter()
+        self._sleep = None
+
+    def record(self, name, elapsed):
+        stats = self.calls.get(name)
+        if stats is None:
+            stats = self.calls[name] = CallStats()
+        stats.add(elapsed)
+
+    def record_sleep(self, caller, elapsed):
+        stats = self.sleeps.get(caller)
+        if stats is None:
+            stats = self.sleeps[caller] = CallStats()
+        stats.add(elapsed)
+
+    def patch_sleep(self):
+        """Replace time.sleep so sleeps are attributed to the calling function"""
+        if self._sleep is not None:
+            return
+        self._sleep = original_sleep = time.sleep
+
+        def profiled_sleep(seconds):
+            start = time.perf_counter()
+            original_sleep(seconds)
+            self.record_sleep(sys._getframe(1).f_code.co_name, time.perf_counter() - start)
+
+        time.sleep = profiled_sleep
+
+    def unpatch_sleep(self):
+        if self._sleep is not None:
+            time.sleep = self._sleep
+            self._sleep = None
+
+    def summary(self):
+        wall_time = time.perf_counter() - self.started
+        return {
+            'wall_time': wall_time,
+            'remote_calls': sum(s.count for s in self.calls.values()),
+            'remote_time': sum(s.total for s in self.calls.values()),
+            'sleep_time': sum(s.total for s in self.sleeps.values()),
+            'calls': {name: s.to_dict() for name, s in self.calls.items()},
+            'sleeps': {name: s.to_dict() for name, s in self.sleeps.items()}
+        }
+
+    def print_summary(self, file=None):
+        file = file or sys.stderr
+        summary = self.summary()
+        print("\n=== Remote API profile ===", file=file)
+        print(f"Wall time {summary['wall_time']:.3f}s | {summary['remote_calls']} remote calls "
+              f"taking {summary['remote_time']:.3f}s | sleeping {summary['sleep_time']:.3f}s", file=file)
+        print(f"{'operation':36s} {'calls':>8s} {'total s':>9s} {'mean ms':>9s} "
+              f"{'p50 ms':>8s} {'p99 ms':>8s} {'max ms':>8s}", file=file)
+        rows = [(name, s) for name, s in self.calls.items()]
+        rows += [(f'time.sleep ({caller})', s) for caller, s in self.sleeps.items()]
+        for name, s in sorted(rows, key=lambda row: row[1].total, reverse=True):
+            print(f"{name:36s} {s.count:8d} {s.total:9.3f} {s.total / s.count * 1000:9.3f} "
+                  f"{s.percentile(0.5) * 1000:8.3f} {s.percentile(0.99) * 1000:8.3f} "
+                  f"{s.max * 1000:8.3f}", file=file)
+
+    def export_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+class ProfiledSim:
+    """
+    Transparent proxy around a `sim` object.
+    Callables are wrapped once on first access and cached; constants are passed through.
+    """
+
+    def __init__(self, sim, profiler, prefix='sim.'):
+        object.__setattr__(self, '_sim', sim)
+        object.__setattr__(self, '_profiler', profiler)
+        object.__setattr__(self, '_prefix', prefix)
+
+    def __getattr__(self, name):
+        attr = getattr(self._sim, name)
+        if callable(attr):
+            attr = self._wrap(self._prefix + name, attr)
+        object.__setattr__(self, name, attr)  # later lookups skip __getattr__
+        return attr
+
+    def _wrap(self, name, func):
+        record = self._profiler.record
+        perf_counter = time.perf_counter
+
+        def profiled(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, perf_counter() - start)
+
+        profiled.__name__ = name
+        return profiled
+
+
+_profiler = None
+
+
+def get_profiler():
+    """The process-wide profiler, created (and reported at exit) on first use"""
+    global _profiler
+    if _profiler is None:
+        _profiler = SimProfiler()
+        _profiler.patch_sleep()
+        target = os.environ.get(PROFILE_ENV, '')
+
+        def report():
+            _profiler.print_summary()
+            if target.endswith('.json'):
+                _profiler.export_json(target)
+                print(f"Profile written to {target}", file=sys.stderr)
+
+        atexit.register(report)
+    return _profiler
+
+
+def instrument(sim, enabled=None):
+    """
+    Return a profiled proxy for sim if profiling is enabled, otherwise sim itself.
+
+    Args:
+        enabled: force profiling on or off; by default the SIM_PROFILE environment variable decides
+    """
+    if enabled is None:
+        enabled = os.environ.get(PROFILE_ENV, '') not in ('', '0')
+    if not enabled:
+        return sim
+    return ProfiledSim(sim, get_profiler())
@@ -0,0 +1,189 @@
+"""
+Binary telemetry log for full-rate robot sensor capture
+
+Samples (simulation time, pose and every sensor distance) are copied into a
+preallocated NumPy ring buffer, and a writer thread flushes them to disk in
+chunks, so the control loop never waits on file I/O. If the writer falls a
+whole buffer behind, the producer waits for it (every step is kept) unless
+dropping samples was asked for.
+
+File layout:
+    8 bytes   magic b'RBTLM01\\n'
+    4 bytes   header length (little-endian uint32)
+    N bytes   JSON header {"sensors": [...]}, space padded to a 64 byte boundary
+    ...       packed records of record_dtype(sensors)
+
+Sensors with no detection are stored as NaN.
+"""
+
+import json
+import math
+import struct
+import threading
+
+import numpy as np
+
+MAGIC = b'RBTLM01\n'
+HEADER_ALIGN = 64
+
+
+def record_dtype(sensor_names):
+    """NumPy record layout for a log with the given sensor columns"""
+    return np.dtype([
+        ('time', '<f8'),
+        ('frame', '<u4'),
+        ('position', '<f4', (3,)),
+        ('orientation', '<f4', (3,)),
+        ('sensors', '<f4', (len(sensor_names),))
+    ])
+
+
+def write_header(f, sensor_names):
+    """Write the file header; returns the byte offset where records start"""
+    header = json.dumps({'sensors': list(sensor_names)}).encode()
+    prefix = len(MAGIC) + 4
+    padded = -(-(prefix + len(header)) // HEADER_ALIGN) * HEADER_ALIGN - prefix
+    f.write(MAGIC)
+    f.write(struct.pack('<I', padded))
+    f.write(header.ljust(padded))
+    return prefix + padded
+
+
+def read_header(f):
+    """Read the file header; returns (sensor_names, data_offset)"""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a telemetry log")
+    (length,) = struct.unpack('<I', f.read(4))
+    header = json.loads(f.read(length))
+    return header['sensors'], len(MAGIC) + 4 + length
+
+
+class TelemetryRingBuffer:
+    """Fixed-size record buffer shared by one producer and one writer thread"""
+
+    def __init__(self, dtype, capacity=65536, drop_when_full=False):
+        """
+        Args:
+            drop_when_full: count and drop samples while the buffer is full
+                            instead of waiting for the writer to free space
+        """
+        self.data = np.zeros(capacity, dtype=dtype)
+        self.capacity = capacity
+        self.drop_when_full = drop_when_full
+        self.head = 0  # records appended so far
+        self.tail = 0  # records handed to the writer so far
+        self.dropped = 0
+        self.cond = threading.Condition()
+
+    def append(self, sim_time, frame, position, orientation, sensors):
+        """
+        Copy one sample into the buffer, waiting while it is full.
+        With drop_when_full, returns False instead if the sample was dropped.
+        """
+        with self.cond:
+            while self.head - self.tail >= self.capacity:
+                if self.drop_when_full:
+                    self.dropped += 1
+                    return False
+                self.cond.wait()
+            row = self.data[self.head % self.capacity]
+            row['time'] = sim_time
+            row['frame'] = frame
+            row['position'] = position
+            row['orientation'] = orientation
+            row['sensors'] = sensors
+            self.head += 1
+            self.cond.notify_all()
+        return True
+
+    def pending(self):
+        return self.head - self.tail
+
+
+class TelemetryLogger:
+    """
+    Record samples into a ring buffer and stream them to a log file.
+
+    Usage:
+        with TelemetryLogger('run.tlm', ['SensingNose']) as log:
+            log.log(sim_time, frame, position, orientation, {'SensingNose': 0.42})
+    """
+
+    def __init__(self, path, sensor_names, capacity=65536, chunk_size=1024, drop_when_full=False):
+        """
+        Args:
+            drop_when_full: drop samples when the writer falls behind instead of
+                            making log() wait (see TelemetryRingBuffer)
+        """
+        self.path = path
+        self.sensor_names = list(sensor_names)
+        self.chunk_size = min(chunk_size, capacity)
+        self.buffer = TelemetryRingBuffer(record_dtype(self.sensor_names), capacity, drop_when_full)
+        self.records_written = 0
+        self._sensor_values = np.full(len(self.sensor_names), np.nan, dtype='<f4')
+        self._closing = False
+        self._file = open(path, 'wb')
+        write_header(self._file, self.sensor_names)
+        self._thread = threading.Thread(target=self._run, name='telemetry-writer', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def log(self, sim_time, frame, position, orientation, sensor_data):
+        """
+        Add one sample.
+
+        Args:
+            sensor_data: dict of sensor name -> distance (None for no detection),
+                         or a sequence of values in sensor_names order
+        """
+        values = self._sensor_values
+        if isinstance(sensor_data, dict):
+            for i, name in enumerate(self.sensor_names):
+                value = sensor_data.get(name)
+                values[i] = math.nan if value is None else value
+        else:
+            for i, value in enumerate(sensor_data):
+                values[i] = math.nan if value is None else value
+        return self.buffer.append(sim_time, frame, position, orientation, values)
+
+    def close(self):
+        """Flush everything still buffered and close the file"""
+        if self._file.closed:
+            return
+        with self.buffer.cond:
+            self._closing = True
+            self.buffer.cond.notify_all()
+        self._thread.join()
+        self._file.close()
+
+    def _run(self):
+        buffer = self.buffer
+        while True:
+            with buffer.cond:
+                while buffer.pending() < self.chunk_size and not self._closing:
+                    buffer.cond.wait()
+                start, end = buffer.tail, buffer.head
+                closing = self._closing
+
+            # Records in [start, end) are not touched by the producer until tail moves past them
+            first = start % buffer.capacity
+            count = end - start
+            if first + count <= buffer.capacity:
+                self._file.write(buffer.data[first:first + count].tobytes())
+            else:
+                split = buffer.capacity - first
+                self._file.write(buffer.data[first:].tobytes())
+                self._file.write(buffer.data[:count - split].tobytes())
+            self.records_written += count
+
+            with buffer.cond:
+                buffer.tail = end
+                buffer.cond.notify_all()  # wake a producer waiting for space
+            if closing and end == buffer.head:
+                self._file.flush()
+                return
@@ -0,0 +1,256 @@
+"""
+Offline replay and analysis of telemetry logs recorded by robot_sensor_monitor.py --log
+
+The log is memory-mapped, so even multi-million frame recordings are read lazily
+and every statistic is computed with vectorized NumPy over whole columns.
+"""
+
+import argparse
+import math
+
+import numpy as np
+
+from .telemetry import read_header, record_dtype
+from .robot_solve import Direction, WallKnowledge, display_map
+
+# Map index for each yaw sector: +X, +Y, -X, -Y (see get_direction_from_orientation)
+SECTOR_DIRECTIONS = np.array([Direction.RIGHT.value, Direction.UP.value,
+                              Direction.LEFT.value, Direction.DOWN.value])
+
+
+class TelemetryLog:
+    """Read-only, memory-mapped view of a telemetry log"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.sensor_names, offset = read_header(f)
+        self.dtype = record_dtype(self.sensor_names)
+        self.records = np.memmap(path, dtype=self.dtype, mode='r', offset=offset)
+
+    def __len__(self):
+        return len(self.records)
+
+    def sensor(self, name):
+        """Distance column of one sensor (NaN where nothing was detected)"""
+        return self.records['sensors'][:, self.sensor_names.index(name)]
+
+    def chunks(self, chunk_size=65536):
+        """Yield consecutive record slices without loading the whole file"""
+        for start in range(0, len(self.records), chunk_size):
+            yield self.records[start:start + chunk_size]
+
+    def frames(self):
+        """
+        Yield frames one at a time as (sim_time, position, orientation, sensor_data),
+        in the same shapes the live scripts use (sensor_data maps name -> distance or None).
+        """
+        for chunk in self.chunks():
+            for record in chunk:
+                sensor_data = {name: (None if math.isnan(value) else float(value))
+                               for name, value in zip(self.sensor_names, record['sensors'])}
+                yield (float(record['time']), record['position'].tolist(),
+                       record['orientation'].tolist(), sensor_data)
+
+
+def detections(distances, threshold=1.1):
+    """Vectorized is_wall_detected: True where distance is valid and within threshold"""
+    with np.errstate(invalid='ignore'):
+        return distances <= threshold
+
+
+def sensor_statistics(log, bins=20, max_range=None):
+    """
+    Per-sensor detection rate, noise and distance histogram.
+
+    Noise is estimated from frame-to-frame differences while the sensor keeps
+    detecting, std(diff) / sqrt(2), which removes the slow change caused by motion.
+    """
+    stats = {}
+    for name in log.sensor_names:
+        distances = np.asarray(log.sensor(name), dtype=np.float64)
+        valid = ~np.isnan(distances)
+        detected = distances[valid]
+        entry = {'detection_rate': float(valid.mean()) if len(valid) else 0.0}
+
+        both = valid[1:] & valid[:-1]
+        if both.any():
+            entry['noise'] = float(np.diff(distances)[both].std() / math.sqrt(2))
+        else:
+            entry['noise'] = None
+
+        if len(detected):
+            entry['mean'] = float(detected.mean())
+            hist_range = (0.0, max_range or float(detected.max()) or 1.0)
+            counts, edges = np.histogram(detected, bins=bins, range=hist_range)
+            entry['histogram'] = (counts, edges)
+        stats[name] = entry
+    return stats
+
+
+def pose_drift(log):
+    """Net displacement, travelled path length and yaw change over the whole log"""
+    position = np.asarray(log.records['position'], dtype=np.float64)
+    yaw = np.unwrap(np.asarray(log.records['orientation'][:, 2], dtype=np.float64))
+    if len(position) == 0:
+        return {}
+    steps = np.linalg.norm(np.diff(position, axis=0), axis=1)
+    return {
+        'displacement': (position[-1] - position[0]).tolist(),
+        'distance': float(np.linalg.norm(position[-1] - position[0])),
+        'path_length': float(steps.sum()),
+        'z_range': float(np.ptp(position[:, 2])),
+        'yaw_change_deg': float(np.degrees(yaw[-1] - yaw[0]))
+    }
+
+
+def frame_timing(log):
+    """Simulation time step statistics and frames missing from the log"""
+    times = np.asarray(log.records['time'], dtype=np.float64)
+    frames = np.asarray(log.records['frame'], dtype=np.int64)
+    if len(times) < 2:
+        return {}
+    dt = np.diff(times)
+    p50, p99 = np.percentile(dt, [50, 99])
+    return {
+        'frames': len(times),
+        'duration': float(times[-1] - times[0]),
+        'dt_mean': float(dt.mean()),
+        'dt_std': float(dt.std()),
+        'dt_min': float(dt.min()),
+        'dt_max': float(dt.max()),
+        'dt_p50': float(p50),
+        'dt_p99': float(p99),
+        'missing_frames': int((np.diff(frames) - 1).clip(min=0).sum())
+    }
+
+
+def threshold_sweep(distances, thresholds):
+    """Fraction of frames counted as a wall for each candidate threshold"""
+    distances = np.asarray(distances, dtype=np.float64)
+    total = max(len(distances), 1)
+    distances = np.sort(distances[~np.isnan(distances)])
+    # sorted distances let every threshold be answered with one binary search
+    counts = np.searchsorted(distances, np.asarray(thresholds), side='right')
+    return counts / total
+
+
+def wall_votes(log, sensor='SensingNose', threshold=1.1, grid_size=8, cell_size=2.0,
+               center_tolerance=0.25):
+    """
+    Count wall / open observations per map edge.
+
+    Only frames taken near a cell center are used, since that is where the
+    threshold in is_wall_detected was calibrated. The facing direction comes
+    from the yaw the same way as get_direction_from_orientation.
+
+    Returns:
+        (walls, opens): int arrays of shape (grid_size, grid_size, 4) indexed [y][x][direction]
+    """
+    position = np.asarray(log.records['position'], dtype=np.float64)
+    yaw = np.asarray(log.records['orientation'][:, 2], dtype=np.float64)
+    distances = np.asarray(log.sensor(sensor), dtype=np.float64)
+
+    cell = np.floor(position[:, :2] / cell_size).astype(np.int64)
+    offset = position[:, :2] - (cell + 0.5) * cell_size
+    usable = ((np.abs(offset) <= center_tolerance).all(axis=1)
+              & (cell >= 0).all(axis=1) & (cell < grid_size).all(axis=1))
+
+    sector = np.floor(((yaw + math.pi / 4) % (2 * math.pi)) / (math.pi / 2)).astype(np.int64) % 4
+    direction = SECTOR_DIRECTIONS[sector]
+    index = (cell[:, 1] * grid_size + cell[:, 0]) * 4 + direction
+
+    wall = detections(distances, threshold)
+    size = grid_size * grid_size * 4
+    walls = np.bincount(index[usable & wall], minlength=size).reshape(grid_size, grid_size, 4)
+    opens = np.bincount(index[usable & ~wall], minlength=size).reshape(grid_size, grid_size, 4)
+    return walls, opens
+
+
+def build_map(log, sensor='SensingNose', threshold=1.1, grid_size=8, cell_size=2.0):
+    """
+    Rebuild map_grid from a recording by majority vote over all observations of each edge.
+    Returns (map_grid, knowledge).
+    """
+    walls, opens = wall_votes(log, sensor, threshold, grid_size, cell_size)
+    map_grid = [[[False, False, False, False] for _ in range(grid_size)] for _ in range(grid_size)]
+    knowledge = WallKnowledge(map_grid)
+
+    for y, x, d in zip(*np.nonzero(walls + opens)):
+        direction = Direction(int(d))
+        if not knowledge.is_known(y, x, direction):
+            # both sides of an edge vote together
+            other = knowledge.neighbor(y, x, direction)
+            wall_count, open_count = walls[y, x, d], opens[y, x, d]
+            if other is not None:
+                back = (d + 2) % 4
+                wall_count += walls[other[0], other[1], back]
+                open_count += opens[other[0], other[1], back]
+            knowledge.record(int(y), int(x), direction, bool(wall_count > open_count))
+    return map_grid, knowledge
+
+
+def parse_thresholds(text):
+    """Parse 'start:stop:step' or a comma separated list"""
+    if ':' in text:
+        start, stop, step = (float(v) for v in text.split(':'))
+        return np.arange(start, stop + step / 2, step)
+    return np.array([float(v) for v in text.split(',')])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze a recorded telemetry log")
+    parser.add_argument('log', help="telemetry file written by robot_sensor_monitor.py --log")
+    parser.add_argument('--sensor', default='SensingNose', help="sensor used for the wall map")
+    parser.add_argument('--threshold', type=float, default=1.1, help="wall threshold in meters")
+    parser.add_argument('--sweep', metavar='START:STOP:STEP',
+                        help="report the wall detection rate for a range of thresholds")
+    parser.add_argument('--map', action='store_true', help="rebuild the wall map from the log")
+    parser.add_argument('--grid-size', type=int, default=8)
+    parser.add_argument('--cell-size', type=float, default=2.0)
+    args = parser.parse_args()
+
+    log = TelemetryLog(args.log)
+    print(f"{args.log}: {len(log)} frames, sensors: {', '.join(log.sensor_names)}")
+
+    timing = frame_timing(log)
+    if timing:
+        print(f"\nTiming: {timing['duration']:.3f}s sim time, "
+              f"dt mean {timing['dt_mean'] * 1000:.3f}ms std {timing['dt_std'] * 1000:.3f}ms "
+              f"p99 {timing['dt_p99'] * 1000:.3f}ms max {timing['dt_max'] * 1000:.3f}ms, "
+              f"{timing['missing_frames']} missing frames")
+
+    drift = pose_drift(log)
+    if drift:
+        print(f"Pose: moved {drift['distance']:.4f}m net over a {drift['path_length']:.4f}m path, "
+              f"yaw change {drift['yaw_change_deg']:.2f}°, z range {drift['z_range']:.4f}m")
+
+    print("\nSensors:")
+    for name, entry in sensor_statistics(log).items():
+        noise = f"{entry['noise']:.5f}m" if entry['noise'] is not None else "n/a"
+        mean = f"{entry['mean']:.4f}m" if 'mean' in entry else "n/a"
+        print(f"  {name:20s} detection {entry['detection_rate'] * 100:6.2f}%  mean {mean}  noise {noise}")
+        if 'histogram' in entry:
+            counts, edges = entry['histogram']
+            peak = max(counts.max(), 1)
+            for count, low, high in zip(counts, edges[:-1], edges[1:]):
+                if count:
+                    print(f"    {low:6.3f}-{high:6.3f}m {'#' * max(1, int(40 * count / peak))} {count}")
+
+    if args.sweep and args.sensor in log.sensor_names:
+        thresholds = parse_thresholds(args.sweep)
+        rates = threshold_sweep(log.sensor(args.sensor), thresholds)
+        print(f"\nWall detection rate for {args.sensor}:")
+        for threshold, rate in zip(thresholds, rates):
+            print(f"  <= {threshold:.3f}m: {rate * 100:6.2f}%")
+
+    if args.map and args.sensor in log.sensor_names:
+        map_grid, knowledge = build_map(log, args.sensor, args.threshold, args.grid_size, args.cell_size)
+        unknown = sum(not known for row in knowledge.known for cell in row for known in cell)
+        print(f"\nMap rebuilt from {args.sensor} (threshold {args.threshold}m), "
+              f"{unknown} wall sides never observed:")
+        display_map(map_grid)
+
+
+if __name__ == "__main__":
+    main()